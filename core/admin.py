@@ -1,8 +1,15 @@
+from django import forms
 from django.contrib import admin
+from django.contrib.admin import helpers
+from django.template.response import TemplateResponse
+from django.urls import reverse
+from django.utils.html import format_html
+from . import events, jobs, search
+from .pagination import EstimatedCountPaginator
 from .models import (
     User, Category, Skill, UserSkill, Proposal, Request,
     Exchange, Review, Message, Event, EventParticipation,
-    Point, PointTransaction
+    Point, PointTransaction, AdminJob
 )
 
 # @admin.register(User)
@@ -12,16 +19,75 @@ from .models import (
 #     list_filter = ['city', 'rating']
 #     ordering = ['-registration_date']
 
+class IndexedSearchMixin:
+    """Поиск в админке через поисковый индекс вместо LIKE '%...%'."""
+    search_kind = None
+    search_limit = 1000
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        ids = [object_id for _, object_id, _ in search.search_ids(search_term, [self.search_kind], self.search_limit)]
+        return queryset.filter(pk__in=ids), False
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Список для таблиц на миллионы строк: без COUNT(*) по всей таблице
+    (оценка числа строк и счёт до порога), связанные объекты из
+    list_display и их __str__ — через list_select_related.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+class PointsAmountForm(forms.Form):
+    amount = forms.IntegerField(label='Очков каждому', min_value=1)
+
+
+class BackgroundActionsMixin:
+    """
+    Массовые действия через очередь core/jobs.py: в запросе только
+    собираются id выбранных объектов, работу делает воркер run_jobs.
+    """
+
+    def enqueue_job(self, request, kind, ids, params=None):
+        job = jobs.enqueue(kind, ids, params, request.user)
+        url = reverse('admin:core_adminjob_change', args=[job.pk])
+        self.message_user(request, format_html(
+            'Задача <a href="{}">{}</a> поставлена в очередь, объектов: {}', url, job, job.total,
+        ))
+        return job
+
+    def ask_params(self, request, queryset, form_class, title):
+        """Промежуточная страница с параметрами задачи. Возвращает cleaned_data или ответ со страницей."""
+        form = form_class(request.POST if 'apply' in request.POST else None)
+        if form.is_valid():
+            return form.cleaned_data
+        return TemplateResponse(request, 'admin/core/job_params.html', {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': title,
+            'form': form,
+            'count': queryset.count(),
+            'action': request.POST['action'],
+            'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', '0'),
+        })
+
+
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ['name']
     search_fields = ['name']
+    search_kind = 'category'
 
 @admin.register(Skill)
-class SkillAdmin(admin.ModelAdmin):
+class SkillAdmin(IndexedSearchMixin, LargeTableAdmin):
     list_display = ['name', 'level', 'category']
     list_filter = ['category', 'level']
+    list_select_related = ['category']
     search_fields = ['name', 'description']
+    search_kind = 'skill'
+    autocomplete_fields = ['category']
 
 # @admin.register(UserSkill)
 # class UserSkillAdmin(admin.ModelAdmin):
@@ -30,73 +96,194 @@ class SkillAdmin(admin.ModelAdmin):
 #     search_fields = ['user__email', 'skill__name']
 
 @admin.register(Proposal)
-class ProposalAdmin(admin.ModelAdmin):
+class ProposalAdmin(BackgroundActionsMixin, LargeTableAdmin):
     list_display = ['user', 'skill_offered', 'skill_wanted', 'format', 'created_at']
     list_filter = ['format', 'created_at']
+    list_select_related = ['user', 'skill_offered', 'skill_wanted']
+    # порядок индексов proposals_created_idx и proposals_format_created_idx
+    ordering = ['-created_at', '-id']
     search_fields = ['user__email', 'description']
     raw_id_fields = ['user', 'skill_offered', 'skill_wanted']  # для удобства при большом количестве записей
+    actions = ['reject_exchanges']
+
+    @admin.action(description='Отклонить активные обмены по предложениям (в фоне)')
+    def reject_exchanges(self, request, queryset):
+        # у предложения нет своего статуса — отклоняются начатые по нему обмены
+        ids = Exchange.objects.filter(proposal__in=queryset, status='активен').order_by('pk').values_list('pk', flat=True)
+        self.enqueue_job(request, 'exchange_status', ids, {'status': 'отклонён'})
 
 @admin.register(Request)
-class RequestAdmin(admin.ModelAdmin):
+class RequestAdmin(LargeTableAdmin):
     list_display = ['user', 'skill_wanted', 'skill_offered', 'created_at']
     list_filter = ['created_at']
+    list_select_related = ['user', 'skill_wanted', 'skill_offered']
     search_fields = ['user__email', 'description']
     raw_id_fields = ['user', 'skill_wanted', 'skill_offered']
 
 @admin.register(Exchange)
-class ExchangeAdmin(admin.ModelAdmin):
+class ExchangeAdmin(BackgroundActionsMixin, LargeTableAdmin):
     list_display = ['user1', 'user2', 'status', 'format', 'start_date', 'end_date']
     list_filter = ['status', 'format', 'start_date']
+    list_select_related = ['user1', 'user2']
     search_fields = ['user1__email', 'user2__email']
     raw_id_fields = ['user1', 'user2', 'proposal', 'request']
+    actions = ['complete_exchanges', 'reject_exchanges', 'reward_exchanges']
+
+    def _change_status(self, request, queryset, status):
+        ids = queryset.filter(status__in=jobs.EXCHANGE_TRANSITIONS[status]).order_by('pk').values_list('pk', flat=True)
+        self.enqueue_job(request, 'exchange_status', ids, {'status': status})
+
+    @admin.action(description='Завершить активные обмены (в фоне)')
+    def complete_exchanges(self, request, queryset):
+        self._change_status(request, queryset, 'завершён')
+
+    @admin.action(description='Отклонить активные обмены (в фоне)')
+    def reject_exchanges(self, request, queryset):
+        self._change_status(request, queryset, 'отклонён')
+
+    @admin.action(description='Начислить очки за завершённые обмены (в фоне)')
+    def reward_exchanges(self, request, queryset):
+        params = self.ask_params(request, queryset, PointsAmountForm, 'Начисление очков за обмены')
+        if isinstance(params, TemplateResponse):
+            return params
+        # уже награждённые обмены обработчик пропустит сам
+        ids = queryset.filter(status='завершён').order_by('pk').values_list('pk', flat=True)
+        self.enqueue_job(request, 'exchange_reward', ids, params)
 
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin):
+class ReviewAdmin(LargeTableAdmin):
     list_display = ['reviewer', 'reviewed_user', 'rating', 'exchange', 'created_at']
     list_filter = ['rating', 'created_at']
+    # Exchange.__str__ выводит имена обоих участников
+    list_select_related = ['reviewer', 'reviewed_user', 'exchange__user1', 'exchange__user2']
     search_fields = ['reviewer__email', 'reviewed_user__email', 'text']
+    raw_id_fields = ['reviewer', 'reviewed_user', 'exchange']
 
 @admin.register(Message)
-class MessageAdmin(admin.ModelAdmin):
+class MessageAdmin(LargeTableAdmin):
     list_display = ['sender', 'receiver', 'exchange', 'sent_at', 'is_read']
     list_filter = ['is_read', 'sent_at']
+    list_select_related = ['sender', 'receiver', 'exchange__user1', 'exchange__user2']
     search_fields = ['sender__email', 'receiver__email', 'text']
     raw_id_fields = ['exchange', 'sender', 'receiver']
 
 @admin.register(Event)
-class EventAdmin(admin.ModelAdmin):
-    list_display = ['title', 'organizer', 'event_date', 'category', 'max_participants']
+class EventAdmin(LargeTableAdmin):
+    list_display = ['title', 'organizer', 'event_date', 'category', 'max_participants', 'confirmed_count']
     list_filter = ['event_date', 'category']
+    list_select_related = ['organizer', 'category']
     search_fields = ['title', 'description', 'organizer__email']
-    raw_id_fields = ['organizer', 'category']
+    raw_id_fields = ['organizer']
+    autocomplete_fields = ['category']
+    readonly_fields = ['confirmed_count']
 
 @admin.register(EventParticipation)
-class EventParticipationAdmin(admin.ModelAdmin):
+class EventParticipationAdmin(LargeTableAdmin):
     list_display = ['user', 'event', 'status', 'registered_at']
     list_filter = ['status', 'registered_at']
+    list_select_related = ['user', 'event']
     search_fields = ['user__email', 'event__title']
+    raw_id_fields = ['user', 'event']
+    actions = ['cancel_participation']
+
+    def get_readonly_fields(self, request, obj=None):
+        # статус меняет только core/events.py, иначе разъедется счётчик мест
+        if obj is None:
+            return ['status']
+        return ['user', 'event', 'status']
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            participation = events.register(obj.user, obj.event)
+            obj.pk = participation.pk
+            obj.status = participation.status
+
+    @admin.action(description='Отменить участие (место перейдёт ожидающему)')
+    def cancel_participation(self, request, queryset):
+        cancelled = sum(
+            events.cancel(user_id, event_id)
+            for user_id, event_id in queryset.values_list('user_id', 'event_id')
+        )
+        self.message_user(request, f'Отменено участий: {cancelled}')
 
 @admin.register(Point)
-class PointAdmin(admin.ModelAdmin):
+class PointAdmin(LargeTableAdmin):
     list_display = ['user', 'balance']
+    list_select_related = ['user']
     search_fields = ['user__email']
+    raw_id_fields = ['user']
 
 @admin.register(PointTransaction)
-class PointTransactionAdmin(admin.ModelAdmin):
+class PointTransactionAdmin(LargeTableAdmin):
     list_display = ['user', 'amount', 'reason', 'exchange', 'created_at']
     list_filter = ['reason', 'created_at']
+    list_select_related = ['user', 'exchange__user1', 'exchange__user2']
     search_fields = ['user__email']
     raw_id_fields = ['user', 'exchange']
 
 
+@admin.register(AdminJob)
+class AdminJobAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'status', 'progress_bar', 'affected', 'attempts', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind']
+    list_select_related = ['created_by']
+    ordering = ['-created_at', '-id']
+    exclude = ['object_ids']
+    readonly_fields = [
+        'kind', 'status', 'params', 'progress_bar', 'affected', 'attempts',
+        'created_by', 'created_at', 'started_at', 'heartbeat_at', 'finished_at', 'error',
+    ]
+    actions = ['retry_jobs']
+
+    def get_queryset(self, request):
+        # список id бывает на сотни тысяч элементов — в списке и форме он не нужен
+        return super().get_queryset(request).defer('object_ids')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description='Прогресс')
+    def progress_bar(self, obj):
+        return format_html(
+            '<progress value="{}" max="{}"></progress> {}/{} ({}%)',
+            obj.processed, obj.total or 1, obj.processed, obj.total, obj.progress,
+        )
+
+    @admin.action(description='Повторить упавшие задачи')
+    def retry_jobs(self, request, queryset):
+        self.message_user(request, f'Возвращено в очередь: {jobs.retry(queryset)}')
+
 
 class UserSkilsAdmin(admin.TabularInline):
     model = UserSkill
     extra = 1
-class UserAdmin(admin.ModelAdmin):
+    # <select> со всеми навыками в каждой строке формы не годится
+    autocomplete_fields = ['skill']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('skill')
+class UserAdmin(BackgroundActionsMixin, LargeTableAdmin):
+    search_fields = ['email', 'full_name']
     inlines = [
         UserSkilsAdmin
     ]
+    actions = ['award_points']
+
+    @admin.action(description='Начислить очки (в фоне)')
+    def award_points(self, request, queryset):
+        params = self.ask_params(request, queryset, PointsAmountForm, 'Начисление очков пользователям')
+        if isinstance(params, TemplateResponse):
+            return params
+        self.enqueue_job(request, 'award_points', queryset.order_by('pk').values_list('pk', flat=True), params)
+
+    def formfield_for_manytomany(self, db_field, request, **kwargs):
+        # __str__ права читает content_type — без этого по запросу на каждое право
+        if db_field.name == 'user_permissions':
+            kwargs['queryset'] = db_field.remote_field.model.objects.select_related('content_type')
+        return super().formfield_for_manytomany(db_field, request, **kwargs)
 
 
 admin.site.register(User, UserAdmin)
\ No newline at end of file
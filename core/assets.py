@@ -0,0 +1,215 @@
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.http import Http404, HttpResponse
+from django.templatetags.static import static
+from django.utils._os import safe_join
+
+try:
+    import brotli
+except ImportError:  # brotli — необязательная зависимость, без неё только gzip
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = 'manifest.json'
+
+BASE = [
+    'css/components/global/header.css',
+    'css/components/global/footer.css',
+    'css/base.css',
+]
+
+# бандл на страницу: общие стили + стили страницы, один запрос вместо трёх-пяти
+BUNDLES = {
+    'base': BASE,
+    'home': BASE + ['css/home.css', 'css/components/feature_card.css'],
+    'profile': BASE + ['css/profile.css'],
+    'skills_list': BASE + ['css/skills_list.css'],
+    'skill_create': BASE + ['css/skill_create.css'],
+    'proposals_list': BASE + ['css/proposals_list.css'],
+    'proposal_create': BASE + ['css/proposal_create.css'],
+    'exchanges_list': BASE + ['css/exchanges_list.css'],
+    'exchange_chat': BASE + ['css/exchange_chat.css'],
+    'events': BASE + ['css/events.css'],
+    'login': BASE + ['css/login.css'],
+    'registration': BASE + ['css/registration.css'],
+}
+
+CSS_TOKENS = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|/\*.*?\*/)', re.S)
+CSS_URL = re.compile(r'url\(\s*(["\']?)([^"\')]+)\1\s*\)')
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+ACCEPTS_BR = re.compile(r'\bbr\b')
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+
+
+def minify_css(css):
+    """Убирает комментарии и лишние пробелы; строки (в том числе data: URI) не трогает."""
+    parts = []
+    for part in CSS_TOKENS.split(css):
+        if part.startswith('/*'):
+            continue
+        if part[:1] in ('"', "'"):
+            parts.append(part)
+            continue
+        part = re.sub(r'\s+', ' ', part)
+        part = re.sub(r'\s*([{};,>])\s*', r'\1', part)
+        part = re.sub(r':\s+', ':', part)
+        parts.append(part.replace(';}', '}'))
+    return ''.join(parts).strip()
+
+
+def _absolute_urls(css, path):
+    """Относительные url() в бандле ссылаются не туда — переводим их в адреса static."""
+    def replace(match):
+        quote, target = match.groups()
+        if target.startswith(('data:', 'http:', 'https:', '/', '#')):
+            return match.group(0)
+        resolved = posixpath.normpath(posixpath.join(posixpath.dirname(path), target))
+        return f'url({quote}{static(resolved)}{quote})'
+    return CSS_URL.sub(replace, css)
+
+
+def _write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_bytes(data)
+    # os.replace атомарен: работающий сервер не прочитает файл наполовину
+    os.replace(tmp, path)
+
+
+def build(clean=False):
+    """
+    Собирает бандлы из BUNDLES в ASSETS_ROOT: минифицирует, добавляет к
+    имени хеш содержимого, рядом кладёт .gz и (если установлен brotli) .br,
+    в конце пишет manifest.json. Старые файлы остаются для страниц, уже
+    открытых в браузерах; clean=True удаляет всё, чего нет в новом манифесте.
+    Возвращает [(бандл, имя файла, байт исходников, байт после сжатия, gzip, brotli)].
+    """
+    root = Path(settings.ASSETS_ROOT)
+    manifest = {}
+    stats = []
+    for name, paths in BUNDLES.items():
+        sources = []
+        for path in paths:
+            found = finders.find(path)
+            if found is None:
+                raise FileNotFoundError(f'{path} (бандл {name}) не найден в STATICFILES_DIRS')
+            sources.append(_absolute_urls(Path(found).read_text(encoding='utf-8'), path))
+        source = '\n'.join(sources)
+        data = minify_css(source).encode()
+        digest = hashlib.md5(data, usedforsecurity=False).hexdigest()[:12]
+        filename = f'css/{name}.{digest}.css'
+        target = root / filename
+        gz = gzip.compress(data, compresslevel=9, mtime=0)
+        br = brotli.compress(data, quality=11) if brotli else None
+        if not target.exists():
+            _write(target.with_name(target.name + '.gz'), gz)
+            if br is not None:
+                _write(target.with_name(target.name + '.br'), br)
+            _write(target, data)
+        manifest[name] = filename
+        stats.append((name, filename, len(source.encode()), len(data), len(gz), br and len(br)))
+
+    _write(root / MANIFEST, json.dumps(manifest, indent=2).encode())
+    if clean:
+        keep = {root / filename for filename in manifest.values()}
+        for path in (root / 'css').iterdir():
+            if path.with_suffix('') not in keep and path not in keep:
+                path.unlink()
+    return stats
+
+
+_manifest = (None, {})
+
+
+def manifest():
+    """Манифест последней сборки; перечитывается, когда build_assets его обновит."""
+    global _manifest
+    path = os.path.join(settings.ASSETS_ROOT, MANIFEST)
+    try:
+        mtime = os.stat(path).st_mtime
+    except FileNotFoundError:
+        return {}
+    if _manifest[0] != mtime:
+        with open(path, encoding='utf-8') as file:
+            _manifest = (mtime, json.load(file))
+    return _manifest[1]
+
+
+def bundle_urls(name):
+    """Адреса стилей бандла: собранный файл или, без сборки, исходники по одному."""
+    if settings.ASSETS_BUNDLED:
+        filename = manifest().get(name)
+        if filename:
+            return [settings.ASSETS_URL + filename]
+        logger.warning('Бандл %s не собран, отдаём исходники: python manage.py build_assets', name)
+    return [static(path) for path in BUNDLES[name]]
+
+
+class PrecompressedAssetsMiddleware:
+    """
+    Отдаёт собранные бандлы из ASSETS_ROOT по ASSETS_URL: .br или .gz, если
+    клиент их принимает, иначе исходный файл. Файлы с хешем в имени не
+    меняются, поэтому кешируются на год без перепроверки.
+    Адрес не под STATIC_URL: там запросы runserver перехватывает раньше middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.ASSETS_URL
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.serve(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        return self.serve(request) or await self.get_response(request)
+
+    def serve(self, request):
+        """Ответ с файлом бандла или None, если запрос не к ASSETS_URL."""
+        if not request.path.startswith(self.prefix) or request.method not in ('GET', 'HEAD'):
+            return None
+        # выход за ASSETS_ROOT (../) — SuspiciousFileOperation, ответ 400
+        path = safe_join(settings.ASSETS_ROOT, request.path[len(self.prefix):])
+        if not os.path.isfile(path):
+            raise Http404
+
+        accept = request.headers.get('Accept-Encoding', '')
+        encoding = None
+        for name, suffix, accepts in (('br', '.br', ACCEPTS_BR), ('gzip', '.gz', ACCEPTS_GZIP)):
+            if accepts.search(accept) and os.path.isfile(path + suffix):
+                encoding = name
+                break
+
+        content_type, _ = mimetypes.guess_type(path)
+        if content_type and content_type.startswith('text/'):
+            content_type += '; charset=utf-8'
+        # бандлы — килобайты: читаем целиком, потоковый ответ под ASGI
+        # гонял бы синхронный итератор файла через поток
+        with open(path + {'br': '.br', 'gzip': '.gz'}.get(encoding, ''), 'rb') as file:
+            response = HttpResponse(file.read(), content_type=content_type or 'application/octet-stream')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Vary'] = 'Accept-Encoding'
+        if HASHED_NAME.search(path):
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        else:
+            response.headers['Cache-Control'] = 'no-cache'
+        return response
@@ -0,0 +1,123 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.db import models
+from django.shortcuts import render
+
+from . import fragment_cache
+from .db_routers import read_replica
+from .forms import ProposalFilterForm
+from .models import Category, Exchange, Proposal, Skill
+from .page_cache import aversioned, cached_page
+from .pagination import InvalidCursor, KeysetPaginator
+from .query_budget import query_budget
+from .views import PROPOSALS_PER_PAGE, SKILLS_PER_PAGE
+
+# Async-версии страниц, которые только читают, — для ASGI (skillswap/asgi.py,
+# SKILLSWAP_ASYNC_VIEWS=1); под WSGI async-вьюха дороже синхронной, там
+# остаются views.py. Данные читает async ORM, а шаблон рендерится одним
+# переходом в поток: контекст-процессоры и теги шаблонов синхронные
+# (счётчик непрочитанных, кеш карточек может жить в БД).
+arender = sync_to_async(render)
+aprefetch = sync_to_async(fragment_cache.prefetch)
+
+
+async def _list(queryset):
+    return [obj async for obj in queryset.aiterator()]
+
+
+@cached_page
+async def home_view(request):
+    categories = await aversioned('categories', lambda: _list(Category.objects.all()))
+    context = {
+        "slides": [
+            {
+                "title": "asdsad",
+                "text": "asdsad123",
+                "sub_text": "asdsad213",
+            },
+        ],
+        "categories": categories
+    }
+    return await arender(request, 'home.html', context=context)
+
+
+@cached_page
+@read_replica
+async def skills_list_view(request):
+    paginator = KeysetPaginator(Skill.objects.select_related('category'), ordering=('-id',), per_page=SKILLS_PER_PAGE)
+    try:
+        page = await paginator.apage(request.GET.get('cursor'))
+    except InvalidCursor:
+        page = await paginator.apage()
+
+    context = {
+        'skills': page.object_list,
+        'page': page,
+        'card_cache': await aprefetch('skill', page.object_list),
+    }
+    return await arender(request, 'skills_list.html', context)
+
+
+@cached_page
+@read_replica
+async def proposals_list_view(request):
+    filter_form = ProposalFilterForm(request.GET or None)
+    proposals = Proposal.objects.select_related('user', 'skill_offered', 'skill_wanted')
+    # проверка выбранной категории — запрос к базе
+    if filter_form.is_bound and await sync_to_async(filter_form.is_valid)():
+        proposals = filter_form.filter(proposals)
+
+    paginator = KeysetPaginator(proposals, ordering=('-created_at', '-id'), per_page=PROPOSALS_PER_PAGE)
+    try:
+        page = await paginator.apage(request.GET.get('cursor'))
+    except InvalidCursor:
+        page = await paginator.apage()
+
+    context = {
+        'proposals': page.object_list,
+        'page': page,
+        'filter_form': filter_form,
+        'card_cache': await aprefetch('proposal', page.object_list),
+    }
+    return await arender(request, 'proposals_list.html', context)
+
+
+@login_required
+@query_budget(10)
+async def profile_view(request):
+    user = await request.auser()
+    # запросы async ORM идут через один поток (thread_sensitive), так что
+    # asyncio.gather их не распараллелил бы — читаем по очереди
+    user_skills = await _list(user.user_skills.select_related('skill__category').all())
+    user_proposals = await _list(Proposal.objects.filter(user=user).select_related('skill_offered', 'skill_wanted'))
+    user_exchanges = await _list(
+        Exchange.objects.filter(models.Q(user1=user) | models.Q(user2=user)).select_related('user1', 'user2')
+    )
+
+    context = {
+        'user': user,
+        'user_skills': user_skills,
+        'user_proposals': user_proposals,
+        'user_exchanges': user_exchanges,
+    }
+    return await arender(request, 'profile.html', context)
+
+
+@login_required
+@query_budget(10)
+async def exchanges_list_view(request):
+    user = await request.auser()
+    exchanges = await _list(
+        Exchange.objects.filter(
+            models.Q(user1=user) | models.Q(user2=user)
+        ).select_related(
+            'user1', 'user2',
+            'proposal__skill_offered', 'proposal__skill_wanted',
+            'request__skill_offered', 'request__skill_wanted',
+        ).order_by('-created_at')
+    )
+
+    context = {
+        'exchanges': exchanges,
+    }
+    return await arender(request, 'exchanges_list.html', context)
@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+
+AUTH_CACHE_ALIAS = getattr(settings, 'AUTH_CACHE_ALIAS', 'default')
+USER_CACHE_TIMEOUT = getattr(settings, 'USER_CACHE_TIMEOUT', 300)
+
+
+def _cache():
+    return caches[AUTH_CACHE_ALIAS]
+
+
+def _key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def forget(user_ids):
+    """
+    Сбрасывает закешированных пользователей сразу и ещё раз после
+    фиксации транзакции: до неё другой запрос может закешировать старую
+    строку, а при откате on_commit не сработает вовсе. Вызывается везде,
+    где строка пользователя меняется: save() (сигнал) и UPDATE через F()
+    в unread и ratings.
+    """
+    keys = [_key(user_id) for user_id in user_ids]
+    if keys:
+        _cache().delete_many(keys)
+        transaction.on_commit(lambda: _cache().delete_many(keys))
+
+
+def _cacheable():
+    # внутри транзакции строка может быть незафиксированной и откатиться
+    return not transaction.get_connection().in_atomic_block
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend, который берёт пользователя сессии из кеша: без него
+    AuthenticationMiddleware на каждом запросе читает строку core.User.
+    Смена пароля или is_active проходит через save() и сбрасывает кеш,
+    поэтому проверка хеша сессии и user_can_authenticate остаются в силе.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        user = super().authenticate(request, username=username, password=password, **kwargs)
+        if user is None and password is not None:
+            # следующий в AUTHENTICATION_BACKENDS ModelBackend (он там ради
+            # сессий, выданных до кеша) проверил бы ту же таблицу и посчитал
+            # хеш пароля второй раз; PermissionDenied останавливает перебор
+            raise PermissionDenied
+        return user
+
+    def get_user(self, user_id):
+        key = _key(user_id)
+        user = _cache().get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            if _cacheable():
+                _cache().set(key, user, USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        key = _key(user_id)
+        user = await _cache().aget(key)
+        if user is None:
+            user = await super().aget_user(user_id)
+            if user is None:
+                return None
+            if _cacheable():
+                await _cache().aset(key, user, USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,198 @@
+import bisect
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+from .models import Category, Skill
+
+AUTOCOMPLETE_CACHE_ALIAS = getattr(settings, 'AUTOCOMPLETE_CACHE_ALIAS', 'default')
+VERSION_KEY = 'skill-autocomplete-version'
+MAX_LIMIT = 20
+# сколько ключей просматривается на запрос: короткий префикс вроде «п»
+# покрывает десятки тысяч навыков, а показать нужно первые десять
+MAX_SCAN = 2000
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def normalize(text):
+    return text.lower().replace('ё', 'е')
+
+
+def tokens(name):
+    return sorted(set(_WORD_RE.findall(normalize(name))))
+
+
+class SkillTrie:
+    """
+    Префиксный индекс названий навыков в памяти процесса. Ключи (слово,
+    id навыка) лежат в отсортированном массиве — это уплотнённое префиксное
+    дерево: все слова с общим префиксом образуют непрерывный диапазон,
+    который находится двумя bisect за O(log n).
+    """
+
+    def __init__(self):
+        self.keys = []                  # [(слово, skill_id)], отсортирован
+        self.skills = {}                # skill_id -> (name, level, category_id)
+        self.categories = {}            # category_id -> name
+        self.lock = threading.RLock()
+        self.version = None
+
+    @classmethod
+    def build(cls, version=None):
+        trie = cls()
+        trie.version = version
+        trie.categories = dict(Category.objects.values_list('pk', 'name'))
+        keys = []
+        rows = Skill.objects.values_list('pk', 'name', 'level', 'category_id')
+        for pk, name, level, category_id in rows.iterator(chunk_size=10000):
+            trie.skills[pk] = (name, level, category_id)
+            keys.extend((token, pk) for token in tokens(name))
+        keys.sort()
+        trie.keys = keys
+        return trie
+
+    def add(self, pk, name, level, category_id):
+        with self.lock:
+            self.remove(pk)
+            self.skills[pk] = (name, level, category_id)
+            for token in tokens(name):
+                bisect.insort(self.keys, (token, pk))
+
+    def remove(self, pk):
+        with self.lock:
+            skill = self.skills.pop(pk, None)
+            if skill is None:
+                return
+            for token in tokens(skill[0]):
+                index = bisect.bisect_left(self.keys, (token, pk))
+                if index < len(self.keys) and self.keys[index] == (token, pk):
+                    del self.keys[index]
+
+    def set_category(self, pk, name):
+        with self.lock:
+            self.categories[pk] = name
+
+    def _range(self, prefix):
+        start = bisect.bisect_left(self.keys, (prefix,))
+        end = bisect.bisect_left(self.keys, (prefix + '\uffff',), start)
+        return start, end
+
+    def lookup(self, query, limit=10, allowed=None):
+        """
+        Навыки, у которых каждое слово запроса — префикс какого-то слова
+        названия. Просматривается самый узкий из диапазонов слов запроса,
+        а при allowed (навыки пользователя) — сами разрешённые навыки.
+        """
+        words = _WORD_RE.findall(normalize(query))
+        with self.lock:
+            if allowed is not None:
+                candidates = sorted((pk for pk in allowed if pk in self.skills), key=lambda pk: self.skills[pk][0])
+            elif words:
+                start, end = min((self._range(word) for word in words), key=lambda bounds: bounds[1] - bounds[0])
+                candidates = (pk for _, pk in self.keys[start:min(end, start + MAX_SCAN)])
+            else:
+                return []
+            found = []
+            seen = set()
+            for pk in candidates:
+                if pk in seen:
+                    continue
+                seen.add(pk)
+                name, level, category_id = self.skills[pk]
+                name_tokens = tokens(name)
+                if not all(any(token.startswith(word) for token in name_tokens) for word in words):
+                    continue
+                found.append((pk, name, level, self.categories.get(category_id, '')))
+                if len(found) >= limit:
+                    break
+        return found
+
+
+_trie = None
+_trie_lock = threading.Lock()
+_rebuilding = threading.Event()
+
+
+def _cache():
+    return caches[AUTOCOMPLETE_CACHE_ALIAS]
+
+
+def _shared_version():
+    cache = _cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = time.time_ns()
+        cache.add(VERSION_KEY, version, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate():
+    """Все процессы пересоберут индекс при следующем обращении."""
+    _cache().delete(VERSION_KEY)
+
+
+def _rebuild(version):
+    global _trie
+    try:
+        trie = SkillTrie.build(version)
+        with _trie_lock:
+            _trie = trie
+    finally:
+        _rebuilding.clear()
+        connections.close_all()
+
+
+def get_trie():
+    """
+    Индекс текущего процесса. Если навыки менял другой процесс (версия в
+    общем кеше ушла вперёд), индекс пересобирается в фоне, а до конца
+    пересборки отдаётся прежний.
+    """
+    global _trie
+    version = _shared_version()
+    with _trie_lock:
+        if _trie is None:
+            _trie = SkillTrie.build(version)
+            return _trie
+        trie = _trie
+    if trie.version != version and not _rebuilding.is_set():
+        _rebuilding.set()
+        threading.Thread(target=_rebuild, args=(version,), daemon=True).start()
+    return trie
+
+
+def _changed(apply):
+    before = _shared_version()
+    trie = _trie
+    if trie is not None:
+        apply(trie)
+    # версия не должна убывать, даже если часы другого процесса отстают
+    version = max(time.time_ns(), before + 1)
+    _cache().set(VERSION_KEY, version, None)
+    # индекс считается свежим, только если до этого изменения в нём было
+    # всё; иначе он пропустил изменения других процессов и пересоберётся
+    if trie is not None and trie.version == before:
+        trie.version = version
+
+
+def skill_saved(pk, name, level, category_id):
+    _changed(lambda trie: trie.add(pk, name, level, category_id))
+
+
+def skill_deleted(pk):
+    _changed(lambda trie: trie.remove(pk))
+
+
+def category_saved(pk, name):
+    _changed(lambda trie: trie.set_category(pk, name))
+
+
+def lookup(query, limit=10, allowed=None):
+    limit = max(1, min(limit, MAX_LIMIT))
+    return get_trie().lookup(query, limit, allowed)
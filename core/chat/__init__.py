@@ -0,0 +1,4 @@
+"""
+Чат обменов поверх ASGI: WebSocket на /ws/exchanges/<id>/, рассылка через
+брокер (core.chat.broker) и пакетная запись сообщений (core.chat.writer).
+"""
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import re
+from http.cookies import SimpleCookie
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import HASH_SESSION_KEY, SESSION_KEY
+from django.db import close_old_connections
+from django.utils.crypto import constant_time_compare
+from django.utils.module_loading import import_string
+
+from core import history, unread
+from core.models import Exchange, Message, User
+
+from .broker import SubscriberOverflow, get_broker
+from .writer import get_writer
+
+PATH_RE = re.compile(r'^/ws/exchanges/(?P<exchange_id>\d+)/$')
+MAX_MESSAGE_LENGTH = 4000
+
+# коды закрытия WebSocket
+CLOSE_NOT_FOUND = 4404
+CLOSE_FORBIDDEN = 4403
+CLOSE_TRY_AGAIN = 1013
+
+
+def channel_name(exchange_id):
+    return f'exchange.{exchange_id}'
+
+
+def serialize(message):
+    return {'type': 'message', **history.serialize(message)}
+
+
+def _headers(scope):
+    return {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope.get('headers', [])}
+
+
+def _same_origin(headers):
+    # браузер шлёт Origin при каждом WebSocket-рукопожатии; чужой сайт не
+    # должен открывать чат от имени пользователя с его cookie
+    origin = headers.get('origin')
+    return origin is None or urlsplit(origin).netloc == headers.get('host')
+
+
+def _authenticate(session_key, exchange_id):
+    """(user_id, partner_id) участника обмена или None."""
+    close_old_connections()
+    if not session_key:
+        return None
+    session = import_string(f'{settings.SESSION_ENGINE}.SessionStore')(session_key)
+    user_id = session.get(SESSION_KEY)
+    if user_id is None:
+        return None
+    user = User.objects.filter(pk=user_id, is_active=True).first()
+    if user is None or not constant_time_compare(session.get(HASH_SESSION_KEY, ''), user.get_session_auth_hash()):
+        return None
+    participants = Exchange.objects.filter(pk=exchange_id).values_list('user1_id', 'user2_id').first()
+    if participants is None or user.pk not in participants:
+        return None
+    user1_id, user2_id = participants
+    return user.pk, user2_id if user.pk == user1_id else user1_id
+
+
+async def _send_json(send, payload):
+    await send({'type': 'websocket.send', 'text': json.dumps(payload, ensure_ascii=False)})
+
+
+async def _forward(subscription, send):
+    while True:
+        await _send_json(send, await subscription.get())
+
+
+async def chat_application(scope, receive, send):
+    """ASGI-приложение чата: одно WebSocket-соединение на вкладку обмена."""
+    event = await receive()
+    if event['type'] != 'websocket.connect':
+        return
+
+    match = PATH_RE.match(scope['path'])
+    if match is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_NOT_FOUND})
+        return
+    headers = _headers(scope)
+    if not _same_origin(headers):
+        await send({'type': 'websocket.close', 'code': CLOSE_FORBIDDEN})
+        return
+
+    exchange_id = int(match['exchange_id'])
+    cookie = SimpleCookie(headers.get('cookie', ''))
+    session = cookie.get(settings.SESSION_COOKIE_NAME)
+    participants = await sync_to_async(_authenticate)(session.value if session else None, exchange_id)
+    if participants is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_FORBIDDEN})
+        return
+    user_id, partner_id = participants
+
+    await send({'type': 'websocket.accept'})
+    broker = get_broker()
+    writer = get_writer()
+    channel = channel_name(exchange_id)
+    subscription = await broker.subscribe(channel)
+    forwarder = asyncio.create_task(_forward(subscription, send))
+    try:
+        while True:
+            receiving = asyncio.ensure_future(receive())
+            done, _ = await asyncio.wait({receiving, forwarder}, return_when=asyncio.FIRST_COMPLETED)
+            if forwarder in done:
+                receiving.cancel()
+                # клиент не успевает читать рассылку
+                if isinstance(forwarder.exception(), SubscriberOverflow):
+                    await send({'type': 'websocket.close', 'code': CLOSE_TRY_AGAIN})
+                return
+            event = receiving.result()
+            if event['type'] == 'websocket.disconnect':
+                return
+            if event['type'] != 'websocket.receive':
+                continue
+
+            try:
+                data = json.loads(event.get('text') or '')
+                if data.get('type') == 'read':
+                    # клиент показал входящие из открытой вкладки
+                    await sync_to_async(unread.mark_exchange_read)(user_id, exchange_id)
+                    continue
+                text = str(data['text']).strip()
+            except (ValueError, KeyError, TypeError, AttributeError):
+                await _send_json(send, {'type': 'error', 'error': 'Некорректное сообщение'})
+                continue
+            if not text or len(text) > MAX_MESSAGE_LENGTH:
+                await _send_json(send, {'type': 'error', 'error': f'Сообщение должно быть от 1 до {MAX_MESSAGE_LENGTH} символов'})
+                continue
+
+            message = await writer.write(Message(
+                exchange_id=exchange_id, sender_id=user_id, receiver_id=partner_id, text=text,
+            ))
+            await broker.publish(channel, serialize(message))
+    finally:
+        forwarder.cancel()
+        await subscription.close()
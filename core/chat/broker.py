@@ -0,0 +1,94 @@
+import asyncio
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+CHAT_BROKER = getattr(settings, 'CHAT_BROKER', 'core.chat.broker.InProcessBroker')
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+class SubscriberOverflow(Exception):
+    """Подписчик не успевает читать — соединение нужно закрыть."""
+
+
+class Subscription:
+    def __init__(self, broker, channel, maxsize=SUBSCRIBER_QUEUE_SIZE):
+        self.broker = broker
+        self.channel = channel
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def deliver(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # не копим бесконечный хвост ради одного медленного клиента:
+            # очередь полна, значит get() не ждёт и сразу увидит флаг
+            self.overflowed = True
+
+    async def get(self):
+        if self.overflowed:
+            raise SubscriberOverflow(self.channel)
+        return await self.queue.get()
+
+    async def close(self):
+        await self.broker.unsubscribe(self)
+
+
+class Broker:
+    """
+    Интерфейс pub/sub для чата. Реализация должна доставлять каждое
+    опубликованное в канал сообщение всем текущим подписчикам этого канала
+    (в пределах процесса — через Subscription.deliver). Межпроцессный брокер
+    (Redis и т.п.) публикует наружу и в своём фоновом цикле раздаёт входящие
+    сообщения локальным подпискам.
+    """
+
+    async def subscribe(self, channel):
+        raise NotImplementedError
+
+    async def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+    async def publish(self, channel, message):
+        raise NotImplementedError
+
+
+class InProcessBroker(Broker):
+    """Брокер внутри одного процесса: словарь канал -> подписки."""
+
+    def __init__(self):
+        self.channels = defaultdict(set)
+
+    async def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        self.channels[channel].add(subscription)
+        return subscription
+
+    async def unsubscribe(self, subscription):
+        subscribers = self.channels.get(subscription.channel)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self.channels[subscription.channel]
+
+    async def publish(self, channel, message):
+        for subscription in list(self.channels.get(channel, ())):
+            subscription.deliver(message)
+
+    def stats(self):
+        return {
+            'channels': len(self.channels),
+            'subscribers': sum(len(subscribers) for subscribers in self.channels.values()),
+        }
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(CHAT_BROKER)()
+    return _broker
@@ -0,0 +1,94 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+
+from core import unread
+from core.models import Message
+
+CHAT_BATCH_SIZE = getattr(settings, 'CHAT_BATCH_SIZE', 200)
+CHAT_FLUSH_INTERVAL = getattr(settings, 'CHAT_FLUSH_INTERVAL', 0.05)
+
+
+def _insert(messages):
+    # bulk_create не шлёт post_save, счётчики непрочитанных сдвигаем сами
+    with transaction.atomic():
+        saved = Message.objects.bulk_create(messages)
+        unread.messages_created(saved)
+    return saved
+
+
+class MessageWriter:
+    """
+    Копит сообщения и вставляет их одним bulk_create раз в CHAT_FLUSH_INTERVAL
+    секунд или по набору CHAT_BATCH_SIZE штук. write() возвращается, когда
+    сообщение уже в БД (с id и sent_at), поэтому рассылка идёт после записи.
+    """
+
+    def __init__(self, batch_size=CHAT_BATCH_SIZE, interval=CHAT_FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.pending = []
+        self.full = asyncio.Event()
+        self.task = None
+        self.batches = 0
+        self.written = 0
+
+    async def write(self, message):
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((message, future))
+        if len(self.pending) >= self.batch_size:
+            self.full.set()
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+        return await future
+
+    async def _run(self):
+        while self.pending:
+            try:
+                await asyncio.wait_for(self.full.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self.full.clear()
+            await self.flush()
+
+    async def flush(self):
+        batch, self.pending = self.pending[:self.batch_size], self.pending[self.batch_size:]
+        if not batch:
+            return
+        if len(self.pending) >= self.batch_size:
+            self.full.set()
+        try:
+            saved = await sync_to_async(_insert)([message for message, _ in batch])
+        except Exception as error:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        self.batches += 1
+        self.written += len(saved)
+        for (_, future), message in zip(batch, saved):
+            if not future.done():
+                future.set_result(message)
+
+    async def close(self):
+        while self.pending:
+            await self.flush()
+        if self.task is not None:
+            self.task.cancel()
+
+
+_writers = {}
+
+
+def get_writer():
+    """Писатель текущего event loop (у каждого loop свои Future)."""
+    loop = asyncio.get_running_loop()
+    writer = _writers.get(loop)
+    if writer is None:
+        # закрытые loop (asyncio.run в тестах и бенчмарках) не держим
+        for old in [old for old in _writers if old.is_closed()]:
+            del _writers[old]
+        writer = _writers[loop] = MessageWriter()
+    return writer
@@ -0,0 +1,8 @@
+from django.utils.functional import SimpleLazyObject
+
+from . import unread
+
+
+def unread_messages(request):
+    """Счётчик для значка в шапке; кеш читается, только если шаблон его выводит."""
+    return {'unread_messages_count': SimpleLazyObject(lambda: unread.unread_count(request.user))}
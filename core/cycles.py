@@ -0,0 +1,173 @@
+import time
+from collections import defaultdict
+
+from django.db import models, transaction
+from django.utils import timezone
+
+from .models import CycleSearchRun, Exchange, ExchangeCycle, Proposal, UserSkill
+
+# Предложение занято, если по нему уже идёт или завершён обмен.
+BUSY_STATUSES = ('активен', 'завершён')
+
+# Сколько вершин можно раскрыть при поиске от одного предложения:
+# популярные навыки дают огромное ветвление, и без лимита одна вершина
+# может съесть весь бюджет запуска и навсегда застопорить отметку.
+MAX_EXPANSIONS = 20000
+
+
+class ProposalGraph:
+    """
+    Граф обменов в памяти. Вершины — открытые предложения, ребро P -> Q
+    означает, что автор Q умеет то, что хочет автор P (навык из его
+    предложений или из UserSkill). Цикл P1 -> P2 -> ... -> P1 с разными
+    авторами — это обмен по кругу.
+    """
+
+    def __init__(self):
+        self.proposals = {}                      # id -> (user_id, wanted_skill_id)
+        self.by_user = defaultdict(list)         # user_id -> [proposal ids]
+        self.teachers = defaultdict(set)         # skill_id -> {user_id}
+        self.skills_of = defaultdict(set)        # user_id -> {skill_id}
+
+    @classmethod
+    def load(cls):
+        graph = cls()
+        busy = Exchange.objects.filter(proposal=models.OuterRef('pk'), status__in=BUSY_STATUSES)
+        rows = Proposal.objects.filter(~models.Exists(busy)).values_list(
+            'id', 'user_id', 'skill_offered_id', 'skill_wanted_id'
+        )
+        for pk, user_id, offered, wanted in rows.iterator(chunk_size=5000):
+            graph.add_proposal(pk, user_id, wanted)
+            graph.add_skill(user_id, offered)
+        for user_id, skill_id in UserSkill.objects.values_list('user_id', 'skill_id').iterator(chunk_size=5000):
+            graph.add_skill(user_id, skill_id)
+        return graph
+
+    def add_proposal(self, pk, user_id, wanted):
+        self.proposals[pk] = (user_id, wanted)
+        self.by_user[user_id].append(pk)
+
+    def add_skill(self, user_id, skill_id):
+        self.teachers[skill_id].add(user_id)
+        self.skills_of[user_id].add(skill_id)
+
+    def remove(self, proposal_ids):
+        for pk in proposal_ids:
+            user_id, _ = self.proposals.pop(pk)
+            self.by_user[user_id].remove(pk)
+
+    def find_cycle(self, start, min_length, max_length, deadline, max_expansions=MAX_EXPANSIONS):
+        """Кратчайший цикл через start длиной от min_length до max_length."""
+        if start not in self.proposals:
+            return None
+        owner, _ = self.proposals[start]
+        owner_skills = self.skills_of[owner]
+        self._expansions_left = max_expansions
+        for length in range(min_length, max_length + 1):
+            cycle = self._extend([start], {owner}, owner_skills, length, deadline)
+            if cycle:
+                return cycle
+        return None
+
+    def _extend(self, path, users, owner_skills, length, deadline):
+        self._expansions_left -= 1
+        if self._expansions_left < 0 or time.monotonic() > deadline:
+            return None
+        _, wanted = self.proposals[path[-1]]
+        last_step = len(path) == length - 1
+        for teacher in self.teachers.get(wanted, ()):
+            if teacher in users:
+                continue
+            for pk in self.by_user.get(teacher, ()):
+                _, next_wanted = self.proposals[pk]
+                if last_step:
+                    # цикл замыкается, если автор start умеет то, что хочет teacher
+                    if next_wanted in owner_skills:
+                        return path + [pk]
+                    continue
+                users.add(teacher)
+                cycle = self._extend(path + [pk], users, owner_skills, length, deadline)
+                users.discard(teacher)
+                if cycle:
+                    return cycle
+        return None
+
+
+def create_cycle_exchanges(proposal_ids):
+    """
+    Атомарно создаёт обмены по найденному циклу: автор i-го предложения
+    учится у автора следующего. Возвращает ExchangeCycle или None, если
+    кто-то из участников уже занят.
+    """
+    with transaction.atomic():
+        proposals = Proposal.objects.select_for_update().in_bulk(proposal_ids)
+        if len(proposals) != len(proposal_ids):
+            return None
+        if Exchange.objects.filter(proposal_id__in=proposal_ids, status__in=BUSY_STATUSES).exists():
+            return None
+
+        cycle = ExchangeCycle.objects.create(length=len(proposal_ids))
+        ordered = [proposals[pk] for pk in proposal_ids]
+        Exchange.objects.bulk_create(
+            Exchange(
+                user1_id=proposal.user_id,
+                user2_id=ordered[(i + 1) % len(ordered)].user_id,
+                proposal=proposal,
+                cycle=cycle,
+                status='активен',
+                format=proposal.format,
+            )
+            for i, proposal in enumerate(ordered)
+        )
+    return cycle
+
+
+def find_cycles(min_length=3, max_length=4, time_budget=60.0, full=False, dry_run=False, stdout=None):
+    """
+    Инкрементальный поиск цепочек обмена. Исследуются только предложения,
+    изменённые после водяной отметки прошлого запуска (или все при full).
+    Если бюджет времени исчерпан, отметка сдвигается лишь до последнего
+    полностью обработанного предложения — остаток достанется следующему запуску.
+    """
+    deadline = time.monotonic() + time_budget
+    run = CycleSearchRun()
+    last = CycleSearchRun.objects.exclude(watermark_at=None).order_by('-started_at').first()
+    if last and not full:
+        run.watermark_at, run.watermark_id = last.watermark_at, last.watermark_id
+    if not dry_run:
+        run.save()
+
+    graph = ProposalGraph.load()
+    dirty = Proposal.objects.all()
+    if run.watermark_at is not None:
+        dirty = dirty.filter(
+            models.Q(updated_at__gt=run.watermark_at) |
+            models.Q(updated_at=run.watermark_at, id__gt=run.watermark_id)
+        )
+    dirty = dirty.order_by('updated_at', 'id').values_list('id', 'updated_at')
+
+    run.complete = True
+    for pk, updated_at in dirty.iterator(chunk_size=5000):
+        if time.monotonic() > deadline:
+            run.complete = False
+            break
+        cycle = graph.find_cycle(pk, min_length, max_length, deadline)
+        if time.monotonic() > deadline:
+            # поиск от pk мог оборваться на полпути — не считаем его пройденным
+            run.complete = False
+            break
+        run.explored += 1
+        run.watermark_at, run.watermark_id = updated_at, pk
+        if cycle is None:
+            continue
+        if not dry_run and create_cycle_exchanges(cycle) is None:
+            continue
+        graph.remove(cycle)
+        run.cycles_found += 1
+        if stdout:
+            stdout.write(f'Цепочка: {" → ".join(map(str, cycle))}')
+
+    run.finished_at = timezone.now()
+    if not dry_run:
+        run.save()
+    return run
@@ -0,0 +1,175 @@
+import calendar
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core import signing
+from django.db import models, transaction
+from django.utils import timezone
+
+from .models import Event, EventDayCount, EventParticipation, User
+
+FEED_SALT = 'core.event_calendar.feed'
+FEED_STATUSES = ('подтверждён', 'ожидание')
+EVENT_DURATION = timedelta(hours=1)
+FEED_CHUNK_SIZE = 500
+
+
+# Дневные счётчики. Ключ — (день, id категории или None).
+
+def _rows(key):
+    day, category_id = key
+    return EventDayCount.objects.filter(day=day, category_id=category_id)
+
+
+def apply_deltas(deltas):
+    """Сдвигает счётчики {(день, категория): delta} атомарными UPDATE через F()."""
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    with transaction.atomic():
+        EventDayCount.objects.bulk_create(
+            [EventDayCount(day=day, category_id=category_id) for day, category_id in deltas],
+            ignore_conflicts=True,
+        )
+        for key, delta in sorted(deltas.items(), key=lambda item: (item[0][0], item[0][1] or 0)):
+            _rows(key).update(count=models.F('count') + delta)
+
+
+def event_saved(event, created, previous=None):
+    deltas = Counter()
+    if not created and previous is not None:
+        deltas[previous] -= 1
+    deltas[(event.event_date, event.category_id)] += 1
+    apply_deltas(deltas)
+
+
+def event_deleted(event):
+    apply_deltas({(event.event_date, event.category_id): -1})
+
+
+def category_deleted(category_id):
+    """Мероприятия удаляемой категории остаются без категории — переносим их счётчики."""
+    moved = Counter()
+    for day, count in EventDayCount.objects.filter(category_id=category_id).values_list('day', 'count'):
+        moved[(day, None)] += count
+    apply_deltas(moved)
+
+
+def rebuild_day_counts(chunk_size=2000):
+    """Пересчитывает все дневные счётчики по мероприятиям."""
+    totals = (
+        Event.objects.values('event_date', 'category_id')
+        .annotate(count=models.Count('pk'))
+        .order_by()
+    )
+    with transaction.atomic():
+        EventDayCount.objects.all().delete()
+        batch = []
+        for row in totals.iterator(chunk_size=chunk_size):
+            batch.append(EventDayCount(day=row['event_date'], category_id=row['category_id'], count=row['count']))
+            if len(batch) >= chunk_size:
+                EventDayCount.objects.bulk_create(batch)
+                batch = []
+        EventDayCount.objects.bulk_create(batch)
+    return EventDayCount.objects.count()
+
+
+def month_grid(year, month, category=None):
+    """
+    Недели месяца для календаря: списки (день, число мероприятий).
+    Читает не больше строк счётчиков, чем дней в сетке на категорию.
+    """
+    weeks = calendar.Calendar().monthdatescalendar(year, month)
+    counts = EventDayCount.objects.filter(day__range=(weeks[0][0], weeks[-1][-1]), count__gt=0)
+    if category is not None:
+        counts = counts.filter(category=category)
+    by_day = dict(counts.values('day').annotate(total=models.Sum('count')).values_list('day', 'total').order_by())
+    return [[(day, by_day.get(day, 0)) for day in week] for week in weeks]
+
+
+# Лента iCalendar (RFC 5545) с мероприятиями пользователя.
+
+def feed_token(user):
+    return signing.dumps(user.pk, salt=FEED_SALT)
+
+
+def user_from_token(token):
+    try:
+        user_id = signing.loads(token, salt=FEED_SALT)
+    except signing.BadSignature:
+        return None
+    return User.objects.filter(pk=user_id, is_active=True).first()
+
+
+def _escape(text):
+    return (
+        (text or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def _fold(line):
+    # строки длиннее 75 октетов переносятся, продолжение начинается с пробела
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        # не режем многобайтовый символ UTF-8 пополам
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode())
+        encoded = encoded[cut:]
+        limit = 74
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _utc(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _vevent(participation, host, stamp):
+    event = participation.event
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:event-{event.pk}@{host}',
+        f'DTSTAMP:{stamp}',
+    ]
+    if event.event_time is None:
+        lines.append(f'DTSTART;VALUE=DATE:{event.event_date:%Y%m%d}')
+        lines.append(f'DTEND;VALUE=DATE:{event.event_date + timedelta(days=1):%Y%m%d}')
+    else:
+        start = timezone.make_aware(datetime.combine(event.event_date, event.event_time))
+        lines.append(f'DTSTART:{_utc(start)}')
+        lines.append(f'DTEND:{_utc(start + EVENT_DURATION)}')
+    lines.append(f'SUMMARY:{_escape(event.title)}')
+    if event.description:
+        lines.append(f'DESCRIPTION:{_escape(event.description)}')
+    if event.location:
+        lines.append(f'LOCATION:{_escape(event.location)}')
+    lines.append('STATUS:' + ('CONFIRMED' if participation.status == 'подтверждён' else 'TENTATIVE'))
+    lines.append('END:VEVENT')
+    return ''.join(_fold(line) for line in lines)
+
+
+def ics_lines(user, host):
+    """
+    Лента мероприятий пользователя по кускам: заголовок, затем по VEVENT на
+    участие, читая участия потоково. Документ целиком в памяти не собирается.
+    """
+    yield _fold('BEGIN:VCALENDAR')
+    yield _fold('VERSION:2.0')
+    yield _fold('PRODID:-//SkillSwap//Events//RU')
+    yield _fold('CALSCALE:GREGORIAN')
+    yield _fold(f'X-WR-CALNAME:{_escape("SkillSwap — мои мероприятия")}')
+    stamp = _utc(timezone.now())
+    participations = (
+        EventParticipation.objects.filter(user=user, status__in=FEED_STATUSES)
+        .select_related('event')
+        .order_by('event__event_date', 'event_id')
+    )
+    for participation in participations.iterator(chunk_size=FEED_CHUNK_SIZE):
+        yield _vevent(participation, host, stamp)
+    yield _fold('END:VCALENDAR')
@@ -0,0 +1,126 @@
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Event, EventParticipation
+
+CONFIRMED = 'подтверждён'
+WAITING = 'ожидание'
+DECLINED = 'отказ'
+
+
+def _take_seat(event_id):
+    """
+    Занимает место одним условным UPDATE: счётчик растёт, только пока он
+    меньше max_participants, поэтому параллельные регистрации не выходят
+    за лимит без чтения строки. Строку мероприятия он блокирует, только
+    если место нашлось: UPDATE без подходящих строк в PostgreSQL ничего не
+    блокирует, так что вызывающий сначала берёт _lock_event().
+    """
+    return Event.objects.filter(
+        pk=event_id, confirmed_count__lt=models.F('max_participants')
+    ).update(confirmed_count=models.F('confirmed_count') + 1) == 1
+
+
+def _release_seat(event_id):
+    Event.objects.filter(pk=event_id, confirmed_count__gt=0).update(confirmed_count=models.F('confirmed_count') - 1)
+
+
+def _lock_event(event_id):
+    # пустой UPDATE вместо select_for_update: в SQLite его нет, а начатая
+    # с чтения транзакция может получить «database is locked» при первой записи
+    Event.objects.filter(pk=event_id).update(confirmed_count=models.F('confirmed_count'))
+
+
+def _promote(event_id):
+    """
+    Отдаёт освободившееся место первому из листа ожидания, а если ждущих
+    нет — возвращает место в счётчик. Вызывается под блокировкой строки
+    мероприятия. Возвращает id подтверждённого участия или None.
+    """
+    queue = EventParticipation.objects.filter(event_id=event_id, status=WAITING).order_by('registered_at', 'id')
+    while True:
+        pk = queue.values_list('pk', flat=True).first()
+        if pk is None:
+            _release_seat(event_id)
+            return None
+        # условие на статус: ту же запись мог забрать параллельный вызов
+        if EventParticipation.objects.filter(pk=pk, status=WAITING).update(status=CONFIRMED):
+            return pk
+
+
+def register(user, event):
+    """
+    Записывает пользователя на мероприятие: подтверждает, если есть место,
+    иначе ставит в лист ожидания. Повторная запись возвращает текущее
+    участие; после отказа пользователь встаёт в конец очереди.
+    """
+    user_id = getattr(user, 'pk', user)
+    event_id = getattr(event, 'pk', event)
+    with transaction.atomic():
+        # блокировка нужна и без свободного места: иначе параллельная отмена
+        # не увидит нашу ещё не зафиксированную запись в листе ожидания и
+        # вернёт место в счётчик, а мы останемся ждать при свободном месте
+        _lock_event(event_id)
+        seated = _take_seat(event_id)
+        status = CONFIRMED if seated else WAITING
+        try:
+            with transaction.atomic():
+                return EventParticipation.objects.create(user_id=user_id, event_id=event_id, status=status)
+        except IntegrityError:
+            pass
+
+        participation = EventParticipation.objects.get(user_id=user_id, event_id=event_id)
+        if participation.status == DECLINED:
+            participation.status = status
+            participation.registered_at = timezone.now()
+            EventParticipation.objects.filter(pk=participation.pk).update(
+                status=status, registered_at=participation.registered_at
+            )
+        elif seated:
+            # уже записан — место не понадобилось
+            _release_seat(event_id)
+        return participation
+
+
+def cancel(user, event):
+    """Отменяет участие. Место подтверждённого переходит первому ожидающему."""
+    user_id = getattr(user, 'pk', user)
+    event_id = getattr(event, 'pk', event)
+    with transaction.atomic():
+        _lock_event(event_id)
+        participations = EventParticipation.objects.filter(user_id=user_id, event_id=event_id)
+        if participations.filter(status=CONFIRMED).update(status=DECLINED):
+            _promote(event_id)
+            return True
+        return bool(participations.filter(status=WAITING).update(status=DECLINED))
+
+
+def participation_deleted(participation):
+    if participation.status == CONFIRMED:
+        with transaction.atomic():
+            _lock_event(participation.event_id)
+            _promote(participation.event_id)
+
+
+def fill_from_waitlist(event):
+    """Подтверждает ожидающих, пока есть места (например, после увеличения лимита)."""
+    event_id = getattr(event, 'pk', event)
+    promoted = 0
+    with transaction.atomic():
+        _lock_event(event_id)
+        while _take_seat(event_id):
+            if _promote(event_id) is None:
+                # _promote вернул взятое место
+                break
+            promoted += 1
+    return promoted
+
+
+def recompute_confirmed_counts():
+    """Пересчитывает confirmed_count всех мероприятий по участиям."""
+    confirmed = (
+        EventParticipation.objects.filter(event=models.OuterRef('pk'), status=CONFIRMED)
+        .order_by().values('event').annotate(count=models.Count('pk')).values('count')
+    )
+    return Event.objects.update(confirmed_count=Coalesce(models.Subquery(confirmed), 0))
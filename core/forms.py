@@ -1,13 +1,49 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth import authenticate
+from django.urls import reverse_lazy
+from . import login_throttle
 from .models import *
 
+class SkillAutocompleteWidget(forms.Widget):
+    """
+    Поле выбора навыка через /skills/autocomplete/ вместо <select> со всеми
+    навыками: в разметку попадает только выбранный навык.
+    """
+    template_name = 'components/widgets/skill_autocomplete.html'
+
+    def __init__(self, scope='all', placeholder='Начните вводить название навыка', attrs=None):
+        super().__init__(attrs)
+        self.scope = scope
+        self.placeholder = placeholder
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        label = ''
+        if value not in (None, ''):
+            skill = Skill.objects.filter(pk=value).first() if str(value).isdigit() else None
+            if skill:
+                label = f'{skill.name} ({skill.get_level_display()})'
+        context['widget'].update({
+            'url': reverse_lazy('skill_autocomplete'),
+            'scope': self.scope,
+            'placeholder': self.placeholder,
+            'label': label,
+        })
+        return context
+
+
 class ProposalForm(forms.ModelForm):
     class Meta:
         model = Proposal
         fields = ['skill_offered', 'skill_wanted', 'description', 'format', 'deadlines']
         widgets = {
+            'skill_offered': SkillAutocompleteWidget(
+                scope='mine', placeholder='Навык, который вы предлагаете', attrs={'id': 'skill_offered'}
+            ),
+            'skill_wanted': SkillAutocompleteWidget(
+                placeholder='Навык, который хотите получить', attrs={'id': 'skill_wanted'}
+            ),
             'description': forms.Textarea(attrs={'rows': 4, 'placeholder': 'Опишите детали обмена...'}),
             'deadlines': forms.TextInput(attrs={'placeholder': 'Например: до 10 июня'}),
         }
@@ -28,6 +64,71 @@ class ProposalForm(forms.ModelForm):
             )
             self.fields['skill_wanted'].queryset = Skill.objects.all()
 
+class ProposalFilterForm(forms.Form):
+    format = forms.ChoiceField(
+        choices=[('', 'Любой формат')] + Proposal.FORMAT_CHOICES,
+        required=False,
+        label='Формат',
+    )
+    offered_category = forms.ModelChoiceField(
+        queryset=Category.objects.order_by('name'),
+        required=False,
+        empty_label='Любая категория',
+        label='Предлагают',
+    )
+    wanted_category = forms.ModelChoiceField(
+        queryset=Category.objects.order_by('name'),
+        required=False,
+        empty_label='Любая категория',
+        label='Хотят получить',
+    )
+    city = forms.CharField(
+        max_length=100,
+        required=False,
+        label='Город',
+        widget=forms.TextInput(attrs={'placeholder': 'Например: Москва'}),
+    )
+
+    def filter(self, queryset):
+        data = self.cleaned_data
+        if data.get('format'):
+            queryset = queryset.filter(format=data['format'])
+        if data.get('offered_category'):
+            queryset = queryset.filter(skill_offered__category=data['offered_category'])
+        if data.get('wanted_category'):
+            queryset = queryset.filter(skill_wanted__category=data['wanted_category'])
+        if data.get('city'):
+            queryset = queryset.filter(user__city__iexact=data['city'].strip())
+        return queryset
+
+class EventFilterForm(forms.Form):
+    category = forms.ModelChoiceField(
+        queryset=Category.objects.order_by('name'),
+        required=False,
+        empty_label='Любая категория',
+        label='Категория',
+    )
+    city = forms.CharField(
+        max_length=100,
+        required=False,
+        label='Город',
+        widget=forms.TextInput(attrs={'placeholder': 'Например: Москва'}),
+    )
+    date_from = forms.DateField(required=False, label='С', widget=forms.DateInput(attrs={'type': 'date'}))
+    date_to = forms.DateField(required=False, label='По', widget=forms.DateInput(attrs={'type': 'date'}))
+
+    def filter(self, queryset, today):
+        data = self.cleaned_data
+        # по умолчанию только предстоящие: диапазон по индексу с event_date
+        queryset = queryset.filter(event_date__gte=data.get('date_from') or today)
+        if data.get('date_to'):
+            queryset = queryset.filter(event_date__lte=data['date_to'])
+        if data.get('category'):
+            queryset = queryset.filter(category=data['category'])
+        if data.get('city'):
+            queryset = queryset.filter(organizer__city__iexact=data['city'].strip())
+        return queryset
+
 class SkillForm(forms.ModelForm):
     class Meta:
         model = Skill
@@ -53,16 +154,32 @@ class RegisterForm(UserCreationForm):
 class LoginForm(AuthenticationForm):
     username = forms.EmailField(widget=forms.EmailInput(attrs={'placeholder': 'your@example.com'}), label="Email")
 
+    error_messages = {
+        **AuthenticationForm.error_messages,
+        'invalid_login': "Неверный email или пароль.",
+        'inactive': "Аккаунт неактивен.",
+        'throttled': "Слишком много попыток входа. Попробуйте через %(minutes)s мин.",
+    }
+
+    throttled = False
+
     def clean(self):
         username = self.cleaned_data.get('username')
         password = self.cleaned_data.get('password')
 
         if username and password:
+            ip = login_throttle.client_ip(self.request)
+            if login_throttle.blocked(ip, username):
+                self.throttled = True
+                raise forms.ValidationError(
+                    self.error_messages['throttled'], code='throttled',
+                    params={'minutes': login_throttle.retry_minutes()},
+                )
+            login_throttle.attempt(ip)
             # Используем email как username для аутентификации
-            user = authenticate(self.request, username=username, password=password)
-            if user is None:
-                raise forms.ValidationError("Неверный email или пароль.")
-            elif not user.is_active:
-                raise forms.ValidationError("Аккаунт неактивен.")
-            return self.cleaned_data
-        return super().clean()
\ No newline at end of file
+            self.user_cache = authenticate(self.request, username=username, password=password)
+            if self.user_cache is None:
+                login_throttle.failed(username)
+                raise self.get_invalid_login_error()
+            self.confirm_login_allowed(self.user_cache)
+        return self.cleaned_data
\ No newline at end of file
@@ -0,0 +1,105 @@
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import models
+
+FRAGMENT_CACHE_ALIAS = getattr(settings, 'FRAGMENT_CACHE_ALIAS', 'fragments')
+FRAGMENT_CACHE_TIMEOUT = getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 3600)
+
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def _cache():
+    return caches[FRAGMENT_CACHE_ALIAS]
+
+
+def _count(key):
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def stats():
+    """Счётчики попаданий/промахов текущего процесса."""
+    with _stats_lock:
+        hits, misses = _stats['hits'], _stats['misses']
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_ratio': round(hits / total, 3) if total else None}
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.update(hits=0, misses=0)
+
+
+def fragment_key(name, key_id):
+    return f'card:{name}:{key_id}'
+
+
+def _version_part(value):
+    if isinstance(value, models.Model):
+        updated_at = getattr(value, 'updated_at', None)
+        stamp = updated_at.timestamp() if updated_at else ''
+        return f'{value._meta.label_lower}:{value.pk}:{stamp}'
+    return str(value)
+
+
+def identify(values):
+    """
+    (ключ, версия) фрагмента. Ключ — id первого объекта, версия — updated_at
+    всех объектов, от которых зависит фрагмент: смена автора или навыка
+    инвалидирует карточку предложения без перебора ключей.
+    Для фрагментов без моделей ключом служит хеш самих значений.
+    """
+    version = '|'.join(_version_part(value) for value in values)
+    if values and isinstance(values[0], models.Model):
+        return values[0].pk, version
+    return hashlib.md5(version.encode()).hexdigest(), ''
+
+
+def get(name, key_id, version):
+    cached = _cache().get(fragment_key(name, key_id))
+    if cached is not None and cached[0] == version:
+        _count('hits')
+        return cached[1]
+    _count('misses')
+    return None
+
+
+class Prefetched:
+    """
+    Фрагменты одной страницы, прочитанные одним get_many вместо запроса к
+    кешу на каждую карточку (с кешем в БД это запрос на карточку). Вьюха
+    кладёт его в контекст как card_cache, {% cardcache %} читает отсюда.
+    """
+
+    def __init__(self, name, key_ids):
+        self.name = name
+        keys = {fragment_key(name, key_id): key_id for key_id in key_ids}
+        found = _cache().get_many(list(keys)) if keys else {}
+        self.cached = {keys[key]: value for key, value in found.items()}
+
+    def get(self, key_id, version):
+        cached = self.cached.get(key_id)
+        if cached is not None and cached[0] == version:
+            _count('hits')
+            return cached[1]
+        _count('misses')
+        return None
+
+
+def prefetch(name, objects):
+    """Prefetched для карточек objects (ключ карточки — pk объекта)."""
+    return Prefetched(name, [obj.pk for obj in objects])
+
+
+def set(name, key_id, version, html):
+    _cache().set(fragment_key(name, key_id), (version, html), FRAGMENT_CACHE_TIMEOUT)
+
+
+def invalidate(name, key_ids):
+    keys = [fragment_key(name, key_id) for key_id in key_ids]
+    for start in range(0, len(keys), 1000):
+        _cache().delete_many(keys[start:start + 1000])
@@ -0,0 +1,49 @@
+import json
+
+from .pagination import KeysetPaginator
+
+HISTORY_PER_PAGE = 50
+HISTORY_MAX_PER_PAGE = 200
+EXPORT_CHUNK_SIZE = 2000
+
+
+def serialize(message):
+    return {
+        'id': message.pk,
+        'sender_id': message.sender_id,
+        'text': message.text,
+        'sent_at': message.sent_at.isoformat(),
+    }
+
+
+def history_page(exchange, cursor=None, per_page=HISTORY_PER_PAGE):
+    """
+    Страница переписки обмена от новых к старым по ключу (sent_at, id):
+    next_cursor ведёт к более ранним сообщениям, prev_cursor — к более
+    поздним. Глубина листания не влияет на цену запроса благодаря индексу
+    messages_exchange_sent_idx. InvalidCursor пробрасывается вызывающему.
+    """
+    paginator = KeysetPaginator(exchange.messages.all(), ordering=('-sent_at', '-id'), per_page=per_page)
+    page = paginator.page(cursor)
+    # для показа нужен хронологический порядок
+    page.object_list.reverse()
+    return page
+
+
+def export_lines(exchange, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Вся переписка обмена строками JSON Lines в хронологическом порядке.
+    Читает пачками по ключу, а не одним курсором на весь экспорт: между
+    пачками соединение не держит чтение открытым, пока медленный клиент
+    забирает ответ, и запись в чат не ждёт конца выгрузки.
+    """
+    paginator = KeysetPaginator(exchange.messages.all(), ordering=('sent_at', 'id'), per_page=chunk_size)
+    cursor = None
+    while True:
+        page = paginator.page(cursor)
+        for message in page.object_list:
+            line = {**serialize(message), 'receiver_id': message.receiver_id, 'is_read': message.is_read}
+            yield json.dumps(line, ensure_ascii=False) + '\n'
+        if not page.has_next:
+            return
+        cursor = page.next_cursor
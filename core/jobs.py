@@ -0,0 +1,154 @@
+import time
+import traceback
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import ledger
+from .models import AdminJob, Exchange, PointTransaction, Proposal
+
+QUEUED = 'в очереди'
+RUNNING = 'выполняется'
+DONE = 'готово'
+FAILED = 'ошибка'
+
+CHUNK_SIZE = 500
+MAX_ATTEMPTS = 3
+# задача, по которой воркер столько не отмечался, считается брошенной
+STALE_AFTER = timedelta(minutes=5)
+
+# в какой статус из каких можно перевести обмен массово
+EXCHANGE_TRANSITIONS = {
+    'завершён': ('активен',),
+    'отклонён': ('активен',),
+}
+
+HANDLERS = {}
+
+
+def handler(kind):
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+# Обработчики получают кусок id и параметры задачи, возвращают число
+# затронутых объектов. Кусок выполняется в одной транзакции с отметкой
+# прогресса, поэтому повтор задачи его не повторит.
+
+@handler('exchange_status')
+def change_exchange_status(ids, params):
+    status = params['status']
+    now = timezone.now()
+    changed = Exchange.objects.filter(pk__in=ids, status__in=EXCHANGE_TRANSITIONS[status]).update(
+        status=status, end_date=Coalesce('end_date', models.Value(now)),
+    )
+    if changed and status == 'отклонён':
+        # то же, что сигнал touch_released_proposal: предложение снова свободно
+        Proposal.objects.filter(exchanges__in=ids, exchanges__status=status).update(updated_at=now)
+    return changed
+
+
+@handler('exchange_reward')
+def reward_exchanges(ids, params):
+    return ledger.reward_completed_exchanges(params['amount'], exchange_ids=ids)
+
+
+@handler('award_points')
+def award_points(ids, params):
+    return len(ledger.post_batch(
+        PointTransaction(user_id=user_id, amount=params['amount'], reason=params.get('reason', 'ручная корректировка'))
+        for user_id in ids
+    ))
+
+
+def enqueue(kind, object_ids, params=None, user=None):
+    if kind not in HANDLERS:
+        raise ValueError(f'Неизвестный вид задачи: {kind}')
+    object_ids = list(object_ids)
+    return AdminJob.objects.create(
+        kind=kind, params=params or {}, object_ids=object_ids, total=len(object_ids),
+        created_by=user if getattr(user, 'is_authenticated', False) else None,
+    )
+
+
+def retry(queryset):
+    """Возвращает упавшие задачи в очередь; продолжат с первого незавершённого куска."""
+    return queryset.filter(status=FAILED).update(status=QUEUED, attempts=0, finished_at=None)
+
+
+def claim():
+    """
+    Берёт самую старую задачу из очереди или брошенную упавшим воркером.
+    Захват — условный UPDATE по прежнему состоянию строки, поэтому из
+    параллельных воркеров задачу получает один.
+    """
+    now = timezone.now()
+    candidates = AdminJob.objects.filter(
+        models.Q(status=QUEUED) | models.Q(status=RUNNING, heartbeat_at__lt=now - STALE_AFTER)
+    ).order_by('created_at', 'id').values_list('pk', 'status', 'heartbeat_at')
+    for pk, status, heartbeat_at in candidates[:10]:
+        claimed = AdminJob.objects.filter(pk=pk, status=status, heartbeat_at=heartbeat_at).update(
+            status=RUNNING, heartbeat_at=now, started_at=Coalesce('started_at', models.Value(now)),
+            attempts=models.F('attempts') + 1,
+        )
+        if claimed:
+            return AdminJob.objects.get(pk=pk)
+    return None
+
+
+def run(job, chunk_size=CHUNK_SIZE):
+    """
+    Выполняет захваченную задачу кусками по chunk_size id. Перед куском
+    прогресс сдвигается условным UPDATE по ожидаемому processed: если
+    задачу тем временем забрал другой воркер, кусок не выполняется.
+    Ошибка откатывает только текущий кусок; задача возвращается в очередь,
+    пока не исчерпаны попытки.
+    """
+    handle = HANDLERS[job.kind]
+    try:
+        while job.processed < job.total:
+            chunk = job.object_ids[job.processed:job.processed + chunk_size]
+            with transaction.atomic():
+                mine = AdminJob.objects.filter(pk=job.pk, status=RUNNING, processed=job.processed).update(
+                    processed=job.processed + len(chunk), heartbeat_at=timezone.now(),
+                )
+                if not mine:
+                    return job
+                affected = handle(chunk, job.params)
+                AdminJob.objects.filter(pk=job.pk).update(affected=models.F('affected') + affected)
+            job.processed += len(chunk)
+            job.affected += affected
+    except Exception:
+        job.error = traceback.format_exc()
+        job.status = QUEUED if job.attempts < MAX_ATTEMPTS else FAILED
+        job.finished_at = timezone.now() if job.status == FAILED else None
+    else:
+        job.error = ''
+        job.status = DONE
+        job.finished_at = timezone.now()
+    AdminJob.objects.filter(pk=job.pk, status=RUNNING, processed=job.processed).update(
+        status=job.status, error=job.error, finished_at=job.finished_at,
+    )
+    return job
+
+
+def work(once=False, idle_sleep=2.0, chunk_size=CHUNK_SIZE, stdout=None):
+    """Цикл воркера: берёт задачи по одной. С once выходит, когда очередь пуста."""
+    while True:
+        job = claim()
+        if job is None:
+            if once:
+                return
+            time.sleep(idle_sleep)
+            continue
+        started = time.perf_counter()
+        run(job, chunk_size)
+        if stdout:
+            stdout.write(
+                f'{job}: {job.get_status_display()}, обработано {job.processed}/{job.total}, '
+                f'затронуто {job.affected} за {time.perf_counter() - started:.1f} с'
+            )
@@ -0,0 +1,102 @@
+from collections import defaultdict
+from itertools import groupby
+
+from django.db import models, transaction
+
+from .models import Exchange, Point, PointTransaction
+
+REWARD_REASON = 'за обучение'
+UPDATE_CHUNK = 500
+
+
+class InsufficientPoints(Exception):
+    def __init__(self, user_ids):
+        self.user_ids = user_ids
+        super().__init__(f'Недостаточно очков для списания (пользователи: {", ".join(map(str, user_ids))})')
+
+
+def _ensure_accounts(user_ids):
+    Point.objects.bulk_create(
+        [Point(user_id=user_id) for user_id in user_ids],
+        ignore_conflicts=True,
+        batch_size=UPDATE_CHUNK,
+    )
+
+
+def _apply(deltas):
+    """
+    Применяет {user_id: delta} атомарными UPDATE balance = balance + delta.
+    Списание проходит только при balance >= -delta, поэтому инвариант
+    balance >= 0 держится без чтения строки и без гонок. Строки
+    обновляются по возрастанию user_id, чтобы параллельные пачки брали
+    блокировки в одном порядке.
+    """
+    for delta, group in groupby(sorted(deltas.items()), key=lambda item: item[1]):
+        if delta == 0:
+            continue
+        user_ids = [user_id for user_id, _ in group]
+        for start in range(0, len(user_ids), UPDATE_CHUNK):
+            chunk = user_ids[start:start + UPDATE_CHUNK]
+            accounts = Point.objects.filter(user_id__in=chunk)
+            if delta < 0:
+                accounts = accounts.filter(balance__gte=-delta)
+            updated = accounts.update(balance=models.F('balance') + delta)
+            if updated != len(chunk):
+                # транзакция откатится целиком, частичные UPDATE не сохранятся
+                raise InsufficientPoints(chunk)
+
+
+def post(user, amount, reason, exchange=None):
+    """Проводит одну транзакцию очков и меняет баланс в одной транзакции БД."""
+    user_id = getattr(user, 'pk', user)
+    with transaction.atomic():
+        _ensure_accounts([user_id])
+        _apply({user_id: amount})
+        return PointTransaction.objects.create(user_id=user_id, amount=amount, reason=reason, exchange=exchange)
+
+
+def post_batch(entries, batch_size=1000):
+    """
+    Проводит пачку несохранённых PointTransaction: балансы сдвигаются
+    суммарной дельтой на пользователя, записи вставляются bulk_create.
+    Либо проходит вся пачка, либо (InsufficientPoints) ничего.
+    """
+    entries = list(entries)
+    if not entries:
+        return []
+    deltas = defaultdict(int)
+    for entry in entries:
+        deltas[entry.user_id] += entry.amount
+    with transaction.atomic():
+        _ensure_accounts(deltas.keys())
+        _apply(deltas)
+        return PointTransaction.objects.bulk_create(entries, batch_size=batch_size)
+
+
+def reward_completed_exchanges(amount, exchange_ids=None, batch_size=1000):
+    """
+    Начисляет amount очков обоим участникам каждого завершённого обмена,
+    за который начисления ещё не было. Повторный вызов ничего не удвоит.
+    """
+    rewarded = PointTransaction.objects.filter(exchange=models.OuterRef('pk'), reason=REWARD_REASON)
+    exchanges = Exchange.objects.filter(status='завершён').filter(~models.Exists(rewarded))
+    if exchange_ids is not None:
+        exchanges = exchanges.filter(pk__in=exchange_ids)
+    exchanges = exchanges.order_by('pk')
+
+    # пачки берём по ключу, а не одним iterator(): начисления пишутся в ту же
+    # таблицу, что проверяет NOT EXISTS
+    posted = 0
+    last_pk = 0
+    per_batch = max(batch_size // 2, 1)
+    while True:
+        rows = list(exchanges.filter(pk__gt=last_pk).values_list('pk', 'user1_id', 'user2_id')[:per_batch])
+        if not rows:
+            return posted
+        batch = [
+            PointTransaction(user_id=user_id, amount=amount, reason=REWARD_REASON, exchange_id=exchange_id)
+            for exchange_id, user1_id, user2_id in rows
+            for user_id in (user1_id, user2_id)
+        ]
+        posted += len(post_batch(batch, batch_size))
+        last_pk = rows[-1][0]
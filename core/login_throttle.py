@@ -0,0 +1,93 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+LOGIN_THROTTLE_ALIAS = getattr(settings, 'LOGIN_THROTTLE_ALIAS', 'default')
+
+
+def _cache():
+    return caches[LOGIN_THROTTLE_ALIAS]
+
+
+def _limit(scope):
+    """(число событий, окно в секундах) или None — ограничение выключено."""
+    return getattr(settings, 'LOGIN_THROTTLE', {}).get(scope)
+
+
+def _key(scope, ident, index):
+    digest = hashlib.sha256(ident.encode()).hexdigest()[:32]
+    return f'login-throttle:{scope}:{digest}:{index}'
+
+
+def count(scope, ident, now=None):
+    """
+    Число событий за последние window секунд. Скользящее окно
+    приближается двумя фиксированными: прошлое учитывается с весом той
+    доли, что ещё попадает в окно, — два ключа в кеше вместо списка времён.
+    """
+    limit = _limit(scope)
+    if limit is None:
+        return 0
+    _, window = limit
+    now = time.time() if now is None else now
+    index, elapsed = divmod(now, window)
+    current, previous = _key(scope, ident, int(index)), _key(scope, ident, int(index) - 1)
+    values = _cache().get_many([current, previous])
+    return values.get(previous, 0) * (1 - elapsed / window) + values.get(current, 0)
+
+
+def hit(scope, ident, now=None):
+    limit = _limit(scope)
+    if limit is None:
+        return
+    _, window = limit
+    now = time.time() if now is None else now
+    key = _key(scope, ident, int(now // window))
+    cache = _cache()
+    # ключ живёт два окна: следующее окно читает его как прошлое
+    cache.add(key, 0, window * 2)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # вытеснен между add и incr
+        cache.set(key, 1, window * 2)
+
+
+def reset(scope, idents, now=None):
+    """Забывает события по адресам idents за текущее и прошлое окно."""
+    limit = _limit(scope)
+    if limit is None:
+        return
+    index = int((time.time() if now is None else now) // limit[1])
+    _cache().delete_many([_key(scope, ident, i) for ident in idents for i in (index, index - 1)])
+
+
+def exceeded(scope, ident, now=None):
+    limit = _limit(scope)
+    return limit is not None and count(scope, ident, now) >= limit[0]
+
+
+def client_ip(request):
+    # за прокси REMOTE_ADDR должен выставлять сам сервер приложений
+    # (например, forwarded_allow_ips у gunicorn), X-Forwarded-For подделывается
+    return request.META.get('REMOTE_ADDR', '') if request is not None else ''
+
+
+def blocked(ip, email):
+    """Попытку отклоняем до authenticate(): хеширование пароля — самое дорогое во входе."""
+    return exceeded('ip', ip) or exceeded('email', email.lower())
+
+
+def attempt(ip):
+    hit('ip', ip)
+
+
+def failed(email):
+    hit('email', email.lower())
+
+
+def retry_minutes():
+    windows = [limit[1] for limit in getattr(settings, 'LOGIN_THROTTLE', {}).values() if limit]
+    return max(1, -(-max(windows, default=60) // 60))
@@ -0,0 +1,135 @@
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.contrib import admin
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.management.rollback import rolled_back
+from core.models import Exchange, Message, Review, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Бенчмарк списков админки на больших таблицах: заполняет сообщения, отзывы и обмены '
+        'внутри транзакции, меряет время ответа и число запросов списков (с настройками '
+        'LargeTableAdmin и без них) и откатывает данные.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Сколько сообщений создать')
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--no-baseline', action='store_true', help='Не мерить списки со стандартными настройками')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        # суперпользователь создаётся внутри транзакции: его кеш сбросится после отката
+        users = []
+        with rolled_back(users=users):
+            superuser = self.fill(options)
+            users.append(superuser)
+            client = Client()
+            client.force_login(superuser)
+            cases = self.cases()
+            self.stdout.write('\nС настройками LargeTableAdmin:')
+            self.measure(client, cases, options['repeat'])
+            if not options['no_baseline']:
+                self.stdout.write('\nБез них (Paginator, полный COUNT(*), без list_select_related):')
+                with self.baseline():
+                    self.measure(client, cases, options['repeat'])
+
+    def fill(self, options):
+        rng = random.Random(options['seed'])
+        started = time.perf_counter()
+        marker = f'admin-bench-{int(time.time())}'
+        superuser = User.objects.create_superuser(f'{marker}@bench.local', 'Bench Admin', None)
+        users = User.objects.bulk_create(
+            (User(email=f'{marker}-{i}@bench.local', full_name=f'Bench {i}', password='!') for i in range(options['users'])),
+            batch_size=2000,
+        )
+        user_ids = [user.pk for user in users]
+        exchanges = Exchange.objects.bulk_create(
+            (
+                Exchange(user1_id=user_ids[i], user2_id=user_ids[(i + 1) % len(user_ids)],
+                         status=rng.choice(['активен', 'завершён', 'отклонён']), format='онлайн')
+                for i in range(len(user_ids))
+            ),
+            batch_size=2000,
+        )
+
+        now = timezone.now()
+        batch_size = 10_000
+        for start in range(0, options['rows'], batch_size):
+            batch = []
+            for _ in range(min(batch_size, options['rows'] - start)):
+                exchange = rng.choice(exchanges)
+                batch.append(Message(
+                    exchange_id=exchange.pk, sender_id=exchange.user1_id, receiver_id=exchange.user2_id,
+                    text='Сообщение для бенчмарка', is_read=rng.random() < 0.95,
+                ))
+            Message.objects.bulk_create(batch)
+        Message.objects.filter(exchange__in=exchanges).update(sent_at=now - timedelta(days=30))
+        Review.objects.bulk_create(
+            (
+                Review(reviewer_id=exchange.user1_id, reviewed_user_id=exchange.user2_id, exchange_id=exchange.pk,
+                       rating=rng.randint(1, 5), text='Отзыв')
+                for exchange in exchanges
+            ),
+            batch_size=2000,
+        )
+        self.stdout.write(f'Сообщений: {options["rows"]} за {time.perf_counter() - started:.0f} с')
+        return superuser
+
+    def cases(self):
+        messages = reverse('admin:core_message_changelist')
+        since = urlencode({'sent_at__gte': (timezone.localtime() - timedelta(days=40)).isoformat()})
+        return [
+            ('сообщения', messages),
+            ('сообщения, непрочитанные', f'{messages}?is_read__exact=0'),
+            ('сообщения, за период', f'{messages}?{since}'),
+            ('сообщения, стр. 500', f'{messages}?p=500'),
+            ('отзывы', reverse('admin:core_review_changelist')),
+            ('обмены, завершённые', f'{reverse("admin:core_exchange_changelist")}?status__exact=завершён'),
+        ]
+
+    def measure(self, client, cases, repeat):
+        for name, url in cases:
+            timings = []
+            for _ in range(repeat):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    timings.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    self.stdout.write(self.style.ERROR(f'  {name}: HTTP {response.status_code}'))
+                    break
+            else:
+                self.stdout.write(
+                    f'  {name:<28} медиана {statistics.median(timings) * 1000:7.1f} мс, '
+                    f'запросов {len(queries)}'
+                )
+
+    @contextmanager
+    def baseline(self):
+        patched = [admin.site._registry[model] for model in (Message, Review, Exchange)]
+        for model_admin in patched:
+            model_admin.paginator = Paginator
+            model_admin.show_full_result_count = True
+            model_admin.list_select_related = False
+        try:
+            yield
+        finally:
+            # атрибуты экземпляра убираем — снова действуют атрибуты класса
+            for model_admin in patched:
+                for name in ('paginator', 'show_full_result_count', 'list_select_related'):
+                    delattr(model_admin, name)
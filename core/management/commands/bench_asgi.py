@@ -0,0 +1,211 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.utils.http import urlencode
+
+from core.management.commands.bench_views import Command as BenchViews
+from core.management.commands.bench_views import percentile
+from core.site_urls import sample_requests
+
+# страницы с async-версией в core/async_views.py
+READ_VIEWS = ('home', 'skills_list', 'proposals_list', 'profile', 'exchanges_list')
+
+# (обработчик, SKILLSWAP_ASYNC_VIEWS): ASYNC_VIEWS читается при импорте
+# URLconf, поэтому каждый вариант — отдельный процесс
+MODES = {
+    'wsgi': ('wsgi', '0'),
+    'wsgi-async': ('wsgi', '1'),
+    'asgi': ('asgi', '0'),
+    'asgi-async': ('asgi', '1'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Пропускная способность страниц только для чтения под WSGI и ASGI, с синхронными '
+        'вьюхами и async-версиями (SKILLSWAP_ASYNC_VIEWS=1): запросы идут прямо в '
+        'обработчик Django, по --concurrency одновременно, мимо кеша страниц. '
+        'Печатает запросов в секунду, p50 и p95 по каждой странице.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Email пользователя (по умолчанию — самый активный по обменам)')
+        parser.add_argument('--concurrency', type=int, default=8, help='Одновременных запросов')
+        parser.add_argument('--requests', type=int, default=80, help='Запросов на страницу')
+        parser.add_argument('--only', action='append', default=[], help='Имя маршрута, можно несколько раз')
+        parser.add_argument('--mode', action='append', default=[], choices=list(MODES), help='Вариант, можно несколько раз (по умолчанию все)')
+        # внутренние: так команда запускает сама себя в дочернем процессе
+        parser.add_argument('--child', choices=('wsgi', 'asgi'), help=argparse.SUPPRESS)
+        parser.add_argument('--cookie', help=argparse.SUPPRESS)
+        parser.add_argument('--urls', help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['child']:
+            return self.child(options)
+
+        user = BenchViews().pick_user(options['user'])
+        names = options['only'] or READ_VIEWS
+        urls = {
+            request.name: request.url + (f'?{urlencode(request.data)}' if request.data else '')
+            for request in sample_requests(user) if request.name in names
+        }
+        if not urls:
+            raise CommandError(f'Нет таких маршрутов среди {", ".join(READ_VIEWS)}')
+
+        session = self.login(user)
+        results = {}
+        try:
+            for mode in options['mode'] or MODES:
+                handler, async_views = MODES[mode]
+                output = subprocess.run(
+                    [
+                        sys.executable, '-m', 'django', 'bench_asgi', '--child', handler,
+                        '--cookie', f'{settings.SESSION_COOKIE_NAME}={session.session_key}',
+                        '--urls', json.dumps(urls),
+                        '--concurrency', str(options['concurrency']),
+                        '--requests', str(options['requests']),
+                    ],
+                    env=dict(os.environ, SKILLSWAP_ASYNC_VIEWS=async_views),
+                    cwd=settings.BASE_DIR, check=True, capture_output=True, text=True,
+                ).stdout
+                results[mode] = json.loads(output.splitlines()[-1])
+        finally:
+            session.delete()
+        self.print(user, urls, results, options)
+
+    def login(self, user):
+        """Сессия, как после входа: дочерние процессы шлют её куку."""
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+        return session
+
+    def child(self, options):
+        urls = json.loads(options['urls'])
+        run = self.wsgi if options['child'] == 'wsgi' else self.asgi
+        results = {}
+        for name, url in urls.items():
+            path, _, query = url.partition('?')
+            # прогрев: соединение с базой, шаблоны, кеш пользователя
+            run(path, query, options['cookie'], options['concurrency'], options['concurrency'])
+            started = time.perf_counter()
+            timings, status = run(path, query, options['cookie'], options['requests'], options['concurrency'])
+            elapsed = time.perf_counter() - started
+            results[name] = {
+                'status': status,
+                'rps': round(len(timings) / elapsed, 1),
+                'p50_ms': round(statistics.median(timings) * 1000, 2),
+                'p95_ms': round(percentile(timings, 0.95) * 1000, 2),
+            }
+        self.stdout.write(json.dumps(results))
+
+    def wsgi(self, path, query, cookie, count, concurrency):
+        from django.core.wsgi import get_wsgi_application
+
+        application = get_wsgi_application()
+        factory = RequestFactory()
+        statuses = []
+
+        def start_response(status, headers, exc_info=None):
+            statuses.append(int(status.split()[0]))
+
+        def one(number):
+            # уникальный параметр — мимо кеша страниц, каждый раз настоящий рендер
+            environ = factory._base_environ(
+                PATH_INFO=path, QUERY_STRING=self.bust(query, number), HTTP_COOKIE=cookie,
+            )
+            started = time.perf_counter()
+            response = application(environ, start_response)
+            try:
+                for _ in response:
+                    pass
+            finally:
+                response.close()
+            return time.perf_counter() - started
+
+        with ThreadPoolExecutor(concurrency) as pool:
+            timings = list(pool.map(one, range(count)))
+        return timings, max(statuses)
+
+    def asgi(self, path, query, cookie, count, concurrency):
+        from django.core.asgi import get_asgi_application
+
+        application = get_asgi_application()
+        statuses = []
+
+        async def one(number, semaphore):
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': path,
+                'raw_path': path.encode(),
+                'query_string': self.bust(query, number).encode(),
+                'root_path': '',
+                'headers': [(b'host', b'localhost'), (b'cookie', cookie.encode())],
+                'client': ('127.0.0.1', 0),
+                'server': ('localhost', 80),
+            }
+            received = False
+
+            async def receive():
+                nonlocal received
+                if received:
+                    # клиент не отключается: Django сам снимет ожидание после ответа
+                    await asyncio.Event().wait()
+                received = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+
+            async with semaphore:
+                started = time.perf_counter()
+                await application(scope, receive, send)
+                return time.perf_counter() - started
+
+        async def main():
+            semaphore = asyncio.Semaphore(concurrency)
+            return await asyncio.gather(*(one(number, semaphore) for number in range(count)))
+
+        timings = asyncio.run(main())
+        return timings, max(statuses)
+
+    def bust(self, query, number):
+        return '&'.join(filter(None, [query, f'_bench={number}-{time.monotonic_ns()}']))
+
+    def print(self, user, urls, results, options):
+        self.stdout.write(
+            f'Пользователь {user.email}, {options["requests"]} запросов на страницу, '
+            f'по {options["concurrency"]} одновременно'
+        )
+        modes = list(results)
+        self.stdout.write(f'{"маршрут":<16}' + ''.join(f'{mode:>24}' for mode in modes))
+        self.stdout.write(f'{"":<16}' + f'{"запр/с  p50, мс":>24}' * len(modes))
+        for name in urls:
+            line = f'{name:<16}'
+            for mode in modes:
+                result = results[mode][name]
+                cell = f'{result["rps"]:.0f}  {result["p50_ms"]:.1f}'
+                if result['status'] != 200:
+                    cell = f'HTTP {result["status"]}  ' + cell
+                line += f'{cell:>24}'
+            self.stdout.write(line)
+
@@ -0,0 +1,73 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.autocomplete import SkillTrie
+from core.management.rollback import rolled_back
+from core.models import Category, Skill
+
+SYLLABLES = ['ка', 'ро', 'ми', 'ла', 'то', 'не', 'ри', 'ва', 'ст', 'по', 'ле', 'ди', 'зо', 'ну', 'кс', 'тр']
+
+
+class Command(BaseCommand):
+    help = (
+        'Бенчмарк автодополнения навыков: генерирует синтетические навыки, строит '
+        'префиксный индекс и замеряет поиск по префиксам. Данные откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--skills', type=int, default=500_000)
+        parser.add_argument('--lookups', type=int, default=10000)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        with rolled_back():
+            self.run(options)
+        self.stdout.write('Синтетические данные откатены.')
+
+    def word(self):
+        return ''.join(self.rng.choices(SYLLABLES, k=self.rng.randint(2, 5)))
+
+    def run(self, options):
+        rng = self.rng
+        category = Category.objects.create(name=f'bench-{int(time.time())}')
+        levels = [code for code, _ in Skill.LEVEL_CHOICES]
+        batch = []
+        for _ in range(options['skills']):
+            name = ' '.join(self.word() for _ in range(rng.randint(1, 3)))
+            batch.append(Skill(name=name.capitalize(), level=rng.choice(levels), category=category))
+            if len(batch) >= options['batch_size']:
+                Skill.objects.bulk_create(batch)
+                batch = []
+        Skill.objects.bulk_create(batch)
+
+        started = time.perf_counter()
+        trie = SkillTrie.build()
+        self.stdout.write(
+            f'Построение индекса: {time.perf_counter() - started:.2f} с, '
+            f'{len(trie.skills)} навыков, {len(trie.keys)} ключей'
+        )
+
+        timings = []
+        found = 0
+        for _ in range(options['lookups']):
+            word = self.word()
+            prefix = word[:rng.randint(1, len(word))]
+            started = time.perf_counter()
+            found += len(trie.lookup(prefix, limit=10))
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        self.stdout.write(
+            f'Поиск по префиксу ({len(timings)} запросов): '
+            f'p50 {statistics.median(timings):.3f} мс, '
+            f'p95 {timings[int(len(timings) * 0.95) - 1]:.3f} мс, '
+            f'max {timings[-1]:.3f} мс, найдено в среднем {found / len(timings):.1f}'
+        )
+
+        started = time.perf_counter()
+        trie.add(10 ** 9, 'Новый навык', levels[0], category.pk)
+        self.stdout.write(f'Инкрементальное добавление: {(time.perf_counter() - started) * 1000:.3f} мс')
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import random
+import resource
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+from core.chat.app import chat_application
+from core.chat.broker import get_broker
+from core.chat.writer import get_writer
+from core.models import Exchange, User
+
+
+class FakeSocket:
+    """Клиент WebSocket без сети: очереди событий ASGI в обе стороны."""
+
+    def __init__(self, on_message):
+        self.inbox = asyncio.Queue()
+        self.accepted = asyncio.Event()
+        self.closed = None
+        self.on_message = on_message
+
+    async def receive(self):
+        return await self.inbox.get()
+
+    async def send(self, event):
+        if event['type'] == 'websocket.accept':
+            self.accepted.set()
+        elif event['type'] == 'websocket.close':
+            self.closed = event.get('code')
+            self.accepted.set()
+        elif event['type'] == 'websocket.send':
+            self.on_message(json.loads(event['text']))
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест чата: поднимает тысячи WebSocket-соединений к ASGI-приложению '
+        'в одном процессе, рассылает сообщения и замеряет задержку доставки. '
+        'Временные пользователи, обмены и сообщения удаляются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--exchanges', type=int, default=1000)
+        parser.add_argument('--tabs', type=int, default=2, help='Соединений на участника обмена')
+        parser.add_argument('--messages', type=int, default=5000)
+        parser.add_argument('--rate', type=int, default=2000, help='Сообщений в секунду')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        marker = f'chat-bench-{int(time.time())}'
+        count = options['exchanges']
+        users = User.objects.bulk_create(
+            User(email=f'{marker}-{i}@bench.local', full_name=f'Bench {i}', password='!')
+            for i in range(count * 2)
+        )
+        user_ids = [user.pk for user in users]
+        # то же хранилище, из которого сессию читает core/chat/app.py
+        SessionStore = import_string(f'{settings.SESSION_ENGINE}.SessionStore')
+        stores = []
+        try:
+            exchanges = Exchange.objects.bulk_create(
+                Exchange(user1=users[2 * i], user2=users[2 * i + 1], status='активен', format='онлайн')
+                for i in range(count)
+            )
+            sessions = {}
+            for user in users:
+                session = SessionStore()
+                session[SESSION_KEY] = str(user.pk)
+                session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+                session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+                session.save()
+                sessions[user.pk] = session.session_key
+                stores.append(session)
+            asyncio.run(self.run(exchanges, sessions, options))
+        finally:
+            for session in stores:
+                session.delete()
+            User.objects.filter(pk__in=user_ids).delete()
+
+    async def run(self, exchanges, sessions, options):
+        rng = random.Random(options['seed'])
+        latencies = []
+        delivered = 0
+        expected = 0
+        done = asyncio.Event()
+
+        def on_message(data):
+            nonlocal delivered
+            if data.get('type') != 'message':
+                return
+            latencies.append((time.perf_counter() - float(data['text'])) * 1000)
+            delivered += 1
+            if delivered >= expected:
+                done.set()
+
+        sockets = []
+        tasks = []
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        started = time.perf_counter()
+        for exchange in exchanges:
+            for user_id in (exchange.user1_id, exchange.user2_id):
+                for _ in range(options['tabs']):
+                    socket = FakeSocket(on_message)
+                    scope = {
+                        'type': 'websocket',
+                        'path': f'/ws/exchanges/{exchange.pk}/',
+                        'headers': [
+                            (b'host', b'testserver'),
+                            (b'cookie', f'sessionid={sessions[user_id]}'.encode()),
+                        ],
+                    }
+                    socket.inbox.put_nowait({'type': 'websocket.connect'})
+                    tasks.append(asyncio.create_task(chat_application(scope, socket.receive, socket.send)))
+                    sockets.append((exchange.pk, socket))
+        await asyncio.gather(*(socket.accepted.wait() for _, socket in sockets))
+        rejected = sum(1 for _, socket in sockets if socket.closed is not None)
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        self.stdout.write(
+            f'Соединений: {len(sockets)} (отклонено {rejected}) за {time.perf_counter() - started:.2f} с, '
+            f'{get_broker().stats()}, прирост RSS ≈ {(rss_after - rss_before) / max(len(sockets), 1):.1f} КБ на соединение'
+        )
+
+        # каждое сообщение получают все вкладки обоих участников обмена
+        per_message = 2 * options['tabs']
+        expected = options['messages'] * per_message
+        interval = 1 / options['rate']
+        started = time.perf_counter()
+        for i in range(options['messages']):
+            _, socket = rng.choice(sockets)
+            socket.inbox.put_nowait({'type': 'websocket.receive', 'text': json.dumps({'text': repr(time.perf_counter())})})
+            # выдерживаем заданный темп отправки
+            delay = started + (i + 1) * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        try:
+            await asyncio.wait_for(done.wait(), timeout=60)
+        except asyncio.TimeoutError:
+            self.stderr.write('Не все сообщения доставлены за 60 с')
+        elapsed = time.perf_counter() - started
+
+        writer = get_writer()
+        latencies.sort()
+        if latencies:
+            self.stdout.write(
+                f'Доставлено {delivered} из {expected} за {elapsed:.2f} с '
+                f'({options["messages"] / elapsed:.0f} сообщ./с на вход, {delivered / elapsed:.0f} доставок/с); '
+                f'задержка p50 {statistics.median(latencies):.1f} мс, '
+                f'p95 {latencies[int(len(latencies) * 0.95) - 1]:.1f} мс, max {latencies[-1]:.1f} мс'
+            )
+        self.stdout.write(f'Запись: {writer.written} сообщений за {writer.batches} пакетных INSERT')
+
+        for _, socket in sockets:
+            socket.inbox.put_nowait({'type': 'websocket.disconnect', 'code': 1000})
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await writer.close()
@@ -0,0 +1,127 @@
+import random
+import threading
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, models
+from django.utils import timezone
+
+from core import events
+from core.models import Event, EventParticipation, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверка записи на мероприятие под конкуренцией: параллельные регистранты '
+        'и отмены на одно мероприятие. Создаёт временных пользователей, проверяет, '
+        'что подтверждённых не больше лимита и счётчик совпадает с участиями, и удаляет их.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--registrants', type=int, default=100)
+        parser.add_argument('--capacity', type=int, default=10)
+        parser.add_argument('--cancellations', type=int, default=20, help='Сколько участников затем параллельно отменит запись')
+        parser.add_argument('--naive', action='store_true', help='Для сравнения: COUNT(*) и затем INSERT без учёта мест')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        marker = f'event-bench-{int(time.time())}'
+        users = User.objects.bulk_create(
+            User(email=f'{marker}-{i}@bench.local', full_name=f'Bench {i}', password='!')
+            for i in range(options['registrants'] + 1)
+        )
+        organizer, registrants = users[0], [user.pk for user in users[1:]]
+        event = Event.objects.create(
+            title=marker, organizer=organizer, max_participants=options['capacity'],
+            event_date=timezone.localdate() + timedelta(days=7),
+        )
+        try:
+            register = self.naive_register if options['naive'] else events.register
+            self.stdout.write(f'Регистрация: {connection.vendor}, {len(registrants)} потоков, мест {options["capacity"]}')
+            self.run(registrants, lambda user_id: register(user_id, event.pk))
+            ok = self.verify(event, options['capacity'], counted=not options['naive'])
+
+            if not options['naive'] and options['cancellations']:
+                leaving = random.Random(options['seed']).sample(registrants, min(options['cancellations'], len(registrants)))
+                self.stdout.write(f'Отмена: {len(leaving)} потоков')
+                self.run(leaving, lambda user_id: events.cancel(user_id, event.pk))
+                ok = self.verify(event, options['capacity']) and ok
+        finally:
+            event.delete()
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+        if not ok:
+            raise CommandError('Лимит мест нарушен')
+
+    def naive_register(self, user_id, event_id):
+        event = Event.objects.get(pk=event_id)
+        confirmed = EventParticipation.objects.filter(event_id=event_id, status=events.CONFIRMED).count()
+        status = events.CONFIRMED if confirmed < event.max_participants else events.WAITING
+        return EventParticipation.objects.create(user_id=user_id, event_id=event_id, status=status)
+
+    def run(self, user_ids, action):
+        barrier = threading.Barrier(len(user_ids))
+        retries = []
+        latencies = []
+        lock = threading.Lock()
+
+        def worker(user_id):
+            attempts = 0
+            try:
+                barrier.wait()
+                started = time.perf_counter()
+                while True:
+                    try:
+                        action(user_id)
+                        break
+                    except OperationalError:
+                        # SQLite: database is locked — повторяем, как сделал бы клиент
+                        attempts += 1
+                        time.sleep(0.01)
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+                    retries.append(attempts)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(user_id,)) for user_id in user_ids]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+        self.stdout.write(
+            f'  {len(latencies)} операций за {elapsed:.2f} с, p95 {p95 * 1000:.0f} мс, '
+            f'повторов из-за блокировки {sum(retries)}'
+        )
+
+    def verify(self, event, capacity, counted=True):
+        event.refresh_from_db()
+        statuses = dict(
+            EventParticipation.objects.filter(event=event)
+            .values_list('status').annotate(count=models.Count('pk'))
+            .order_by()
+        )
+        confirmed = statuses.get(events.CONFIRMED, 0)
+        waiting = statuses.get(events.WAITING, 0)
+        self.stdout.write(
+            f'  подтверждено {confirmed} (счётчик {event.confirmed_count}), '
+            f'в ожидании {waiting}, отказов {statuses.get(events.DECLINED, 0)}'
+        )
+        problems = []
+        if confirmed > capacity:
+            problems.append(f'подтверждено {confirmed} при лимите {capacity}')
+        # наивная запись счётчик не ведёт
+        if counted and confirmed != event.confirmed_count:
+            problems.append('счётчик не совпадает с участиями')
+        if waiting and confirmed < capacity:
+            problems.append('есть свободные места при непустом листе ожидания')
+        for problem in problems:
+            self.stdout.write(self.style.ERROR(f'  {problem}'))
+        if not problems:
+            self.stdout.write(self.style.SUCCESS('  Лимит соблюдён, свободные места отданы ожидающим'))
+        return not problems
@@ -0,0 +1,108 @@
+import random
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, models
+
+from core import ledger
+from core.models import Point, PointTransaction, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Бенчмарк пропускной способности журнала очков с параллельными писателями. '
+        'Создаёт временных пользователей, проверяет инвариант balance = сумма транзакций >= 0 и удаляет их.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--users', type=int, default=50, help='Меньше пользователей — выше конкуренция')
+        parser.add_argument('--operations', type=int, default=500, help='Операций на писателя')
+        parser.add_argument('--batch', type=int, default=1, help='Транзакций в одном вызове post_batch')
+        parser.add_argument('--initial', type=int, default=500, help='Стартовый баланс каждого пользователя')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        marker = f'ledger-bench-{int(time.time())}'
+        users = User.objects.bulk_create(
+            User(email=f'{marker}-{i}@bench.local', full_name=f'Bench {i}', password='!')
+            for i in range(options['users'])
+        )
+        user_ids = [user.pk for user in users]
+        try:
+            ledger.post_batch(
+                PointTransaction(user_id=user_id, amount=options['initial'], reason='ручная корректировка')
+                for user_id in user_ids
+            )
+            self.run(user_ids, options)
+            self.verify(user_ids)
+        finally:
+            User.objects.filter(pk__in=user_ids).delete()
+
+    def run(self, user_ids, options):
+        stats = {'posted': 0, 'rejected': 0, 'locked': 0}
+        lock = threading.Lock()
+
+        def writer(seed):
+            rng = random.Random(seed)
+            local = {'posted': 0, 'rejected': 0, 'locked': 0}
+            try:
+                for _ in range(options['operations']):
+                    entries = [
+                        PointTransaction(
+                            user_id=rng.choice(user_ids),
+                            amount=rng.choice([10, 10, 5, -5, -20]),
+                            reason='ручная корректировка',
+                        )
+                        for _ in range(options['batch'])
+                    ]
+                    try:
+                        if options['batch'] == 1:
+                            entry = entries[0]
+                            ledger.post(entry.user_id, entry.amount, entry.reason)
+                        else:
+                            ledger.post_batch(entries)
+                        local['posted'] += len(entries)
+                    except ledger.InsufficientPoints:
+                        local['rejected'] += len(entries)
+                    except OperationalError:
+                        # SQLite: database is locked — писатель не дождался блокировки
+                        local['locked'] += len(entries)
+            finally:
+                connection.close()
+                with lock:
+                    for key, value in local.items():
+                        stats[key] += value
+
+        threads = [threading.Thread(target=writer, args=(options['seed'] + i,)) for i in range(options['writers'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        total = stats['posted'] + stats['rejected'] + stats['locked']
+        self.stdout.write(
+            f'{options["writers"]} писателей, {total} транзакций за {elapsed:.2f} с: '
+            f'{stats["posted"] / elapsed:.0f} проведённых/с, '
+            f'отклонено (нет средств) {stats["rejected"]}, ошибок блокировки {stats["locked"]}'
+        )
+
+    def verify(self, user_ids):
+        sums = dict(
+            PointTransaction.objects.filter(user_id__in=user_ids)
+            .values_list('user_id')
+            .annotate(total=models.Sum('amount'))
+            .order_by()
+        )
+        balances = dict(Point.objects.filter(user_id__in=user_ids).values_list('user_id', 'balance'))
+        broken = [
+            user_id for user_id in user_ids
+            if balances.get(user_id, 0) != sums.get(user_id, 0) or balances.get(user_id, 0) < 0
+        ]
+        if broken:
+            self.stdout.write(self.style.ERROR(f'Инвариант нарушен у пользователей: {broken}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Инвариант соблюдён: баланс = сумма транзакций >= 0'))
@@ -0,0 +1,101 @@
+import logging
+import secrets
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+from core import login_throttle
+from core.management.rollback import rolled_back
+from core.models import User
+
+PASSWORD = 'bench-login-password'
+LOGIN_ADDRESS = '198.51.100.1'
+
+
+class Command(BaseCommand):
+    help = (
+        'Бенчмарк входа: стоимость проверки пароля каждым хешером из PASSWORD_HASHERS '
+        'проекта и пропускная способность /login/ под перебором паролей с ограничением '
+        'попыток (LOGIN_THROTTLE) и без него. Всё, что вход запишет, откатывается.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=100, help='Попыток перебора на режим')
+        parser.add_argument('--emails', type=int, default=10, help='Сколько адресов перебирает атакующий')
+        parser.add_argument('--every', type=int, default=10, help='Настоящий вход после каждых стольких попыток')
+        parser.add_argument('--verify', type=int, default=5, help='Проверок пароля на хешер')
+
+    def handle(self, *args, **options):
+        self.hashers(options['verify'])
+        user = User.objects.filter(is_active=True).order_by('pk').first()
+        if user is None:
+            raise CommandError('Нет пользователей: сначала python manage.py seed')
+        victims = list(User.objects.exclude(pk=user.pk).order_by('?').values_list('email', flat=True)[:options['emails']])
+        victims += [f'nobody-{index}@example.com' for index in range(options['emails'] - len(victims))]
+
+        self.stdout.write(
+            f'\n{"режим":<22} {"попыток/с":>10} {"мс/попытка":>11} {"отказов 429":>12} {"вход p50, мс":>13} {"входов":>7}'
+        )
+        # отказы 429 django.request пишет в лог предупреждением на каждую попытку
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        addresses = [LOGIN_ADDRESS]
+        try:
+            with rolled_back(users=[user]):
+                user.set_password(PASSWORD)
+                user.save(update_fields=['password'])
+                for label, throttle in (('без ограничения', {}), ('LOGIN_THROTTLE', settings.LOGIN_THROTTLE)):
+                    with override_settings(LOGIN_THROTTLE=throttle):
+                        addresses.append(self.attack(label, user, victims, options['attempts'], options['every']))
+        finally:
+            # счётчики попыток живут в кеше, откат их не трогает: иначе
+            # настоящие адреса из victims остались бы заблокированными
+            login_throttle.reset('email', [email.lower() for email in victims])
+            login_throttle.reset('ip', addresses)
+
+    def hashers(self, verify):
+        self.stdout.write(f'{"хешер":<48} {"проверка, мс":>13} {"входов/с на ядро":>17}')
+        for path in settings.PASSWORD_HASHERS:
+            hasher = import_string(path)()
+            try:
+                encoded = hasher.encode(PASSWORD, hasher.salt())
+            except ValueError as error:
+                # argon2/bcrypt без своей библиотеки
+                self.stdout.write(f'{path:<48} {"—":>13}  {error}')
+                continue
+            timings = []
+            for _ in range(verify):
+                started = time.perf_counter()
+                hasher.verify(PASSWORD, encoded)
+                timings.append(time.perf_counter() - started)
+            cost = statistics.median(timings)
+            self.stdout.write(f'{path:<48} {cost * 1000:>13.1f} {1 / cost:>17.1f}')
+
+    def attack(self, label, user, victims, attempts, every):
+        url = reverse('login')
+        # свой адрес на каждый прогон: счётчики прошлых прогонов не мешают
+        address = f'203.0.113.{secrets.randbelow(250) + 1}'
+        attacker = Client(REMOTE_ADDR=address)
+        rejected = 0
+        logins = []
+        started = time.perf_counter()
+        for attempt in range(attempts):
+            response = attacker.post(url, {'username': victims[attempt % len(victims)], 'password': secrets.token_hex(8)})
+            rejected += response.status_code == 429
+            if (attempt + 1) % every == 0:
+                client = Client(REMOTE_ADDR=LOGIN_ADDRESS)
+                login_started = time.perf_counter()
+                response = client.post(url, {'username': user.email, 'password': PASSWORD})
+                if response.status_code == 302:
+                    logins.append(time.perf_counter() - login_started)
+        elapsed = time.perf_counter() - started
+        login_p50 = f'{statistics.median(logins) * 1000:.1f}' if logins else '—'
+        self.stdout.write(
+            f'{label:<22} {attempts / elapsed:>10.1f} {elapsed / attempts * 1000:>11.1f} '
+            f'{rejected:>12} {login_p50:>13} {len(logins):>7}'
+        )
+        return address
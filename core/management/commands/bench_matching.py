@@ -0,0 +1,102 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.management.rollback import rolled_back
+from core.matching import find_matches, rebuild_index
+from core.models import Category, Proposal, Request, Skill, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Бенчмарк индекса совпадений: генерирует синтетические предложения и запросы, '
+        'строит индекс и замеряет поиск. Все данные откатываются по завершении.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Предложений + запросов')
+        parser.add_argument('--users', type=int, default=5000)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--skills', type=int, default=2000)
+        parser.add_argument('--lookups', type=int, default=1000)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        with rolled_back():
+            self.run(options)
+        self.stdout.write('Синтетические данные откатены.')
+
+    def timed(self, label, func, *args, **kwargs):
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.stdout.write(f'{label}: {time.perf_counter() - started:.2f} с')
+        return result
+
+    def run(self, options):
+        rng = self.rng
+        batch_size = options['batch_size']
+        marker = f'bench-{int(time.time())}'
+
+        categories = Category.objects.bulk_create(
+            Category(name=f'{marker}-cat-{i}') for i in range(options['categories'])
+        )
+        levels = [code for code, _ in Skill.LEVEL_CHOICES]
+        skills = Skill.objects.bulk_create(
+            (Skill(name=f'{marker}-skill-{i}', level=rng.choice(levels), category=rng.choice(categories))
+             for i in range(options['skills'])),
+            batch_size=batch_size,
+        )
+        users = User.objects.bulk_create(
+            (User(email=f'{marker}-{i}@bench.local', full_name=f'Bench {i}', password='!')
+             for i in range(options['users'])),
+            batch_size=batch_size,
+        )
+
+        def sources(model, count):
+            for _ in range(count):
+                offered, wanted = rng.sample(skills, 2)
+                yield model(user=rng.choice(users), skill_offered=offered, skill_wanted=wanted)
+
+        half = options['rows'] // 2
+        self.timed(f'Вставка {half} предложений', self.bulk_insert, Proposal, sources(Proposal, half), batch_size)
+        self.timed(f'Вставка {options["rows"] - half} запросов', self.bulk_insert,
+                   Request, sources(Request, options['rows'] - half), batch_size)
+        total = self.timed('Пересборка индекса', rebuild_index, batch_size=batch_size)
+        self.stdout.write(f'Записей в индексе: {total}')
+
+        last_id = Proposal.objects.order_by('-pk').values_list('pk', flat=True).first()
+        ids = [last_id - rng.randrange(half) for _ in range(options['lookups'])]
+        probes = Proposal.objects.in_bulk(ids)
+
+        timings = []
+        found = 0
+        for proposal in probes.values():
+            started = time.perf_counter()
+            found += len(find_matches(proposal, limit=20))
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        self.stdout.write(
+            f'Поиск совпадений ({len(timings)} запросов): '
+            f'p50 {statistics.median(timings):.2f} мс, '
+            f'p95 {timings[int(len(timings) * 0.95) - 1]:.2f} мс, '
+            f'max {timings[-1]:.2f} мс, найдено в среднем {found / len(timings):.1f}'
+        )
+
+        proposal = next(iter(probes.values()))
+        started = time.perf_counter()
+        proposal.skill_wanted = rng.choice(skills)
+        proposal.save()
+        self.stdout.write(f'Инкрементальное обновление при save(): {(time.perf_counter() - started) * 1000:.2f} мс')
+
+    def bulk_insert(self, model, objects, batch_size):
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                model.objects.bulk_create(batch)
+                batch = []
+        model.objects.bulk_create(batch)
@@ -0,0 +1,121 @@
+import itertools
+import json
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from core import search
+from core.management.rollback import rolled_back
+from core.models import Category, Skill
+from core.views import search_view
+
+WORDS = [
+    'программирование', 'python', 'гитара', 'фортепиано', 'английский', 'немецкий',
+    'рисование', 'акварель', 'фотография', 'йога', 'бег', 'плавание', 'шахматы',
+    'кулинария', 'выпечка', 'математика', 'физика', 'химия', 'история', 'вязание',
+    'танцы', 'вокал', 'дизайн', 'маркетинг', 'бухгалтерия', 'javascript', 'django',
+    'начинающих', 'продвинутых', 'основы', 'практика', 'разговорный', 'онлайн',
+    'занятия', 'уроки', 'курс', 'теория', 'детей', 'взрослых', 'быстро',
+]
+SYLLABLES = ['ка', 'ро', 'ми', 'ла', 'то', 'не', 'ри', 'ва', 'ст', 'по', 'ле', 'ди', 'зо', 'ну', 'кс', 'тр']
+ENDINGS = ['', 'а', 'ы', 'ом', 'ами', 'ие', 'ия', 'ов']
+
+
+class Command(BaseCommand):
+    help = (
+        'Бенчмарк поиска: генерирует синтетические навыки, строит индекс и замеряет '
+        'JSON-эндпоинт /search/. Все данные откатываются по завершении.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--skills', type=int, default=500_000)
+        parser.add_argument('--categories', type=int, default=50)
+        parser.add_argument('--lookups', type=int, default=1000)
+        parser.add_argument('--vocabulary', type=int, default=20000, help='Размер словаря (распределение Ципфа)')
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        with rolled_back():
+            self.run(options)
+        self.stdout.write('Синтетические данные откатены.')
+
+    def run(self, options):
+        rng = self.rng
+        batch_size = options['batch_size']
+        marker = f'bench-{int(time.time())}'
+        self.stdout.write(f'Бэкенд поиска: {search.get_backend().name}')
+
+        categories = Category.objects.bulk_create(
+            Category(name=f'{marker}-cat-{i}') for i in range(options['categories'])
+        )
+        levels = [code for code, _ in Skill.LEVEL_CHOICES]
+        # частоты слов в живом тексте убывают по Ципфу: несколько слов
+        # встречаются везде, основная масса — редко
+        # верх распределения в живом тексте — служебные слова, поэтому
+        # «настоящие» слова стоят на рангах 20–500
+        vocabulary = sorted(search.STOP_WORDS)[:20] + [
+            ''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(options['vocabulary'])
+        ]
+        for word in WORDS:
+            vocabulary.insert(rng.randint(20, 500), word)
+        cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+
+        def words(k):
+            return [
+                word if word in search.STOP_WORDS else word + rng.choice(ENDINGS)
+                for word in rng.choices(vocabulary, cum_weights=cum_weights, k=k)
+            ]
+
+        started = time.perf_counter()
+        batch = []
+        for i in range(options['skills']):
+            batch.append(Skill(
+                name=' '.join(words(2)),
+                description=' '.join(words(12)),
+                level=rng.choice(levels),
+                category=rng.choice(categories),
+            ))
+            if len(batch) >= batch_size:
+                Skill.objects.bulk_create(batch)
+                batch = []
+        Skill.objects.bulk_create(batch)
+        self.stdout.write(f'Вставка {options["skills"]} навыков: {time.perf_counter() - started:.2f} с')
+
+        started = time.perf_counter()
+        total = search.rebuild_index(batch_size=batch_size)
+        self.stdout.write(f'Пересборка индекса ({total} документов): {time.perf_counter() - started:.2f} с')
+
+        factory = RequestFactory()
+        queries = []
+        for _ in range(options['lookups']):
+            query = words(rng.choice((1, 2)))
+            # часть запросов — префиксы, как при наборе
+            query = [word[:rng.randint(3, len(word))] if len(word) > 3 and rng.random() < 0.5 else word for word in query]
+            queries.append(' '.join(query))
+
+        timings = []
+        found = 0
+        for query in queries:
+            request = factory.get('/search/', {'q': query, 'kind': 'skill'})
+            started = time.perf_counter()
+            response = search_view(request)
+            timings.append((time.perf_counter() - started) * 1000)
+            found += len(json.loads(response.content)['results'])
+        timings.sort()
+        self.stdout.write(
+            f'GET /search/ ({len(timings)} запросов): '
+            f'p50 {statistics.median(timings):.2f} мс, '
+            f'p95 {timings[int(len(timings) * 0.95) - 1]:.2f} мс, '
+            f'max {timings[-1]:.2f} мс, найдено в среднем {found / len(timings):.1f}'
+        )
+
+        skill = Skill.objects.order_by('-pk').first()
+        started = time.perf_counter()
+        skill.name = 'обновлённый навык'
+        skill.save()
+        self.stdout.write(f'Инкрементальное обновление при save(): {(time.perf_counter() - started) * 1000:.2f} мс')
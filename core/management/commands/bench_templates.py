@@ -0,0 +1,126 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import template_warmup
+from core.management.commands.bench_views import Command as BenchViews
+from core.management.rollback import rolled_back
+from core.site_urls import STAFF_ONLY, sample_requests
+
+# запускается в отдельном процессе: фазы старта воркера по порядку; пакеты
+# приложений импортируются по одному, как это делает apps.populate(), —
+# так видно, сколько стоят jazzmin и админка
+STARTUP_SCRIPT = '''
+import json, time
+from importlib import import_module
+started = time.perf_counter()
+phases = []
+def mark(name):
+    phases.append((name, time.perf_counter() - started))
+import django
+from django.conf import settings
+settings.INSTALLED_APPS
+mark('настройки')
+for app in settings.INSTALLED_APPS:
+    import_module(app.split('.apps.')[0])
+    mark('импорт ' + app)
+django.setup()
+mark('django.setup (модели, ready(), autodiscover админки)')
+from django.urls import get_resolver
+get_resolver().url_patterns
+mark('URLconf (в том числе admin.site.urls)')
+from django.core.handlers.wsgi import WSGIHandler
+WSGIHandler()
+mark('WSGI-обработчик и middleware')
+from core.template_warmup import warm
+warm()
+mark('разбор шаблонов core/templates')
+print(json.dumps(phases))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Бенчмарк шаблонов: время ответа каждой страницы с холодным кешем шаблонов '
+        '(как первый запрос к воркеру) и с тёплым, и время старта процесса по фазам, '
+        'в том числе импорт jazzmin и админки. Всё, что запросы запишут, откатывается.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Email пользователя (по умолчанию — самый активный по обменам)')
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--only', action='append', default=[], help='Имя маршрута, можно несколько раз')
+        parser.add_argument('--startup-runs', type=int, default=5, help='Сколько раз запускать процесс (0 — не мерить старт)')
+
+    def handle(self, *args, **options):
+        self.pages(options)
+        if options['startup_runs']:
+            self.startup(options['startup_runs'])
+
+    def pages(self, options):
+        views = BenchViews()
+        user = views.pick_user(options['user'])
+        staff = views.pick_staff(user)
+        rows = []
+        with rolled_back(users=[user, staff] if staff else [user]):
+            requests = [request for request in sample_requests(user) if request.method == 'get']
+            if options['only']:
+                requests = [request for request in requests if request.name in options['only']]
+            clients = views.clients(user, staff)
+            for request in requests:
+                if request.name in STAFF_ONLY and staff is None:
+                    self.stdout.write(f'{request.name}: нет сотрудника (is_staff), пропущено')
+                    continue
+                client = clients[(staff if request.name in STAFF_ONLY else user).pk]
+                cold = self.measure(client, request, options['repeat'], cold=True)
+                warm = self.measure(client, request, options['repeat'], cold=False)
+                rows.append((request.name, cold, warm))
+
+        self.stdout.write(f'{"маршрут":<32} {"холодный, мс":>13} {"тёплый, мс":>11} {"разница":>9}')
+        for name, cold, warm in rows:
+            self.stdout.write(f'{name:<32} {cold:>13.1f} {warm:>11.1f} {cold - warm:>9.1f}')
+        if rows:
+            self.stdout.write(
+                f'Медиана разницы: {statistics.median(cold - warm for _, cold, warm in rows):.1f} мс на первый запрос страницы'
+            )
+
+    def measure(self, client, request, repeat, cold):
+        timings = []
+        for attempt in range(repeat + 1):
+            if cold:
+                template_warmup.reset()
+            # уникальный параметр — мимо кеша страниц, каждый раз настоящий рендер
+            data = dict(request.data, _bench=f'{cold:d}{attempt}-{time.monotonic_ns()}')
+            started = time.perf_counter()
+            response = getattr(client, request.method)(request.url, data)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            if attempt:
+                timings.append(time.perf_counter() - started)
+        template_warmup.warm()
+        return statistics.median(timings) * 1000
+
+    def startup(self, runs):
+        env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+        totals = []
+        phases = {}
+        for _ in range(runs):
+            started = time.perf_counter()
+            output = subprocess.run(
+                [sys.executable, '-c', STARTUP_SCRIPT], env=env, check=True, capture_output=True, text=True,
+            ).stdout
+            totals.append(time.perf_counter() - started)
+            previous = 0
+            for name, mark in json.loads(output.splitlines()[-1]):
+                phases.setdefault(name, []).append(mark - previous)
+                previous = mark
+
+        self.stdout.write(f'\nСтарт процесса (медиана из {runs}): {statistics.median(totals) * 1000:.0f} мс всего, из них')
+        for name, values in phases.items():
+            self.stdout.write(f'  {statistics.median(values) * 1000:8.1f} мс  {name}')
@@ -0,0 +1,159 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models
+from django.test import Client
+
+from core.management.rollback import rolled_back
+from core.models import Exchange, Message, Proposal, Skill, User
+from core.pagination import estimate_rows
+from core.query_budget import count_queries
+from core.site_urls import STAFF_ONLY, sample_requests
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * share), len(ordered) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Бенчмарк всех маршрутов core/urls.py через тестовый клиент: p50/p95 времени ответа '
+        'и число запросов, GET — мимо кеша страниц. Результат можно сохранить в JSON (--output) и сравнить с прошлым '
+        'прогоном (--baseline): ухудшение p95 сверх допуска или рост числа запросов — ошибка. '
+        'Всё, что запросы запишут, откатывается.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Email пользователя (по умолчанию — самый активный по обменам)')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2, help='Прогонов до замера (кеши, соединение)')
+        parser.add_argument('--only', action='append', default=[], help='Имя маршрута, можно несколько раз')
+        parser.add_argument('--output', help='Куда записать результат в JSON')
+        parser.add_argument('--baseline', help='JSON прошлого прогона для сравнения')
+        parser.add_argument('--tolerance', type=float, default=20.0, help='Допустимый рост p95, %%')
+        parser.add_argument('--min-delta', type=float, default=5.0, help='Рост p95 меньше стольких мс не считается регрессией')
+
+    def handle(self, *args, **options):
+        user = self.pick_user(options['user'])
+        staff = self.pick_staff(user)
+        results = {}
+        with rolled_back(users=[user, staff] if staff else [user]):
+            requests = sample_requests(user)
+            if options['only']:
+                requests = [request for request in requests if request.name in options['only']]
+            clients = self.clients(user, staff)
+            for request in requests:
+                if request.name in STAFF_ONLY and staff is None:
+                    self.stdout.write(f'{request.name}: нет сотрудника (is_staff), пропущено')
+                    continue
+                login = staff if request.name in STAFF_ONLY else user
+                results[request.name] = self.measure(clients[login.pk], login, request, options['repeat'], options['warmup'])
+
+        report = {
+            'vendor': connection.vendor,
+            'user': user.email,
+            'rows': {model._meta.db_table: estimate_rows(model) for model in (User, Skill, Proposal, Exchange, Message)},
+            'views': results,
+        }
+        self.print(results)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stdout.write(f'Записано в {options["output"]}')
+        if options['baseline']:
+            self.compare(results, options['baseline'], options['tolerance'], options['min_delta'])
+
+    def pick_user(self, email):
+        if email:
+            user = User.objects.filter(email=email).first()
+        else:
+            busiest = (
+                Exchange.objects.values('user1').annotate(count=models.Count('pk'))
+                .order_by('-count').values_list('user1', flat=True).first()
+            )
+            user = User.objects.filter(pk=busiest).first() or User.objects.order_by('pk').first()
+        if user is None:
+            raise CommandError('Нет пользователей: сначала python manage.py seed')
+        return user
+
+    def pick_staff(self, user):
+        """
+        Служебные страницы (staff_member_required) меряем от имени
+        существующего сотрудника, а не их редирект на вход.
+        """
+        if user.is_staff and user.is_active:
+            return user
+        return User.objects.filter(is_staff=True, is_active=True).order_by('pk').first()
+
+    def clients(self, user, staff):
+        """Вошедший клиент для каждого из пользователей, по pk."""
+        clients = {}
+        for login in filter(None, (user, staff)):
+            if login.pk not in clients:
+                clients[login.pk] = Client()
+                clients[login.pk].force_login(login)
+        return clients
+
+    def measure(self, client, user, request, repeat, warmup):
+        timings = []
+        queries = []
+        status = None
+        for attempt in range(warmup + repeat):
+            data = request.data
+            if request.method == 'get':
+                # уникальный параметр — мимо кеша страниц (cached_page): иначе после
+                # прогрева меряется попадание в кеш без единого запроса к базе
+                data = dict(data, _bench=f'{attempt}-{time.monotonic_ns()}')
+            with count_queries() as counter:
+                started = time.perf_counter()
+                response = getattr(client, request.method)(request.url, data)
+                if response.streaming:
+                    for _ in response.streaming_content:
+                        pass
+                elapsed = time.perf_counter() - started
+            status = response.status_code
+            if request.name == 'logout':
+                client.force_login(user)
+            if attempt >= warmup:
+                timings.append(elapsed)
+                queries.append(counter.count)
+        return {
+            'url': request.url,
+            'method': request.method.upper(),
+            'status': status,
+            'p50_ms': round(statistics.median(timings) * 1000, 2),
+            'p95_ms': round(percentile(timings, 0.95) * 1000, 2),
+            # худший замер: кеш фрагментов мог сброситься посреди прогона
+            'queries': max(queries),
+        }
+
+    def print(self, results):
+        self.stdout.write(f'{"маршрут":<32} {"метод":<6} {"код":>4} {"p50, мс":>9} {"p95, мс":>9} {"запросов":>9}')
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<32} {result["method"]:<6} {result["status"]:>4} '
+                f'{result["p50_ms"]:>9.1f} {result["p95_ms"]:>9.1f} {result["queries"]:>9}'
+            )
+
+    def compare(self, results, path, tolerance, min_delta):
+        with open(path, encoding='utf-8') as file:
+            baseline = json.load(file)['views']
+        regressions = []
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            growth = (result['p95_ms'] / before['p95_ms'] - 1) * 100 if before['p95_ms'] else 0
+            # у быстрых страниц разброс в пару миллисекунд — это уже десятки процентов
+            if growth > tolerance and result['p95_ms'] - before['p95_ms'] > min_delta:
+                regressions.append(f'{name}: p95 {before["p95_ms"]} → {result["p95_ms"]} мс (+{growth:.0f}%)')
+            if result['queries'] > before['queries']:
+                regressions.append(f'{name}: запросов {before["queries"]} → {result["queries"]}')
+        if regressions:
+            for line in regressions:
+                self.stdout.write(self.style.ERROR(line))
+            raise CommandError(f'Регрессий: {len(regressions)}')
+        self.stdout.write(self.style.SUCCESS(f'Регрессий нет (допуск p95 {tolerance:.0f}%)'))
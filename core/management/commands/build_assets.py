@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import assets
+
+
+class Command(BaseCommand):
+    help = (
+        'Собирает CSS страниц в бандлы (core/assets.py): минификация, хеш содержимого в имени, '
+        'manifest.json и сжатые копии .gz/.br в ASSETS_ROOT. Их отдаёт '
+        'core.assets.PrecompressedAssetsMiddleware с кешированием на год.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clean', action='store_true', help='Удалить файлы прошлых сборок')
+
+    def handle(self, *args, **options):
+        try:
+            stats = assets.build(clean=options['clean'])
+        except FileNotFoundError as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(f'{"бандл":<16} {"файл":<40} {"исходники":>10} {"min":>8} {"gzip":>8} {"brotli":>8}')
+        for name, filename, source, minified, gz, br in stats:
+            self.stdout.write(
+                f'{name:<16} {filename:<40} {source:>10} {minified:>8} {gz:>8} {br if br else "—":>8}'
+            )
+        if assets.brotli is None:
+            self.stdout.write(self.style.WARNING('brotli не установлен — только gzip (pip install brotli)'))
+        if not settings.ASSETS_BUNDLED:
+            self.stdout.write('ASSETS_BUNDLED выключен (DEBUG): шаблоны ссылаются на исходники')
+        self.stdout.write(self.style.SUCCESS(f'Собрано в {settings.ASSETS_ROOT}'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.ratings import find_inconsistencies, fix_user
+
+
+class Command(BaseCommand):
+    help = 'Сверяет сохранённые рейтинги пользователей с отзывами.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--fix', action='store_true', help='Исправить найденные расхождения')
+
+    def handle(self, *args, **options):
+        problems = find_inconsistencies(chunk_size=options['chunk_size'])
+        for user_id, (total, count, rating), (actual_total, actual_count) in problems:
+            self.stdout.write(
+                f'Пользователь {user_id}: сохранено {total}/{count} (рейтинг {rating}), '
+                f'по отзывам {actual_total}/{actual_count}'
+            )
+            if options['fix']:
+                fix_user(user_id, actual_total, actual_count)
+
+        if not problems:
+            self.stdout.write(self.style.SUCCESS('Расхождений нет.'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'Исправлено расхождений: {len(problems)}'))
+        else:
+            raise CommandError(f'Найдено расхождений: {len(problems)}')
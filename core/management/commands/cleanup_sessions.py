@@ -0,0 +1,27 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import session_cleanup
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет истёкшие сессии из таблицы django_session пачками, не блокируя базу '
+        'надолго. Запускать по расписанию (cron) вместо clearsessions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0.05, help='Пауза между пачками, с')
+
+    def handle(self, *args, **options):
+        if settings.SESSION_ENGINE.endswith('signed_cookies'):
+            self.stdout.write('Сессии хранятся в подписанных cookie — таблица не используется')
+            return
+        started = time.perf_counter()
+        deleted = session_cleanup.delete_expired(options['batch_size'], options['pause'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено истёкших сессий: {deleted} за {time.perf_counter() - started:.1f} с'
+        ))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.cycles import find_cycles
+
+
+class Command(BaseCommand):
+    help = (
+        'Ищет цепочки обмена A → B → C → A среди открытых предложений и создаёт по ним обмены. '
+        'По умолчанию просматривает только предложения, изменённые с прошлого запуска.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-length', type=int, default=3)
+        parser.add_argument('--max-length', type=int, default=4)
+        parser.add_argument('--time-budget', type=float, default=60.0, help='Секунд на запуск')
+        parser.add_argument('--full', action='store_true', help='Просмотреть все предложения заново')
+        parser.add_argument('--dry-run', action='store_true', help='Только показать цепочки, без создания обменов')
+
+    def handle(self, *args, **options):
+        if not 2 <= options['min_length'] <= options['max_length']:
+            raise CommandError('Нужно 2 <= --min-length <= --max-length')
+        run = find_cycles(
+            min_length=options['min_length'],
+            max_length=options['max_length'],
+            time_budget=options['time_budget'],
+            full=options['full'],
+            dry_run=options['dry_run'],
+            stdout=self.stdout if options['verbosity'] > 1 or options['dry_run'] else None,
+        )
+        status = 'полностью' if run.complete else 'частично (бюджет времени исчерпан)'
+        self.stdout.write(self.style.SUCCESS(
+            f'Просмотрено предложений: {run.explored}, найдено цепочек: {run.cycles_found}, обработано {status}'
+        ))
@@ -0,0 +1,174 @@
+import re
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+
+from django.apps import apps
+from django.contrib import admin
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.urls import resolve, reverse
+from django.utils.http import urlencode
+
+from core.management.rollback import rolled_back
+from core.models import User
+from core.pagination import estimate_rows
+from core.site_urls import sample_requests
+
+# SQLite: «SCAN t» — проход всей таблицы, «SCAN t USING INDEX» — всего
+# индекса; PostgreSQL: «Seq Scan on t»
+SQLITE_SCAN = re.compile(r'\bSCAN (\w+)(?! USING (?:COVERING )?INDEX)(?:\s|$)')
+SQLITE_INDEX_SCAN = re.compile(r'\bSCAN (\w+) USING (?:COVERING )?INDEX')
+POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+class Capture:
+    def __init__(self, alias):
+        self.alias = alias
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many:
+            self.statements.append((self.alias, sql, params))
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        'Советник по индексам: открывает страницы сайта (и при --admin списки админки), '
+        'перехватывает их SELECT и прогоняет через EXPLAIN QUERY PLAN (EXPLAIN в PostgreSQL). '
+        'Печатает по вьюхам полные проходы таблиц и сортировки во временном B-дереве. '
+        'Всё, что страницы запишут, откатывается.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Email пользователя, от чьего имени открывать страницы (по умолчанию — суперпользователь или первый пользователь)')
+        parser.add_argument('--url', action='append', default=[], help='Дополнительный адрес, можно несколько раз')
+        parser.add_argument('--admin', action='store_true', help='Добавить списки моделей админки')
+        parser.add_argument('--min-rows', type=int, default=1000, help='Не показывать проходы таблиц меньше этого числа строк')
+        parser.add_argument('--all-scans', action='store_true', help='Показывать и проходы по индексу и проходы, которые обрывает LIMIT')
+
+    def handle(self, *args, **options):
+        user = self.pick_user(options['user'])
+        self.min_rows = options['min_rows']
+        self.all_scans = options['all_scans']
+        self.table_rows = {}
+        self.models = {model._meta.db_table: model for model in apps.get_models()}
+        urls = self.urls(user, options['admin']) + options['url']
+        findings = {}
+        with rolled_back(users=[user]):
+            client = Client()
+            client.force_login(user)
+            for url in urls:
+                findings[url] = self.inspect(client, url)
+        self.report(findings)
+
+    def pick_user(self, email):
+        if email:
+            user = User.objects.filter(email=email).first()
+        else:
+            user = User.objects.order_by('-is_superuser', 'pk').first()
+        if user is None:
+            raise CommandError('Нет пользователей: укажите --user или заполните базу (python manage.py seed)')
+        return user
+
+    def urls(self, user, with_admin):
+        """GET-страницы core (см. core/site_urls.py) и при with_admin списки админки."""
+        urls = [
+            request.url + (f'?{urlencode(request.data)}' if request.data else '')
+            for request in sample_requests(user) if request.method == 'get'
+        ]
+        if with_admin:
+            urls += [
+                reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+                for model in admin.site._registry
+            ]
+        return urls
+
+    def inspect(self, client, url):
+        captures = [Capture(alias) for alias in connections]
+        with ExitStack() as stack:
+            for capture in captures:
+                stack.enter_context(connections[capture.alias].execute_wrapper(capture))
+            response = client.get(url)
+            if hasattr(response, 'streaming_content'):
+                for _ in response.streaming_content:
+                    pass
+
+        seen = set()
+        problems = []
+        total = 0
+        for capture in captures:
+            for alias, sql, params in capture.statements:
+                if not sql.lstrip().upper().startswith('SELECT') or sql in seen:
+                    continue
+                seen.add(sql)
+                total += 1
+                for kind, table, detail in self.explain(alias, sql, params):
+                    problems.append((kind, table, detail, sql))
+        return {
+            'view': resolve(url.split('?')[0]).view_name,
+            'status': response.status_code,
+            'queries': total,
+            'problems': problems,
+        }
+
+    def rows(self, alias, table):
+        """Оценка размера таблицы; None — не таблица (подзапрос, CTE)."""
+        key = (alias, table)
+        if key not in self.table_rows:
+            model = self.models.get(table)
+            self.table_rows[key] = estimate_rows(model, alias) if model else None
+        return self.table_rows[key]
+
+    def explain(self, alias, sql, params):
+        connection = connections[alias]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                lines = [row[-1] for row in cursor.fetchall()]
+            else:
+                cursor.execute('EXPLAIN ' + sql, params)
+                lines = [row[0] for row in cursor.fetchall()]
+        sorts = any(TEMP_SORT in line or 'Sort' in line for line in lines)
+        # без сортировки проход в порядке ключа до LIMIT читает одну страницу
+        limited = ' LIMIT ' in sql and not sorts
+        for line in lines:
+            scans = [('полный проход', table) for table in SQLITE_SCAN.findall(line) + POSTGRES_SCAN.findall(line)]
+            if self.all_scans:
+                scans += [('проход индекса', table) for table in SQLITE_INDEX_SCAN.findall(line)]
+            for kind, table in scans:
+                rows = self.rows(alias, table)
+                if rows is None or (rows < self.min_rows and not self.all_scans):
+                    continue
+                if limited:
+                    if not self.all_scans:
+                        continue
+                    kind += ' до LIMIT'
+                yield kind, table, f'{line.strip()} (~{rows} строк)'
+            if TEMP_SORT in line:
+                yield 'сортировка', '', line.strip()
+
+    def report(self, findings):
+        by_table = Counter()
+        for url, result in findings.items():
+            problems = result['problems']
+            style = self.style.WARNING if problems else self.style.SUCCESS
+            self.stdout.write(style(
+                f'{result["view"]} {url} — HTTP {result["status"]}, SELECT: {result["queries"]}, замечаний: {len(problems)}'
+            ))
+            grouped = defaultdict(list)
+            for kind, table, detail, sql in problems:
+                grouped[sql].append(f'{kind}: {detail}')
+                if table:
+                    by_table[table] += 1
+            for sql, details in grouped.items():
+                self.stdout.write(f'    {sql[:160]}')
+                for detail in details:
+                    self.stdout.write(f'      {detail}')
+
+        if by_table:
+            self.stdout.write('\nПолные проходы по таблицам:')
+            for table, count in by_table.most_common():
+                self.stdout.write(f'  {table}: {count}')
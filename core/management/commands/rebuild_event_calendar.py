@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import event_calendar, events
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает дневные счётчики календаря и число подтверждённых участников мероприятий.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        days = event_calendar.rebuild_day_counts(chunk_size=options['chunk_size'])
+        counted = events.recompute_confirmed_counts()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Счётчиков по дням: {days}, мероприятий пересчитано: {counted} за {elapsed:.1f} с'
+        ))
@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.matching import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Полностью пересобирает индекс совпадений предложений и запросов (match_index).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        total = rebuild_index(batch_size=options['batch_size'], stdout=self.stdout if options['verbosity'] > 1 else None)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Проиндексировано записей: {total} за {elapsed:.1f} с'))
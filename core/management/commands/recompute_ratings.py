@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.ratings import recompute_all
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинги пользователей по отзывам, читая отзывы потоково пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        updated = recompute_all(chunk_size=options['chunk_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Пересчитано пользователей с отзывами: {updated} за {elapsed:.1f} с'))
@@ -0,0 +1,15 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.unread import recompute_all
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики непрочитанных сообщений пользователей.'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        updated = recompute_all()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Пересчитано пользователей: {updated} за {elapsed:.1f} с'))
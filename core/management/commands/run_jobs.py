@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        'Воркер фоновых задач админки: берёт задачи из очереди и выполняет их кусками. '
+        'Можно запускать несколько воркеров; упавшая задача повторяется с первого незавершённого куска.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Выйти, когда очередь опустеет')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Пауза при пустой очереди, с')
+        parser.add_argument('--chunk-size', type=int, default=jobs.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            jobs.work(once=options['once'], idle_sleep=options['sleep'],
+                      chunk_size=options['chunk_size'], stdout=self.stdout)
+        except KeyboardInterrupt:
+            # прерванный кусок откатился, задачу подберёт следующий запуск
+            self.stdout.write('Остановлено')
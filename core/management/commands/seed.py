@@ -0,0 +1,301 @@
+import itertools
+import random
+import time
+from contextlib import contextmanager
+from datetime import time as dt_time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core import autocomplete, event_calendar, events, ledger, matching, ratings, search, unread
+from core.models import (
+    Category, Event, EventParticipation, Exchange, Message, Proposal, Request, Review, Skill, User, UserSkill,
+)
+from core.page_cache import bump_version
+
+FIRST_NAMES = [
+    'Александр', 'Мария', 'Дмитрий', 'Анна', 'Иван', 'Екатерина', 'Сергей', 'Ольга', 'Андрей', 'Наталья',
+    'Алексей', 'Елена', 'Михаил', 'Татьяна', 'Никита', 'Юлия', 'Павел', 'Ирина', 'Артём', 'Светлана',
+]
+LAST_NAMES = [
+    'Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов', 'Михайлов', 'Новиков',
+    'Фёдоров', 'Морозов', 'Волков', 'Алексеев', 'Лебедев', 'Семёнов', 'Егоров', 'Павлов', 'Козлов',
+]
+CITIES = ['Москва', 'Санкт-Петербург', 'Новосибирск', 'Екатеринбург', 'Казань', 'Нижний Новгород', 'Самара', 'Омск']
+CATEGORIES = [
+    'IT', 'Музыка', 'Кулинария', 'Языки', 'Спорт', 'Рисование', 'Фотография', 'Танцы', 'Наука', 'Рукоделие',
+    'Бизнес', 'Дизайн', 'Шахматы', 'Йога', 'История',
+]
+SUBJECTS = [
+    'Python', 'Django', 'JavaScript', 'SQL', 'гитара', 'фортепиано', 'вокал', 'английский', 'немецкий',
+    'испанский', 'выпечка', 'итальянская кухня', 'бег', 'плавание', 'акварель', 'скетчинг', 'портретная съёмка',
+    'сальса', 'математика', 'физика', 'вязание', 'маркетинг', 'Figma', 'шахматы', 'хатха-йога', 'история искусств',
+]
+QUALIFIERS = ['для начинающих', 'с нуля', 'продвинутый курс', 'практика', 'разговорный', 'основы', 'для детей', 'интенсив']
+PHRASES = [
+    'Могу помочь разобраться', 'Занимаюсь несколько лет', 'Готов делиться опытом', 'Ищу партнёра для практики',
+    'Удобно по вечерам', 'Можно онлайн', 'Покажу на примерах', 'Спокойно объясняю',
+]
+MESSAGES = [
+    'Привет! Когда удобно созвониться?', 'Давай в субботу в 11?', 'Отлично, договорились.',
+    'Скинул материалы, посмотри.', 'Спасибо, было полезно!', 'Можно перенести на завтра?',
+    'Я немного опоздаю.', 'Какие темы разберём в следующий раз?',
+]
+EXCHANGE_STATUSES = ['активен', 'завершён', 'отклонён']
+EXCHANGE_WEIGHTS = [3, 6, 1]
+
+# за сколько дней «назад» распределены даты создания
+HISTORY_DAYS = 365
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """
+    bulk_create с auto_now_add проставляет всем строкам текущее время;
+    на время генерации даты задаются явно.
+    """
+    fields = [field for model in models for field in model._meta.concrete_fields if getattr(field, 'auto_now_add', False)]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует синтетические данные в масштабе продакшена: пользователей, навыки, '
+        'предложения, запросы, обмены, отзывы, сообщения и мероприятия. Строки пишутся '
+        'пачками bulk_create; затем пересчитываются рейтинги, счётчики и поисковые индексы. '
+        'Все пользователи получают пароль --password.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0, help='Множитель всех объёмов ниже')
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--categories', type=int, default=len(CATEGORIES))
+        parser.add_argument('--skills', type=int, default=2_000)
+        parser.add_argument('--proposals', type=int, default=30_000)
+        parser.add_argument('--requests', type=int, default=10_000)
+        parser.add_argument('--exchanges', type=int, default=50_000)
+        parser.add_argument('--messages', type=int, default=1_000_000)
+        parser.add_argument('--events', type=int, default=2_000)
+        parser.add_argument('--participations', type=int, default=30_000)
+        parser.add_argument('--reward', type=int, default=10, help='Очков за завершённый обмен, 0 — не начислять')
+        parser.add_argument('--password', default='skillswap')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.marker = f'seed{int(time.time())}'
+        scale = options['scale']
+        counts = {
+            name: max(int(options[name] * scale), 1)
+            for name in ('users', 'skills', 'proposals', 'requests', 'exchanges', 'messages', 'events', 'participations')
+        }
+        counts['categories'] = options['categories']
+
+        started = time.perf_counter()
+        with explicit_timestamps(User, Proposal, Request, Exchange, Review, Message, Event, EventParticipation):
+            categories = self.step('Категории', lambda: self.categories(counts['categories']))
+            skills = self.step('Навыки', lambda: self.skills(counts['skills'], categories))
+            users = self.step('Пользователи', lambda: self.users(counts['users'], options['password']))
+            self.step('Навыки пользователей', lambda: self.user_skills(users, skills))
+            proposals = self.step('Предложения', lambda: self.proposals(counts['proposals'], users, skills))
+            self.step('Запросы', lambda: self.requests(counts['requests'], users, skills))
+            exchanges = self.step('Обмены', lambda: self.exchanges(counts['exchanges'], users, proposals))
+            self.step('Отзывы', lambda: self.reviews(exchanges))
+            self.step('Сообщения', lambda: self.messages(counts['messages'], exchanges))
+            event_ids = self.step('Мероприятия', lambda: self.events(counts['events'], users, categories))
+            self.step('Участия', lambda: self.participations(counts['participations'], users, event_ids))
+        if options['reward']:
+            self.step('Очки за обмены', lambda: ledger.reward_completed_exchanges(options['reward']))
+        self.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.perf_counter() - started:.0f} с. Вход: любой seed-пользователь '
+            f'(например {self.email(0)}), пароль {options["password"]}'
+        ))
+
+    def step(self, title, action):
+        started = time.perf_counter()
+        result = action()
+        size = len(result) if isinstance(result, (list, dict)) else result
+        self.stdout.write(f'{title}: {size} за {time.perf_counter() - started:.1f} с')
+        return result
+
+    # Генерация
+
+    def skewed(self, items):
+        """Элемент со смещением к началу: у активных пользователей и популярных навыков больше записей."""
+        return items[int(len(items) * self.rng.random() ** 2)]
+
+    def past(self, days=HISTORY_DAYS):
+        return self.now - timedelta(seconds=self.rng.randrange(days * 86400))
+
+    def text(self, parts=2):
+        return '. '.join(self.rng.sample(PHRASES, parts)) + '.'
+
+    def email(self, i):
+        return f'{self.marker}-{i}@seed.local'
+
+    def insert(self, model, rows, pk=True):
+        """Вставляет строки пачками; возвращает id (если pk) или число строк."""
+        ids = []
+        total = 0
+        rows = iter(rows)
+        while batch := list(itertools.islice(rows, self.batch_size)):
+            created = model.objects.bulk_create(batch, ignore_conflicts=not pk)
+            total += len(created)
+            if pk:
+                ids.extend(obj.pk for obj in created)
+        return ids if pk else total
+
+    def categories(self, count):
+        existing = dict(Category.objects.values_list('name', 'pk'))
+        names = [CATEGORIES[i] if i < len(CATEGORIES) else f'{CATEGORIES[i % len(CATEGORIES)]} {i // len(CATEGORIES) + 1}' for i in range(count)]
+        self.insert(Category, (Category(name=name) for name in names if name not in existing))
+        return list(Category.objects.filter(name__in=names).values_list('pk', flat=True))
+
+    def skills(self, count, categories):
+        levels = [level for level, _ in Skill.LEVEL_CHOICES]
+        return self.insert(Skill, (
+            Skill(
+                name=f'{self.rng.choice(SUBJECTS).capitalize()} {self.rng.choice(QUALIFIERS)}',
+                description=self.text(), level=self.rng.choice(levels), category_id=self.rng.choice(categories),
+            )
+            for _ in range(count)
+        ))
+
+    def users(self, count, password):
+        # хеш один на всех: PBKDF2 на каждого заняло бы часы
+        password = make_password(password)
+        return self.insert(User, (
+            User(
+                email=self.email(i), full_name=f'{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}',
+                city=self.rng.choice(CITIES), password=password, registration_date=self.past(),
+            )
+            for i in range(count)
+        ))
+
+    def user_skills(self, users, skills):
+        return self.insert(UserSkill, (
+            UserSkill(user_id=user_id, skill_id=self.skewed(skills))
+            for user_id in users
+            for _ in range(self.rng.randint(1, 4))
+        ), pk=False)
+
+    def proposals(self, count, users, skills):
+        formats = [value for value, _ in Proposal.FORMAT_CHOICES]
+        rows = []
+        for _ in range(count):
+            created = self.past()
+            rows.append(Proposal(
+                user_id=self.skewed(users), skill_offered_id=self.skewed(skills), skill_wanted_id=self.skewed(skills),
+                description=self.text(), format=self.rng.choice(formats), created_at=created,
+            ))
+        # id растут вместе с датой, как в живой базе
+        rows.sort(key=lambda proposal: proposal.created_at)
+        return dict(zip(self.insert(Proposal, rows), ((p.user_id, p.format) for p in rows)))
+
+    def requests(self, count, users, skills):
+        return self.insert(Request, (
+            Request(
+                user_id=self.skewed(users), skill_wanted_id=self.skewed(skills), skill_offered_id=self.skewed(skills),
+                description=self.text(1), created_at=self.past(),
+            )
+            for _ in range(count)
+        ), pk=False)
+
+    def exchanges(self, count, users, proposals):
+        proposal_items = list(proposals.items())
+        rows = []
+        for _ in range(count):
+            proposal_id, (author_id, format) = self.rng.choice(proposal_items)
+            partner_id = self.skewed(users)
+            if partner_id == author_id:
+                continue
+            created = self.past()
+            status = self.rng.choices(EXCHANGE_STATUSES, EXCHANGE_WEIGHTS)[0]
+            rows.append(Exchange(
+                user1_id=author_id, user2_id=partner_id, proposal_id=proposal_id, status=status, format=format,
+                created_at=created, start_date=created + timedelta(days=self.rng.randint(1, 14)),
+                end_date=created + timedelta(days=self.rng.randint(15, 60)) if status != 'активен' else None,
+            ))
+        rows.sort(key=lambda exchange: exchange.created_at)
+        ids = self.insert(Exchange, rows)
+        return [(pk, row.user1_id, row.user2_id, row.status, row.created_at) for pk, row in zip(ids, rows)]
+
+    def reviews(self, exchanges):
+        def rows():
+            for pk, user1_id, user2_id, status, created in exchanges:
+                if status != 'завершён':
+                    continue
+                for reviewer, reviewed in ((user1_id, user2_id), (user2_id, user1_id)):
+                    if self.rng.random() < 0.7:
+                        yield Review(
+                            reviewer_id=reviewer, reviewed_user_id=reviewed, exchange_id=pk,
+                            rating=self.rng.choices([5, 4, 3, 2, 1], [50, 30, 10, 6, 4])[0],
+                            text=self.text(1), created_at=min(created + timedelta(days=30), self.now),
+                        )
+        return self.insert(Review, rows(), pk=False)
+
+    def messages(self, count, exchanges):
+        def rows():
+            for _ in range(count):
+                pk, user1_id, user2_id, status, created = self.skewed(exchanges)
+                sender, receiver = (user1_id, user2_id) if self.rng.random() < 0.5 else (user2_id, user1_id)
+                sent_at = created + (self.now - created) * self.rng.random()
+                yield Message(
+                    exchange_id=pk, sender_id=sender, receiver_id=receiver, text=self.rng.choice(MESSAGES),
+                    sent_at=sent_at, is_read=status != 'активен' or self.rng.random() < 0.9,
+                )
+        return self.insert(Message, rows(), pk=False)
+
+    def events(self, count, users, categories):
+        today = timezone.localdate()
+        return self.insert(Event, (
+            Event(
+                title=f'Встреча: {self.rng.choice(SUBJECTS)}', description=self.text(),
+                organizer_id=self.skewed(users), category_id=self.rng.choice(categories + [None]),
+                event_date=today + timedelta(days=self.rng.randint(-HISTORY_DAYS // 2, HISTORY_DAYS // 2)),
+                event_time=dt_time(self.rng.randint(9, 20), self.rng.choice([0, 30])) if self.rng.random() < 0.8 else None,
+                location=self.rng.choice(CITIES), max_participants=self.rng.choice([5, 10, 20, 50]),
+                created_at=self.past(),
+            )
+            for _ in range(count)
+        ))
+
+    def participations(self, count, users, event_ids):
+        capacity = dict(Event.objects.filter(pk__in=event_ids).values_list('pk', 'max_participants'))
+        per_event = [0] * len(event_ids)
+        for _ in range(count):
+            per_event[int(len(event_ids) * self.rng.random() ** 2)] += 1
+
+        def rows():
+            for event_id, size in zip(event_ids, per_event):
+                participants = self.rng.sample(users, min(size, len(users)))
+                registered = sorted(self.past(60) for _ in participants)
+                for place, (user_id, registered_at) in enumerate(zip(participants, registered)):
+                    # первые max_participants подтверждены, остальные ждут — как после events.register
+                    status = events.CONFIRMED if place < capacity[event_id] else events.WAITING
+                    yield EventParticipation(user_id=user_id, event_id=event_id, status=status, registered_at=registered_at)
+        return self.insert(EventParticipation, rows(), pk=False)
+
+    # Производные данные: bulk_create не вызывает сигналов
+
+    def rebuild(self):
+        self.step('Рейтинги', ratings.recompute_all)
+        self.step('Непрочитанные', unread.recompute_all)
+        self.step('Места на мероприятиях', events.recompute_confirmed_counts)
+        self.step('Календарь мероприятий', event_calendar.rebuild_day_counts)
+        self.step('Поисковый индекс', search.rebuild_index)
+        self.step('Индекс подбора', matching.rebuild_index)
+        # процессы пересоберут индекс автодополнения при следующем обращении
+        autocomplete.invalidate()
+        bump_version()
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Переводит базу SQLite в режим WAL: читатели не ждут писателя, писатель — '
+        'читателей. Режим запоминается в самом файле базы, достаточно одного раза '
+        'после создания базы. --off возвращает обычный журнал (DELETE), например '
+        'перед тем как копировать файл базы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--off', action='store_true', help='Вернуть journal_mode=DELETE')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError(f'База {options["database"]} — не SQLite ({connection.vendor})')
+        mode = 'DELETE' if options['off'] else 'WAL'
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA journal_mode = {mode}')
+            current = cursor.fetchone()[0]
+        if current.upper() != mode:
+            # например, база в памяти или занята другим процессом
+            raise CommandError(f'journal_mode остался {current}')
+        self.stdout.write(self.style.SUCCESS(f'journal_mode = {current} для {connection.settings_dict["NAME"]}'))
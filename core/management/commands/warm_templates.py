@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import template_warmup
+
+
+class Command(BaseCommand):
+    help = (
+        'Разбирает все шаблоны core/templates (как воркер при старте, TEMPLATE_WARMUP) '
+        'и печатает время разбора каждого. Ошибка синтаксиса в своём шаблоне — ненулевой код выхода.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--apps', action='store_true', help='И шаблоны приложений (админка, jazzmin)')
+        parser.add_argument('--top', type=int, default=15, help='Сколько самых медленных шаблонов показать')
+
+    def handle(self, *args, **options):
+        result = template_warmup.warm(include_apps=options['apps'])
+        total = sum(seconds for _, _, seconds, _ in result)
+        for name, _, seconds, _ in sorted(result, key=lambda row: -row[2])[:options['top']]:
+            self.stdout.write(f'{seconds * 1000:8.2f} мс  {name}')
+        errors = [(name, error) for name, own, _, error in result if error and own]
+        skipped = [name for name, own, _, error in result if error and not own]
+        for name, error in errors:
+            self.stdout.write(self.style.ERROR(f'{name}: {error}'))
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f'Не разобраны шаблоны приложений ({len(skipped)}) — им нужны неустановленные пакеты: {", ".join(skipped)}'
+            ))
+        self.stdout.write(f'Шаблонов: {len(result)}, разбор: {total * 1000:.1f} мс')
+        if errors:
+            raise CommandError(f'Шаблонов с ошибками: {len(errors)}')
@@ -0,0 +1,32 @@
+from contextlib import contextmanager
+
+from django.db import transaction
+
+from core import auth_cache, page_cache, unread
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back(users=()):
+    """
+    Выполняет блок в транзакции и откатывает её: бенчмарки и советники
+    пишут в базу что угодно, и ничего не остаётся. Сбросы кешей, отложенные
+    через on_commit, при откате не срабатывают, поэтому после блока
+    сбрасываются кеш страниц (они могли закешироваться с
+    незафиксированными данными) и кеши пользователей users — тех, от чьего
+    имени шли запросы и чьи строки меняли.
+    """
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
+    finally:
+        user_ids = [getattr(user, 'pk', user) for user in users]
+        auth_cache.forget(user_ids)
+        unread.forget(user_ids)
+        page_cache.bump_version()
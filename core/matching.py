@@ -0,0 +1,181 @@
+from dataclasses import dataclass
+
+from django.db import models, transaction
+
+from .models import MatchEntry, Proposal, Request
+
+LEVEL_RANKS = {
+    'новичок': 1,
+    'средний': 2,
+    'эксперт': 3,
+}
+
+EXACT_SCORE = 1.0
+CATEGORY_SCORE = 0.5
+LEVEL_BONUS = 0.25
+
+
+@dataclass
+class Match:
+    entry: MatchEntry
+    score: float
+    exact: bool
+
+    @property
+    def source(self):
+        return self.entry.source
+
+    @property
+    def kind(self):
+        return self.entry.kind
+
+
+def level_rank(skill):
+    return LEVEL_RANKS.get(skill.level, 1)
+
+
+def _kind_and_field(source):
+    if isinstance(source, Proposal):
+        return 'предложение', 'proposal'
+    if isinstance(source, Request):
+        return 'запрос', 'request'
+    raise TypeError(f'Нельзя проиндексировать {type(source).__name__}')
+
+
+def build_entry(source):
+    kind, field = _kind_and_field(source)
+    return MatchEntry(
+        kind=kind,
+        user_id=source.user_id,
+        skill_offered_id=source.skill_offered_id,
+        skill_wanted_id=source.skill_wanted_id,
+        offered_category_id=source.skill_offered.category_id,
+        wanted_category_id=source.skill_wanted.category_id,
+        offered_level=level_rank(source.skill_offered),
+        wanted_level=level_rank(source.skill_wanted),
+        created_at=source.created_at,
+        **{field: source},
+    )
+
+
+def index_source(source):
+    """Добавляет или обновляет запись индекса для Proposal/Request."""
+    entry = build_entry(source)
+    _, field = _kind_and_field(source)
+    defaults = {
+        name: getattr(entry, name)
+        for name in (
+            'kind', 'user_id', 'skill_offered_id', 'skill_wanted_id',
+            'offered_category_id', 'wanted_category_id',
+            'offered_level', 'wanted_level', 'created_at',
+        )
+    }
+    MatchEntry.objects.update_or_create(defaults=defaults, **{field: source})
+
+
+def reindex_skill(skill):
+    """Переносит новые категорию/уровень навыка во все записи индекса с ним."""
+    MatchEntry.objects.filter(skill_offered=skill).update(
+        offered_category_id=skill.category_id,
+        offered_level=level_rank(skill),
+    )
+    MatchEntry.objects.filter(skill_wanted=skill).update(
+        wanted_category_id=skill.category_id,
+        wanted_level=level_rank(skill),
+    )
+
+
+def rebuild_index(batch_size=5000, stdout=None):
+    """Полная пересборка индекса потоково, пачками через bulk_create."""
+    total = 0
+    with transaction.atomic():
+        MatchEntry.objects.all().delete()
+        for model in (Proposal, Request):
+            kind, field = _kind_and_field(model())
+            rows = model.objects.order_by('pk').values_list(
+                'pk', 'user_id', 'skill_offered_id', 'skill_wanted_id',
+                'skill_offered__category_id', 'skill_wanted__category_id',
+                'skill_offered__level', 'skill_wanted__level', 'created_at',
+            )
+            batch = []
+            for row in rows.iterator(chunk_size=batch_size):
+                pk, user_id, offered, wanted, offered_cat, wanted_cat, offered_lvl, wanted_lvl, created = row
+                batch.append(MatchEntry(
+                    kind=kind,
+                    user_id=user_id,
+                    skill_offered_id=offered,
+                    skill_wanted_id=wanted,
+                    offered_category_id=offered_cat,
+                    wanted_category_id=wanted_cat,
+                    offered_level=LEVEL_RANKS.get(offered_lvl, 1),
+                    wanted_level=LEVEL_RANKS.get(wanted_lvl, 1),
+                    created_at=created,
+                    **{f'{field}_id': pk},
+                ))
+                if len(batch) >= batch_size:
+                    MatchEntry.objects.bulk_create(batch)
+                    total += len(batch)
+                    batch = []
+                    if stdout:
+                        stdout.write(f'{model._meta.verbose_name_plural}: {total}')
+            MatchEntry.objects.bulk_create(batch)
+            total += len(batch)
+    return total
+
+
+def _source_entry(source):
+    try:
+        return source.match_entry
+    except MatchEntry.DoesNotExist:
+        # индекс ещё не построен — считаем ключи на лету
+        return build_entry(source)
+
+
+def _with_sources(queryset):
+    return queryset.select_related(
+        'proposal__user', 'proposal__skill_offered', 'proposal__skill_wanted',
+        'request__user', 'request__skill_offered', 'request__skill_wanted',
+    )
+
+
+def find_matches(source, limit=20, fuzzy=True):
+    """
+    Встречные предложения и запросы для source: точные по паре навыков,
+    затем (если fuzzy) совпадения по паре категорий с учётом уровня.
+    Оба поиска — диапазоны по индексам match_index, без полного джойна.
+    """
+    entry = _source_entry(source)
+    candidates = MatchEntry.objects.exclude(user_id=entry.user_id)
+    if entry.pk:
+        candidates = candidates.exclude(pk=entry.pk)
+
+    exact_ids = list(candidates.filter(
+        skill_offered_id=entry.skill_wanted_id,
+        skill_wanted_id=entry.skill_offered_id,
+    ).order_by('-created_at').values_list('pk', flat=True)[:limit])
+    scored = [(pk, EXACT_SCORE, True) for pk in exact_ids]
+
+    if fuzzy and len(scored) < limit:
+        # партнёр должен владеть навыком не хуже запрошенного уровня
+        similar = candidates.filter(
+            offered_category_id=entry.wanted_category_id,
+            wanted_category_id=entry.offered_category_id,
+            offered_level__gte=entry.wanted_level,
+        ).exclude(
+            skill_offered_id=entry.skill_wanted_id,
+            skill_wanted_id=entry.skill_offered_id,
+        ).annotate(
+            fits_partner=models.Case(
+                models.When(wanted_level__lte=entry.offered_level, then=models.Value(1)),
+                default=models.Value(0),
+                output_field=models.IntegerField(),
+            )
+        ).order_by('-fits_partner', '-created_at').values_list('pk', 'fits_partner')
+        scored.extend(
+            (pk, CATEGORY_SCORE + LEVEL_BONUS * fits, False)
+            for pk, fits in similar[:limit - len(scored)]
+        )
+
+    # сначала выбираем только ключи по индексу, джойны — для готовой страницы
+    entries = _with_sources(MatchEntry.objects.all()).in_bulk([pk for pk, _, _ in scored])
+    return [Match(entry=entries[pk], score=score, exact=exact) for pk, score, exact in scored if pk in entries]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='proposal',
+            index=models.Index(fields=['-created_at', '-id'], name='proposals_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proposal',
+            index=models.Index(fields=['format', '-created_at', '-id'], name='proposals_format_created_idx'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+LEVEL_RANKS = {'новичок': 1, 'средний': 2, 'эксперт': 3}
+
+
+def fill_match_index(apps, schema_editor):
+    MatchEntry = apps.get_model('core', 'MatchEntry')
+    sources = [
+        ('предложение', 'proposal', apps.get_model('core', 'Proposal')),
+        ('запрос', 'request', apps.get_model('core', 'Request')),
+    ]
+    for kind, field, model in sources:
+        entries = []
+        queryset = model.objects.select_related('skill_offered', 'skill_wanted')
+        for obj in queryset.iterator(chunk_size=2000):
+            entries.append(MatchEntry(
+                kind=kind,
+                user_id=obj.user_id,
+                skill_offered_id=obj.skill_offered_id,
+                skill_wanted_id=obj.skill_wanted_id,
+                offered_category_id=obj.skill_offered.category_id,
+                wanted_category_id=obj.skill_wanted.category_id,
+                offered_level=LEVEL_RANKS.get(obj.skill_offered.level, 1),
+                wanted_level=LEVEL_RANKS.get(obj.skill_wanted.level, 1),
+                created_at=obj.created_at,
+                **{field: obj},
+            ))
+            if len(entries) >= 2000:
+                MatchEntry.objects.bulk_create(entries)
+                entries = []
+        MatchEntry.objects.bulk_create(entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_proposal_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('предложение', 'Предложение'), ('запрос', 'Запрос')], max_length=20)),
+                ('offered_level', models.PositiveSmallIntegerField()),
+                ('wanted_level', models.PositiveSmallIntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('offered_category', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.category')),
+                ('proposal', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='match_entry', to='core.proposal')),
+                ('request', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='match_entry', to='core.request')),
+                ('skill_offered', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.skill')),
+                ('skill_wanted', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.skill')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_entries', to=settings.AUTH_USER_MODEL)),
+                ('wanted_category', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.category')),
+            ],
+            options={
+                'verbose_name': 'Запись индекса совпадений',
+                'verbose_name_plural': 'Индекс совпадений',
+                'db_table': 'match_index',
+                'indexes': [models.Index(fields=['skill_offered', 'skill_wanted'], name='match_pair_idx'), models.Index(fields=['offered_category', 'wanted_category', 'offered_level'], name='match_category_pair_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(models.Q(('proposal__isnull', False), ('request__isnull', True)), models.Q(('proposal__isnull', True), ('request__isnull', False)), _connector='OR'), name='check_match_entry_single_source')],
+            },
+        ),
+        migrations.RunPython(fill_match_index, migrations.RunPython.noop),
+    ]
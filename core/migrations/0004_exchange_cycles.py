@@ -0,0 +1,59 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_match_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CycleSearchRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('watermark_at', models.DateTimeField(blank=True, null=True)),
+                ('watermark_id', models.BigIntegerField(blank=True, null=True)),
+                ('explored', models.PositiveIntegerField(default=0)),
+                ('cycles_found', models.PositiveIntegerField(default=0)),
+                ('complete', models.BooleanField(default=False)),
+            ],
+            options={
+                'verbose_name': 'Запуск поиска цепочек',
+                'verbose_name_plural': 'Запуски поиска цепочек',
+                'db_table': 'cycle_search_runs',
+            },
+        ),
+        migrations.CreateModel(
+            name='ExchangeCycle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('length', models.PositiveSmallIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Цепочка обмена',
+                'verbose_name_plural': 'Цепочки обмена',
+                'db_table': 'exchange_cycles',
+            },
+        ),
+        migrations.AddField(
+            model_name='proposal',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='proposal',
+            index=models.Index(fields=['updated_at', 'id'], name='proposals_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='exchange',
+            name='cycle',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='exchanges', to='core.exchangecycle'),
+        ),
+    ]
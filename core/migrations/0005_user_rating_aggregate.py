@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:20
+
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import migrations, models
+
+
+def fill_rating_aggregate(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+    Review = apps.get_model('core', 'Review')
+    totals = (
+        Review.objects.values('reviewed_user_id')
+        .annotate(total=models.Sum('rating'), count=models.Count('id'))
+        .order_by()
+    )
+    for row in totals.iterator(chunk_size=2000):
+        rating = (Decimal(row['total']) / row['count']).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        User.objects.filter(pk=row['reviewed_user_id']).update(
+            rating_sum=row['total'], rating_count=row['count'], rating=rating
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_exchange_cycles'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_rating_aggregate, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_user_rating_aggregate'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='point',
+            constraint=models.CheckConstraint(condition=models.Q(('balance__gte', 0)), name='check_point_balance_non_negative'),
+        ),
+        migrations.AddConstraint(
+            model_name='pointtransaction',
+            constraint=models.UniqueConstraint(condition=models.Q(('exchange__isnull', False), ('reason', 'за обучение')), fields=('user', 'exchange', 'reason'), name='unique_exchange_reward'),
+        ),
+    ]
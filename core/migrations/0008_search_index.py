@@ -0,0 +1,173 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:28
+
+import re
+
+from django.db import migrations, models
+
+# Копия нормализации из core/search.py на момент миграции: миграция не
+# должна меняться вместе с кодом приложения. Дальнейшие изменения
+# стемминга переиндексирует python manage.py rebuild_search_index.
+FTS_TABLE = 'search_fts'
+KIND_CODES = {'skill': 1, 'proposal': 2, 'category': 3}
+KIND_STRIDE = 4
+TITLE_WEIGHT = 10
+BODY_WEIGHT = 1
+MIN_TERM_LENGTH = 2
+FLUSH_EVERY = 5000
+
+_ENDINGS = {
+    'иями', 'ями', 'ами', 'иях', 'ях', 'ах', 'ием', 'ем', 'ом', 'ам', 'иям', 'ям',
+    'ией', 'ей', 'ой', 'ий', 'ый', 'ая', 'яя', 'ое', 'ее', 'ие', 'ые', 'ую', 'юю',
+    'его', 'ого', 'ему', 'ому', 'ими', 'ыми', 'их', 'ых', 'ым', 'им', 'ою', 'ею',
+    'ость', 'ости', 'остью', 'ов', 'ев', 'ии', 'ию', 'ия', 'ья', 'ье', 'ьи', 'ью',
+    'ать', 'ять', 'ить', 'еть', 'ыть', 'ешь', 'ишь', 'ет', 'ит', 'ут', 'ют', 'ат', 'ят',
+    'ила', 'ыла', 'али', 'или', 'ыли', 'ал', 'ил', 'ыл',
+    'а', 'я', 'о', 'е', 'и', 'ы', 'у', 'ю', 'ь', 'й',
+}
+_ENDING_LENGTHS = sorted({len(ending) for ending in _ENDINGS}, reverse=True)
+_MIN_STEM = 3
+STOP_WORDS = frozenset('''
+    без более бы был была были было быть вам вас весь во вот все всех вы где да даже для до его ее ей если
+    есть еще же за здесь из или им их как ко когда кто ли либо меня мне мной мы на над нам нас не него нее
+    нет ни них но ну об однако он она они оно от по под при про со так также такой там те тем то того
+    тоже той только том ты уже чем что чтобы это этот эти я
+    and the for with of to in on
+'''.split())
+_WORD_RE = re.compile(r'\w+')
+_CYRILLIC_RE = re.compile(r'[а-я]')
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    if not _CYRILLIC_RE.search(word):
+        return word
+    for length in _ENDING_LENGTHS:
+        if len(word) - length >= _MIN_STEM and word[-length:] in _ENDINGS:
+            return word[:-length]
+    return word
+
+
+def index_terms(text):
+    return [
+        stem(word) for word in _WORD_RE.findall(text or '')
+        if len(word) >= MIN_TERM_LENGTH and word.lower() not in STOP_WORDS
+    ]
+
+
+def skill_document(name, description):
+    return name, description or ''
+
+
+def proposal_document(offered_name, wanted_name, description):
+    return f'{offered_name} {wanted_name}', description or ''
+
+
+def category_document(name):
+    return name, ''
+
+
+def fts_available(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return any(row[0] == 'ENABLE_FTS5' for row in cursor.fetchall())
+
+
+def create_fts_table(apps, schema_editor):
+    if not fts_available(schema_editor.connection):
+        return
+    # стеммы пишутся уже нормализованными, unicode61 только режет по пробелам;
+    # prefix ускоряет поиск по коротким префиксам
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"title, body, tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')"
+    )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def fill_search_index(apps, schema_editor):
+    documents = {
+        'skill': (
+            (pk, *skill_document(name, description))
+            for pk, name, description in
+            apps.get_model('core', 'Skill').objects.values_list('pk', 'name', 'description').iterator()
+        ),
+        'proposal': (
+            (pk, *proposal_document(offered, wanted, description))
+            for pk, offered, wanted, description in
+            apps.get_model('core', 'Proposal').objects.values_list(
+                'pk', 'skill_offered__name', 'skill_wanted__name', 'description'
+            ).iterator()
+        ),
+        'category': (
+            (pk, *category_document(name))
+            for pk, name in apps.get_model('core', 'Category').objects.values_list('pk', 'name').iterator()
+        ),
+    }
+    use_fts = fts_available(schema_editor.connection)
+    SearchPosting = apps.get_model('core', 'SearchPosting')
+
+    def flush(rows, postings):
+        if rows:
+            with schema_editor.connection.cursor() as cursor:
+                cursor.executemany(f'INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (%s, %s, %s)', rows)
+        SearchPosting.objects.bulk_create(postings, batch_size=5000)
+
+    for kind, docs in documents.items():
+        rows = []
+        postings = []
+        for number, (object_id, title, body) in enumerate(docs, 1):
+            if use_fts:
+                rows.append((
+                    object_id * KIND_STRIDE + KIND_CODES[kind],
+                    ' '.join(index_terms(title)),
+                    ' '.join(index_terms(body)),
+                ))
+            else:
+                weights = {}
+                for term in index_terms(title):
+                    weights[term] = weights.get(term, 0) + TITLE_WEIGHT
+                for term in index_terms(body):
+                    weights[term] = weights.get(term, 0) + BODY_WEIGHT
+                postings.extend(
+                    SearchPosting(term=term[:64], kind=kind, object_id=object_id, weight=min(weight, 32767))
+                    for term, weight in weights.items()
+                )
+            # пишем пачками: на больших таблицах весь вид в память не влезет
+            if number % FLUSH_EVERY == 0:
+                flush(rows, postings)
+                rows, postings = [], []
+        flush(rows, postings)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_updated_at_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('kind', models.CharField(choices=[('skill', 'Навык'), ('proposal', 'Предложение'), ('category', 'Категория')], max_length=20)),
+                ('object_id', models.PositiveIntegerField()),
+                ('weight', models.PositiveSmallIntegerField()),
+            ],
+            options={
+                'verbose_name': 'Терм поискового индекса',
+                'verbose_name_plural': 'Поисковый индекс',
+                'db_table': 'search_postings',
+                'indexes': [models.Index(fields=['term', 'kind', 'object_id', 'weight'], name='search_term_idx'), models.Index(fields=['kind', 'object_id'], name='search_object_idx')],
+            },
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-18 21:41
+
+from django.db import migrations, models
+
+
+def fill_unread_counts(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+    Message = apps.get_model('core', 'Message')
+    counts = (
+        Message.objects.filter(is_read=False)
+        .values('receiver_id')
+        .annotate(count=models.Count('id'))
+        .order_by()
+    )
+    for row in counts.iterator(chunk_size=2000):
+        User.objects.filter(pk=row['receiver_id']).update(unread_messages_count=row['count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='unread_messages_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['receiver', 'exchange'], name='messages_unread_idx'),
+        ),
+        migrations.RunPython(fill_unread_counts, migrations.RunPython.noop),
+    ]
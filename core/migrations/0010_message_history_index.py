@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 21:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_unread_messages_counter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['exchange', 'sent_at', 'id'], name='messages_exchange_sent_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-18 21:53
+
+from django.db import migrations, models
+
+
+def fill_confirmed_counts(apps, schema_editor):
+    Event = apps.get_model('core', 'Event')
+    EventParticipation = apps.get_model('core', 'EventParticipation')
+    counts = (
+        EventParticipation.objects.filter(status='подтверждён')
+        .values('event_id')
+        .annotate(count=models.Count('id'))
+        .order_by()
+    )
+    for row in counts.iterator(chunk_size=2000):
+        Event.objects.filter(pk=row['event_id']).update(confirmed_count=row['count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_message_history_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='confirmed_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='eventparticipation',
+            index=models.Index(fields=['event', 'status', 'registered_at'], name='event_participation_queue_idx'),
+        ),
+        migrations.RunPython(fill_confirmed_counts, migrations.RunPython.noop),
+    ]
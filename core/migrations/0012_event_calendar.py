@@ -0,0 +1,66 @@
+# Generated by Django 5.2.6 on 2026-10-18 21:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_day_counts(apps, schema_editor):
+    Event = apps.get_model('core', 'Event')
+    EventDayCount = apps.get_model('core', 'EventDayCount')
+    totals = (
+        Event.objects.values('event_date', 'category_id')
+        .annotate(count=models.Count('id'))
+        .order_by()
+    )
+    EventDayCount.objects.bulk_create(
+        (
+            EventDayCount(day=row['event_date'], category_id=row['category_id'], count=row['count'])
+            for row in totals.iterator(chunk_size=2000)
+        ),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_event_seat_accounting'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventDayCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Счётчик мероприятий на день',
+                'verbose_name_plural': 'Счётчики мероприятий по дням',
+                'db_table': 'event_day_counts',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['event_date', 'category'], name='events_date_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['category', 'event_date'], name='events_category_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='eventdaycount',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.category'),
+        ),
+        migrations.AddConstraint(
+            model_name='eventdaycount',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', False)), fields=('day', 'category'), name='unique_event_day_category'),
+        ),
+        migrations.AddConstraint(
+            model_name='eventdaycount',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('day',), name='unique_event_day_uncategorized'),
+        ),
+        migrations.RunPython(fill_day_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-18 22:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_admin_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('exchange_status', 'Смена статуса обменов'), ('exchange_reward', 'Начисление очков за обмены'), ('award_points', 'Начисление очков пользователям')], max_length=30)),
+                ('status', models.CharField(choices=[('в очереди', 'В очереди'), ('выполняется', 'Выполняется'), ('готово', 'Готово'), ('ошибка', 'Ошибка')], default='в очереди', max_length=20)),
+                ('params', models.JSONField(blank=True, default=dict)),
+                ('object_ids', models.JSONField(blank=True, default=list)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('affected', models.PositiveIntegerField(default=0)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='admin_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Фоновая задача',
+                'verbose_name_plural': 'Фоновые задачи',
+                'db_table': 'admin_jobs',
+                'indexes': [models.Index(fields=['status', 'created_at'], name='admin_jobs_queue_idx')],
+            },
+        ),
+    ]
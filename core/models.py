@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.models import BaseUserManager
@@ -37,8 +37,15 @@ class User(AbstractUser):
         default=0.00,
         validators=[MinValueValidator(0.00), MaxValueValidator(5.00)]
     )
+    # Сумма и число оценок из отзывов, rating = rating_sum / rating_count.
+    # Обновляются в core/ratings.py вместе с Review.
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    # Непрочитанные входящие сообщения, обновляются в core/unread.py.
+    unread_messages_count = models.PositiveIntegerField(default=0, editable=False)
     city = models.CharField(max_length=100, blank=True, null=True)
     registration_date = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['full_name']
@@ -56,6 +63,7 @@ class User(AbstractUser):
 
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -81,6 +89,7 @@ class Skill(models.Model):
         on_delete=models.CASCADE,
         related_name='skills'
     )
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.name} ({self.get_level_display()})"
@@ -89,6 +98,9 @@ class Skill(models.Model):
         db_table = 'skills'
         verbose_name = 'Навык'
         verbose_name_plural = 'Навыки'
+        indexes = [
+            models.Index(fields=['category', 'level'], name='skills_category_level_idx'),
+        ]
 
 
 class UserSkill(models.Model):
@@ -144,6 +156,7 @@ class Proposal(models.Model):
     )
     deadlines = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.user.full_name}: {self.skill_offered.name} → {self.skill_wanted.name}"
@@ -152,6 +165,12 @@ class Proposal(models.Model):
         db_table = 'proposals'
         verbose_name = 'Предложение обмена'
         verbose_name_plural = 'Предложения обмена'
+        indexes = [
+            # ленту листаем по (created_at, id), см. KeysetPaginator
+            models.Index(fields=['-created_at', '-id'], name='proposals_created_idx'),
+            models.Index(fields=['format', '-created_at', '-id'], name='proposals_format_created_idx'),
+            models.Index(fields=['updated_at', 'id'], name='proposals_updated_idx'),
+        ]
 
 
 class Request(models.Model):
@@ -182,6 +201,158 @@ class Request(models.Model):
         db_table = 'requests'
         verbose_name = 'Запрос на обучение'
         verbose_name_plural = 'Запросы на обучение'
+        indexes = [
+            models.Index(fields=['created_at'], name='requests_created_idx'),
+        ]
+
+
+class MatchEntry(models.Model):
+    """
+    Денормализованный индекс предложений и запросов по паре навыков
+    (что отдаёт -> что хочет). Поддерживается сигналами в core/signals.py,
+    полностью пересобирается командой rebuild_match_index.
+    """
+    KIND_CHOICES = [
+        ('предложение', 'Предложение'),
+        ('запрос', 'Запрос'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    proposal = models.OneToOneField(
+        Proposal,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='match_entry'
+    )
+    request = models.OneToOneField(
+        Request,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='match_entry'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='match_entries'
+    )
+    skill_offered = models.ForeignKey(
+        Skill,
+        on_delete=models.CASCADE,
+        related_name='+',
+        db_index=False
+    )
+    skill_wanted = models.ForeignKey(
+        Skill,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    offered_category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='+',
+        db_index=False
+    )
+    wanted_category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='+',
+        db_index=False
+    )
+    offered_level = models.PositiveSmallIntegerField()
+    wanted_level = models.PositiveSmallIntegerField()
+    created_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'match_index'
+        verbose_name = 'Запись индекса совпадений'
+        verbose_name_plural = 'Индекс совпадений'
+        indexes = [
+            models.Index(fields=['skill_offered', 'skill_wanted'], name='match_pair_idx'),
+            models.Index(
+                fields=['offered_category', 'wanted_category', 'offered_level'],
+                name='match_category_pair_idx'
+            ),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=(
+                    models.Q(proposal__isnull=False, request__isnull=True) |
+                    models.Q(proposal__isnull=True, request__isnull=False)
+                ),
+                name='check_match_entry_single_source'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.proposal_id or self.request_id}"
+
+    @property
+    def source(self):
+        return self.proposal if self.proposal_id else self.request
+
+
+class SearchPosting(models.Model):
+    """
+    Запасной инвертированный индекс поиска: терм -> документ с весом.
+    Используется, когда SQLite собран без FTS5 (см. core/search.py).
+    """
+    KIND_CHOICES = [
+        ('skill', 'Навык'),
+        ('proposal', 'Предложение'),
+        ('category', 'Категория'),
+    ]
+
+    term = models.CharField(max_length=64)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    weight = models.PositiveSmallIntegerField()
+
+    class Meta:
+        db_table = 'search_postings'
+        verbose_name = 'Терм поискового индекса'
+        verbose_name_plural = 'Поисковый индекс'
+        indexes = [
+            # покрывающий индекс: поиск не ходит в саму таблицу
+            models.Index(fields=['term', 'kind', 'object_id', 'weight'], name='search_term_idx'),
+            models.Index(fields=['kind', 'object_id'], name='search_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} → {self.get_kind_display()} #{self.object_id}"
+
+
+class ExchangeCycle(models.Model):
+    length = models.PositiveSmallIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Цепочка обмена из {self.length} участников"
+
+    class Meta:
+        db_table = 'exchange_cycles'
+        verbose_name = 'Цепочка обмена'
+        verbose_name_plural = 'Цепочки обмена'
+
+
+class CycleSearchRun(models.Model):
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # до какого (updated_at, id) предложения включительно всё просмотрено
+    watermark_at = models.DateTimeField(null=True, blank=True)
+    watermark_id = models.BigIntegerField(null=True, blank=True)
+    explored = models.PositiveIntegerField(default=0)
+    cycles_found = models.PositiveIntegerField(default=0)
+    complete = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"Поиск цепочек от {self.started_at:%d.%m.%Y %H:%M}"
+
+    class Meta:
+        db_table = 'cycle_search_runs'
+        verbose_name = 'Запуск поиска цепочек'
+        verbose_name_plural = 'Запуски поиска цепочек'
 
 
 class Exchange(models.Model):
@@ -219,6 +390,13 @@ class Exchange(models.Model):
         blank=True,
         related_name='exchanges'
     )
+    cycle = models.ForeignKey(
+        ExchangeCycle,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='exchanges'
+    )
     status = models.CharField(
         max_length=20,
         choices=STATUS_CHOICES,
@@ -245,6 +423,14 @@ class Exchange(models.Model):
                 name='check_user1_not_equal_user2'
             )
         ]
+        indexes = [
+            # фильтры списка в админке
+            models.Index(fields=['status'], name='exchanges_status_idx'),
+            models.Index(fields=['start_date'], name='exchanges_start_date_idx'),
+            # обмены пользователя, новые сверху: по индексу на каждую сторону
+            models.Index(fields=['user1', '-created_at'], name='exchanges_user1_created_idx'),
+            models.Index(fields=['user2', '-created_at'], name='exchanges_user2_created_idx'),
+        ]
 
     def __str__(self):
         return f"Обмен между {self.user1.full_name} и {self.user2.full_name}"
@@ -272,6 +458,11 @@ class Review(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    def save(self, *args, **kwargs):
+        # агрегат рейтинга обновляется сигналами внутри той же транзакции
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
     class Meta:
         db_table = 'reviews'
         verbose_name = 'Отзыв'
@@ -282,6 +473,10 @@ class Review(models.Model):
                 name='check_reviewer_not_self'
             )
         ]
+        indexes = [
+            models.Index(fields=['rating'], name='reviews_rating_idx'),
+            models.Index(fields=['created_at'], name='reviews_created_idx'),
+        ]
 
     def __str__(self):
         return f"Отзыв от {self.reviewer.full_name} для {self.reviewed_user.full_name} ({self.rating}★)"
@@ -307,6 +502,11 @@ class Message(models.Model):
     sent_at = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
 
+    def save(self, *args, **kwargs):
+        # счётчик непрочитанных обновляется сигналами внутри той же транзакции
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Сообщение от {self.sender.full_name} → {self.receiver.full_name}"
 
@@ -314,6 +514,17 @@ class Message(models.Model):
         db_table = 'messages'
         verbose_name = 'Сообщение'
         verbose_name_plural = 'Сообщения'
+        indexes = [
+            models.Index(fields=['sent_at'], name='messages_sent_idx'),
+            # историю листаем по (sent_at, id), см. core/history.py
+            models.Index(fields=['exchange', 'sent_at', 'id'], name='messages_exchange_sent_idx'),
+            # непрочитанных единицы на фоне всей переписки
+            models.Index(
+                fields=['receiver', 'exchange'],
+                condition=models.Q(is_read=False),
+                name='messages_unread_idx'
+            ),
+        ]
 
 
 class Event(models.Model):
@@ -328,6 +539,8 @@ class Event(models.Model):
     event_time = models.TimeField(null=True, blank=True)
     location = models.TextField(blank=True, null=True)
     max_participants = models.IntegerField(default=10)
+    # Подтверждённые участники, меняется только в core/events.py.
+    confirmed_count = models.PositiveIntegerField(default=0, editable=False)
     category = models.ForeignKey(
         Category,
         on_delete=models.SET_NULL,
@@ -340,10 +553,64 @@ class Event(models.Model):
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # счётчик мог измениться с момента чтения; полное сохранение
+        # (админка, форма) не должно затирать его устаревшим значением
+        if self.pk is not None and not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'confirmed_count'
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def seats_left(self):
+        return max(self.max_participants - self.confirmed_count, 0)
+
     class Meta:
         db_table = 'events'
         verbose_name = 'Мероприятие'
         verbose_name_plural = 'Мероприятия'
+        indexes = [
+            # выборка по диапазону дат и дневные счётчики календаря
+            models.Index(fields=['event_date', 'category'], name='events_date_category_idx'),
+            # то же с фильтром по категории: порядок (event_date, id) из индекса
+            models.Index(fields=['category', 'event_date'], name='events_category_date_idx'),
+            # список без фильтра по категории листается по (event_date, id)
+            models.Index(fields=['event_date', 'id'], name='events_date_idx'),
+        ]
+
+
+class EventDayCount(models.Model):
+    """Число мероприятий на день по категориям для календаря, см. core/event_calendar.py."""
+    day = models.DateField()
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'event_day_counts'
+        verbose_name = 'Счётчик мероприятий на день'
+        verbose_name_plural = 'Счётчики мероприятий по дням'
+        constraints = [
+            # NULL в уникальном индексе не совпадает с NULL, поэтому строка
+            # «без категории» ограничивается отдельным частичным индексом
+            models.UniqueConstraint(
+                fields=['day', 'category'],
+                condition=models.Q(category__isnull=False),
+                name='unique_event_day_category'
+            ),
+            models.UniqueConstraint(
+                fields=['day'],
+                condition=models.Q(category__isnull=True),
+                name='unique_event_day_uncategorized'
+            ),
+        ]
 
 
 class EventParticipation(models.Model):
@@ -373,6 +640,12 @@ class EventParticipation(models.Model):
     class Meta:
         db_table = 'event_participations'
         unique_together = ('user', 'event')
+        indexes = [
+            models.Index(fields=['status'], name='event_participation_status_idx'),
+            models.Index(fields=['registered_at'], name='event_participation_reg_idx'),
+            # голова листа ожидания, см. core/events.py
+            models.Index(fields=['event', 'status', 'registered_at'], name='event_participation_queue_idx'),
+        ]
         verbose_name = 'Участие в мероприятии'
         verbose_name_plural = 'Участия в мероприятиях'
 
@@ -398,6 +671,12 @@ class Point(models.Model):
         db_table = 'points'
         verbose_name = 'Очки пользователя'
         verbose_name_plural = 'Очки пользователей'
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(balance__gte=0),
+                name='check_point_balance_non_negative'
+            )
+        ]
 
 
 class PointTransaction(models.Model):
@@ -431,4 +710,69 @@ class PointTransaction(models.Model):
     class Meta:
         db_table = 'point_transactions'
         verbose_name = 'Транзакция очков'
-        verbose_name_plural = 'Транзакции очков'
\ No newline at end of file
+        verbose_name_plural = 'Транзакции очков'
+        constraints = [
+            # повторное начисление за один и тот же обмен невозможно
+            models.UniqueConstraint(
+                fields=['user', 'exchange', 'reason'],
+                condition=models.Q(reason='за обучение', exchange__isnull=False),
+                name='unique_exchange_reward'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['reason'], name='point_tx_reason_idx'),
+            models.Index(fields=['created_at'], name='point_tx_created_idx'),
+            # история очков пользователя
+            models.Index(fields=['user', '-created_at'], name='point_tx_user_created_idx'),
+        ]
+
+class AdminJob(models.Model):
+    KIND_CHOICES = [
+        ('exchange_status', 'Смена статуса обменов'),
+        ('exchange_reward', 'Начисление очков за обмены'),
+        ('award_points', 'Начисление очков пользователям'),
+    ]
+    STATUS_CHOICES = [
+        ('в очереди', 'В очереди'),
+        ('выполняется', 'Выполняется'),
+        ('готово', 'Готово'),
+        ('ошибка', 'Ошибка'),
+    ]
+
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='в очереди')
+    params = models.JSONField(default=dict, blank=True)
+    # id объектов, выбранных в админке; обрабатываются по порядку кусками
+    object_ids = models.JSONField(default=list, blank=True)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    affected = models.PositiveIntegerField(default=0)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='admin_jobs'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} №{self.pk}"
+
+    @property
+    def progress(self):
+        return 100 if not self.total else self.processed * 100 // self.total
+
+    class Meta:
+        db_table = 'admin_jobs'
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = [
+            # очередь: воркер берёт самую старую задачу в статусе
+            models.Index(fields=['status', 'created_at'], name='admin_jobs_queue_idx'),
+        ]
@@ -0,0 +1,178 @@
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from . import unread
+
+PAGE_CACHE_ALIAS = getattr(settings, 'PAGE_CACHE_ALIAS', 'pages')
+PAGE_CACHE_TIMEOUT = getattr(settings, 'PAGE_CACHE_TIMEOUT', 600)
+
+VERSION_KEY = 'content-version'
+
+
+def _cache():
+    return caches[PAGE_CACHE_ALIAS]
+
+
+def content_version():
+    """
+    Глобальная версия содержимого — время последней записи в микросекундах.
+    Она же служит Last-Modified и входит в ETag и ключи страниц. Живёт в
+    кеше PAGE_CACHE_ALIAS, общем для воркеров (file или db), иначе запись
+    в одном процессе не сбросит страницы в остальных.
+    """
+    cache = _cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # после рестарта или вытеснения считаем, что всё могло измениться
+        cache.add(VERSION_KEY, time.time_ns() // 1000, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def acontent_version():
+    cache = _cache()
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, time.time_ns() // 1000, None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    """Сбрасывает все закешированные страницы разом: старые ключи просто перестают читаться."""
+    version = time.time_ns() // 1000
+    cache = _cache()
+    # версия не должна убывать, даже если часы другого процесса отстают
+    current = cache.get(VERSION_KEY)
+    if current is not None and current >= version:
+        version = current + 1
+    cache.set(VERSION_KEY, version, None)
+
+
+def versioned(name, builder, timeout=PAGE_CACHE_TIMEOUT):
+    """Значение builder(), закешированное до следующей смены версии."""
+    key = f'data:{name}:{content_version()}'
+    value = _cache().get(key)
+    if value is None:
+        value = builder()
+        _cache().set(key, value, timeout)
+    return value
+
+
+async def aversioned(name, builder, timeout=PAGE_CACHE_TIMEOUT):
+    """versioned() для async-кода; builder — корутинная функция."""
+    key = f'data:{name}:{await acontent_version()}'
+    value = await _cache().aget(key)
+    if value is None:
+        value = await builder()
+        await _cache().aset(key, value, timeout)
+    return value
+
+
+def _variant(request):
+    # анонимам отдаём одну общую копию, вошедшим — свою на сессию
+    # (в шапке у них меню профиля, csrf-токен формы выхода и значок
+    # непрочитанных — его значение тоже входит в вариант)
+    if request.user.is_authenticated:
+        if request.session.session_key is None:
+            return None
+        return f'{request.session.session_key}:{unread.unread_count(request.user)}'
+    return 'anon'
+
+
+async def _avariant(request):
+    # auser() заодно загружает сессию: дальше get_messages() обходится без запросов
+    user = await request.auser()
+    if user.is_authenticated:
+        if request.session.session_key is None:
+            return None
+        return f'{request.session.session_key}:{await unread.aunread_count(user)}'
+    return 'anon'
+
+
+def _validators(request, variant, version):
+    """ETag, Last-Modified и ключ кеша страницы."""
+    digest = hashlib.md5(f'{variant}:{request.get_full_path()}'.encode()).hexdigest()
+    etag = quote_etag(f'{version:x}-{digest[:16]}')
+    return etag, version // 1_000_000, f'page:{digest}:{version}'
+
+
+def _finish(response, variant, etag, last_modified):
+    response.headers.setdefault('ETag', etag)
+    response.headers.setdefault('Last-Modified', http_date(last_modified))
+    if variant == 'anon':
+        patch_cache_control(response, public=True, max_age=0)
+    else:
+        patch_cache_control(response, private=True, max_age=0)
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def cached_page(view):
+    """
+    Кеш ответа целиком, пока не сменилась версия содержимого.
+    Поддерживает условные GET: по ETag/Last-Modified отвечает 304 без рендера.
+    """
+    if iscoroutinefunction(view):
+        return _acached_page(view)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(request, *args, **kwargs)
+        variant = _variant(request)
+        if variant is None or len(get_messages(request)):
+            return view(request, *args, **kwargs)
+
+        etag, last_modified, key = _validators(request, variant, content_version())
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            cached = _cache().get(key)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+            else:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200 or response.streaming:
+                    return response
+                _cache().set(key, (response.content, response['Content-Type']), PAGE_CACHE_TIMEOUT)
+        return _finish(response, variant, etag, last_modified)
+
+    return wrapper
+
+
+def _acached_page(view):
+    """cached_page для async-вьюх: то же самое через асинхронный API кеша."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return await view(request, *args, **kwargs)
+        variant = await _avariant(request)
+        if variant is None or len(get_messages(request)):
+            return await view(request, *args, **kwargs)
+
+        etag, last_modified, key = _validators(request, variant, await acontent_version())
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            cached = await _cache().aget(key)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+            else:
+                response = await view(request, *args, **kwargs)
+                if response.status_code != 200 or response.streaming:
+                    return response
+                await _cache().aset(key, (response.content, response['Content-Type']), PAGE_CACHE_TIMEOUT)
+        return _finish(response, variant, etag, last_modified)
+
+    return wrapper
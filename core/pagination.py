@@ -0,0 +1,182 @@
+import base64
+import binascii
+import json
+
+from django.core.paginator import Paginator
+from django.db import connections, models
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _dump(value):
+    # DjangoJSONEncoder обрезает микросекунды, а курсору нужна точная граница
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(direction, values):
+    payload = json.dumps({'d': direction, 'v': [_dump(v) for v in values]}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        data = json.loads(raw)
+        direction, values = data['d'], data['v']
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise InvalidCursor('Некорректный курсор')
+    if direction not in ('next', 'prev') or not isinstance(values, list):
+        raise InvalidCursor('Некорректный курсор')
+    return direction, values
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor=None, prev_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Курсорная (keyset) пагинация: вместо OFFSET страница начинается с
+    условия по ключу сортировки, поэтому глубина листания не влияет на цену
+    запроса при наличии индекса с тем же порядком полей.
+    """
+
+    def __init__(self, queryset, ordering=('-created_at', '-id'), per_page=20):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        opts = queryset.model._meta
+        self.fields = []
+        for key in self.ordering:
+            name = key.lstrip('-')
+            field = opts.pk if name == 'pk' else opts.get_field(name)
+            self.fields.append((field, key.startswith('-')))
+
+    def _values(self, obj):
+        return [getattr(obj, field.attname) for field, _ in self.fields]
+
+    def _parse(self, values):
+        if len(values) != len(self.fields):
+            raise InvalidCursor('Некорректный курсор')
+        try:
+            return [field.to_python(value) for (field, _), value in zip(self.fields, values)]
+        except Exception:
+            raise InvalidCursor('Некорректный курсор')
+
+    def _seek(self, values, forward):
+        # (a, b) > (x, y)  ->  a >= x AND (a > x OR (a = x AND b > y)).
+        # Первое условие даёт диапазонное сканирование по индексу.
+        condition = models.Q()
+        equal = {}
+        for (field, descending), value in zip(self.fields, values):
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= models.Q(**equal, **{f'{field.attname}__{lookup}': value})
+            equal[field.attname] = value
+        head, descending = self.fields[0]
+        bound = 'lte' if descending == forward else 'gte'
+        return models.Q(**{f'{head.attname}__{bound}': values[0]}) & condition
+
+    def _query(self, cursor):
+        direction, values = decode_cursor(cursor) if cursor else ('next', None)
+        forward = direction == 'next'
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._seek(self._parse(values), forward))
+        if forward:
+            ordering = self.ordering
+        else:
+            ordering = tuple(key[1:] if key.startswith('-') else f'-{key}' for key in self.ordering)
+        return queryset.order_by(*ordering)[:self.per_page + 1], forward, values is not None
+
+    def _page(self, rows, forward, has_cursor):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+        if not rows:
+            return KeysetPage(rows)
+
+        has_next = has_more if forward else True
+        has_previous = has_cursor if forward else has_more
+        return KeysetPage(
+            rows,
+            next_cursor=encode_cursor('next', self._values(rows[-1])) if has_next else None,
+            prev_cursor=encode_cursor('prev', self._values(rows[0])) if has_previous else None,
+        )
+
+    def page(self, cursor=None):
+        queryset, forward, has_cursor = self._query(cursor)
+        return self._page(list(queryset), forward, has_cursor)
+
+    async def apage(self, cursor=None):
+        queryset, forward, has_cursor = self._query(cursor)
+        return self._page([obj async for obj in queryset], forward, has_cursor)
+
+
+ESTIMATE_THRESHOLD = 100_000
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator для больших таблиц: вместо COUNT(*) по всей таблице берёт
+    оценку числа строк, а отфильтрованный набор считает не дальше
+    ESTIMATE_THRESHOLD строк. Страницы за порогом не показываются — для
+    такой глубины есть фильтры и поиск.
+    """
+
+    def __init__(self, *args, threshold=ESTIMATE_THRESHOLD, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threshold = threshold
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, models.QuerySet):
+            return super().count
+        if not queryset.query.where:
+            estimate = estimate_rows(queryset.model, queryset.db)
+            if estimate is not None and estimate > self.threshold:
+                return estimate
+        # COUNT(*) по подзапросу с LIMIT останавливается на пороге
+        return queryset.order_by()[:self.threshold].count()
+
+
+def estimate_rows(model, using='default'):
+    """
+    Оценка числа строк таблицы без полного прохода: статистика
+    планировщика в PostgreSQL, иначе наибольший первичный ключ (в SQLite
+    это один шаг по B-дереву). После удалений оценка бывает завышенной.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+            row = cursor.fetchone()
+        if row and row[0] > 0:
+            return row[0]
+    if isinstance(model._meta.pk, models.AutoField):
+        return model._default_manager.using(using).aggregate(last=models.Max('pk'))['last'] or 0
+    return None
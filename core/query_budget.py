@@ -0,0 +1,149 @@
+import logging
+import threading
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+QUERY_BUDGET_DEFAULT = getattr(settings, 'QUERY_BUDGET_DEFAULT', 30)
+QUERY_BUDGET_RAISE = getattr(settings, 'QUERY_BUDGET_RAISE', False)
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        if len(self.statements) < 100:
+            self.statements.append(sql)
+        return execute(sql, params, many, context)
+
+
+def _install(stack, counter):
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(counter))
+
+
+@contextmanager
+def count_queries():
+    """Считает запросы ко всем БД внутри блока через execute_wrapper."""
+    counter = QueryCounter()
+    with ExitStack() as stack:
+        _install(stack, counter)
+        yield counter
+
+
+def query_budget(max_queries):
+    """Задаёт вьюхе собственный лимит запросов вместо QUERY_BUDGET_DEFAULT."""
+    def decorator(view):
+        # внешние декораторы с functools.wraps переносят атрибут на себя
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def record(view_name, count):
+    with _registry_lock:
+        stats = _registry.setdefault(view_name, {'requests': 0, 'queries': 0, 'max': 0})
+        stats['requests'] += 1
+        stats['queries'] += count
+        stats['max'] = max(stats['max'], count)
+
+
+def stats():
+    """Сводка по вьюхам текущего процесса: число запросов, среднее и максимум."""
+    with _registry_lock:
+        return {
+            name: {**values, 'avg': round(values['queries'] / values['requests'], 1)}
+            for name, values in sorted(_registry.items())
+        }
+
+
+def reset_stats():
+    with _registry_lock:
+        _registry.clear()
+
+
+class QueryBudgetMiddleware:
+    """
+    Считает SQL-запросы каждого ответа (вместе с сессией и пользователем),
+    копит статистику по вьюхам и пишет в лог превысившие бюджет.
+    С QUERY_BUDGET_RAISE (для тестов и разработки) превышение — исключение.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with count_queries() as counter:
+            response = self.get_response(request)
+        return self.check(request, response, counter)
+
+    async def __acall__(self, request):
+        # запросы async ORM идут в потоке sync_to_async этого запроса, и
+        # соединения там свои — счётчик ставим на них в том же потоке
+        counter = QueryCounter()
+        stack = ExitStack()
+        await sync_to_async(_install)(stack, counter)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.check(request, response, counter)
+
+    def check(self, request, response, counter):
+        view = getattr(request, '_query_budget_view', None)
+        if view is None:
+            return response
+
+        view_name, budget = view
+        record(view_name, counter.count)
+        if counter.count > budget:
+            logger.warning(
+                'Вьюха %s сделала %d запросов при бюджете %d (%s)',
+                view_name, counter.count, budget, request.get_full_path(),
+            )
+            if QUERY_BUDGET_RAISE:
+                raise QueryBudgetExceeded(f'{view_name}: {counter.count} запросов при бюджете {budget}')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_name = request.resolver_match.view_name if request.resolver_match else view_func.__name__
+        request._query_budget_view = (view_name, getattr(view_func, 'query_budget', QUERY_BUDGET_DEFAULT))
+
+
+def assert_constant_queries(fetch, grow, sizes=(1, 10)):
+    """
+    Помощник для тестов: проверяет, что число запросов fetch() не растёт
+    вместе с количеством строк. grow(n) должен довести данные до n строк,
+    fetch() — выполнить запрос к вьюхе (например, client.get(url)).
+    """
+    counts = []
+    for size in sizes:
+        grow(size)
+        with count_queries() as counter:
+            fetch()
+        counts.append(counter.count)
+    if len(set(counts)) > 1:
+        detail = ', '.join(f'{size} строк: {count}' for size, count in zip(sizes, counts))
+        raise AssertionError(f'Число запросов растёт с числом строк (N+1?): {detail}')
+    return counts[0]
@@ -0,0 +1,129 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import models, transaction
+from django.db.models.functions import Cast, Round
+from django.utils import timezone
+
+from . import auth_cache
+from .models import Review, User
+
+RATING_FIELD = models.DecimalField(max_digits=3, decimal_places=2)
+# частное до округления: ROUND(double precision, integer) в PostgreSQL нет,
+# округляется numeric
+QUOTIENT_FIELD = models.DecimalField(max_digits=12, decimal_places=6)
+
+
+def average(rating_sum, rating_count):
+    if not rating_count:
+        return Decimal('0.00')
+    return (Decimal(rating_sum) / rating_count).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def apply_delta(user_id, sum_delta, count_delta):
+    """
+    Сдвигает агрегат рейтинга одним UPDATE через F(): без чтения строки,
+    поэтому параллельные отзывы не затирают друг друга.
+    """
+    new_sum = models.F('rating_sum') + sum_delta
+    new_count = models.F('rating_count') + count_delta
+    User.objects.filter(pk=user_id).update(
+        rating_sum=new_sum,
+        rating_count=new_count,
+        rating=models.Case(
+            models.When(
+                rating_count__gt=-count_delta,
+                then=Round(
+                    Cast(Cast(new_sum, models.FloatField()) / new_count, QUOTIENT_FIELD),
+                    2, output_field=RATING_FIELD,
+                ),
+            ),
+            default=models.Value(Decimal('0.00')),
+            output_field=RATING_FIELD,
+        ),
+        # рейтинг виден в закешированных карточках, их версия — updated_at
+        updated_at=timezone.now(),
+    )
+    auth_cache.forget([user_id])
+
+
+def review_saved(review, created, previous=None):
+    if created or previous is None:
+        apply_delta(review.reviewed_user_id, review.rating, 1)
+        return
+    old_user_id, old_rating = previous
+    if old_user_id == review.reviewed_user_id:
+        if old_rating != review.rating:
+            apply_delta(review.reviewed_user_id, review.rating - old_rating, 0)
+    else:
+        apply_delta(old_user_id, -old_rating, -1)
+        apply_delta(review.reviewed_user_id, review.rating, 1)
+
+
+def review_deleted(review):
+    apply_delta(review.reviewed_user_id, -review.rating, -1)
+
+
+def _stream_totals(chunk_size):
+    """(user_id, сумма, количество) по отзывам, потоково в порядке user_id."""
+    rows = Review.objects.order_by('reviewed_user_id').values_list('reviewed_user_id', 'rating')
+    current, total, count = None, 0, 0
+    for user_id, rating in rows.iterator(chunk_size=chunk_size):
+        if user_id != current:
+            if current is not None:
+                yield current, total, count
+            current, total, count = user_id, 0, 0
+        total += rating
+        count += 1
+    if current is not None:
+        yield current, total, count
+
+
+def recompute_all(chunk_size=5000):
+    """Пересчитывает агрегаты всех пользователей по отзывам, пачками по chunk_size."""
+    updated = 0
+    with transaction.atomic():
+        now = timezone.now()
+        User.objects.exclude(rating_count=0, rating_sum=0, rating=0).update(
+            rating_sum=0, rating_count=0, rating=Decimal('0.00'), updated_at=now
+        )
+        fields = ['rating_sum', 'rating_count', 'rating', 'updated_at']
+        batch = []
+        for user_id, total, count in _stream_totals(chunk_size):
+            batch.append(User(pk=user_id, rating_sum=total, rating_count=count,
+                              rating=average(total, count), updated_at=now))
+            if len(batch) >= chunk_size:
+                User.objects.bulk_update(batch, fields)
+                updated += len(batch)
+                batch = []
+        User.objects.bulk_update(batch, fields)
+        updated += len(batch)
+    auth_cache.forget(User.objects.values_list('pk', flat=True))
+    return updated
+
+
+def find_inconsistencies(chunk_size=5000):
+    """
+    Сверяет сохранённые агрегаты с отзывами. Возвращает список
+    (user_id, (sum, count, rating) сохранённые, (sum, count) по отзывам).
+    """
+    stored = (
+        User.objects.exclude(rating_count=0, rating_sum=0, rating=0)
+        .order_by('pk')
+        .values_list('pk', 'rating_sum', 'rating_count', 'rating')
+    )
+    stored = {pk: (total, count, rating) for pk, total, count, rating in stored.iterator(chunk_size=chunk_size)}
+    problems = []
+    for user_id, total, count in _stream_totals(chunk_size):
+        state = stored.pop(user_id, (0, 0, Decimal('0.00')))
+        if state != (total, count, average(total, count)):
+            problems.append((user_id, state, (total, count)))
+    # остались пользователи с ненулевым агрегатом, но без отзывов
+    problems.extend((user_id, state, (0, 0)) for user_id, state in stored.items())
+    return problems
+
+
+def fix_user(user_id, total, count):
+    User.objects.filter(pk=user_id).update(
+        rating_sum=total, rating_count=count, rating=average(total, count), updated_at=timezone.now()
+    )
+    auth_cache.forget([user_id])
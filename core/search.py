@@ -0,0 +1,360 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection, models
+
+from .models import Category, Proposal, SearchPosting, Skill
+
+SEARCH_BACKEND = getattr(settings, 'SEARCH_BACKEND', 'auto')
+FTS_TABLE = 'search_fts'
+
+# rowid в FTS5 = object_id * KIND_STRIDE + код вида: удаление и замена
+# документа идут по rowid, без сканирования таблицы.
+KIND_CODES = {'skill': 1, 'proposal': 2, 'category': 3}
+KIND_STRIDE = 4
+KIND_MODELS = {'skill': Skill, 'proposal': Proposal, 'category': Category}
+
+TITLE_WEIGHT = 10
+BODY_WEIGHT = 1
+MIN_TERM_LENGTH = 2
+MAX_QUERY_TERMS = 8
+# Сколько самых свежих совпадений каждого вида ранжирует запасной
+# табличный индекс: сумма весов по десяткам тысяч документов не
+# укладывается в бюджет запроса. FTS5 ранжирует все совпадения сам.
+MAX_CANDIDATES = getattr(settings, 'SEARCH_MAX_CANDIDATES', 1000)
+
+# Окончания для лёгкого стемминга русских слов, длинные раньше коротких.
+# Это не полноценный Snowball: отрезается одно самое длинное окончание,
+# а запрос ищется по префиксу, что покрывает большинство словоформ.
+_ENDINGS = {
+    'иями', 'ями', 'ами', 'иях', 'ях', 'ах', 'ием', 'ем', 'ом', 'ам', 'иям', 'ям',
+    'ией', 'ей', 'ой', 'ий', 'ый', 'ая', 'яя', 'ое', 'ее', 'ие', 'ые', 'ую', 'юю',
+    'его', 'ого', 'ему', 'ому', 'ими', 'ыми', 'их', 'ых', 'ым', 'им', 'ою', 'ею',
+    'ость', 'ости', 'остью', 'ов', 'ев', 'ии', 'ию', 'ия', 'ья', 'ье', 'ьи', 'ью',
+    'ать', 'ять', 'ить', 'еть', 'ыть', 'ешь', 'ишь', 'ет', 'ит', 'ут', 'ют', 'ат', 'ят',
+    'ила', 'ыла', 'али', 'или', 'ыли', 'ал', 'ил', 'ыл',
+    'а', 'я', 'о', 'е', 'и', 'ы', 'у', 'ю', 'ь', 'й',
+}
+_ENDING_LENGTHS = sorted({len(ending) for ending in _ENDINGS}, reverse=True)
+_MIN_STEM = 3
+# служебные слова есть почти в каждом описании и только раздувают выдачу
+STOP_WORDS = frozenset('''
+    без более бы был была были было быть вам вас весь во вот все всех вы где да даже для до его ее ей если
+    есть еще же за здесь из или им их как ко когда кто ли либо меня мне мной мы на над нам нас не него нее
+    нет ни них но ну об однако он она они оно от по под при про со так также такой там те тем то того
+    тоже той только том ты уже чем что чтобы это этот эти я
+    and the for with of to in on
+'''.split())
+_WORD_RE = re.compile(r'\w+')
+_CYRILLIC_RE = re.compile(r'[а-я]')
+
+
+@lru_cache(maxsize=65536)
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    if not _CYRILLIC_RE.search(word):
+        return word
+    for length in _ENDING_LENGTHS:
+        if len(word) - length >= _MIN_STEM and word[-length:] in _ENDINGS:
+            return word[:-length]
+    return word
+
+
+def _words(text):
+    for word in _WORD_RE.findall(text or ''):
+        if len(word) >= MIN_TERM_LENGTH and word.lower() not in STOP_WORDS:
+            yield word
+
+
+def index_terms(text):
+    return [stem(word) for word in _words(text)]
+
+
+def query_terms(query):
+    """
+    [(стем, по префиксу?)]. Слово с узнанным окончанием уже целое — стем
+    сам покрывает его формы, и точное совпадение дешевле префиксного.
+    Слова без окончания (недописанные, латиница) ищутся по префиксу.
+    """
+    terms = []
+    seen = set()
+    for word in _words(query):
+        term = stem(word)
+        if term in seen:
+            continue
+        seen.add(term)
+        terms.append((term, term == word.lower().replace('ё', 'е')))
+    return terms[:MAX_QUERY_TERMS]
+
+
+def skill_document(name, description):
+    return name, description or ''
+
+
+def proposal_document(offered_name, wanted_name, description):
+    return f'{offered_name} {wanted_name}', description or ''
+
+
+def category_document(name):
+    return name, ''
+
+
+def fts_available():
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return any(row[0] == 'ENABLE_FTS5' for row in cursor.fetchall())
+
+
+class Fts5Backend:
+    """Документы хранятся уже нормализованными (стеммы через пробел)."""
+
+    name = 'fts5'
+
+    def replace(self, kind, docs):
+        code = KIND_CODES[kind]
+        rows = [
+            (object_id * KIND_STRIDE + code, ' '.join(index_terms(title)), ' '.join(index_terms(body)))
+            for object_id, title, body in docs
+        ]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+            cursor.executemany(f'INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (%s, %s, %s)', rows)
+
+    def remove(self, kind, object_ids):
+        code = KIND_CODES[kind]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [(object_id * KIND_STRIDE + code,) for object_id in object_ids],
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+    def search(self, terms, kinds, limit):
+        match = ' '.join(f'"{term}"*' if prefix else f'"{term}"' for term, prefix in terms)
+        # ранжирует сам FTS5: столбец rank с весами bm25 и ORDER BY rank LIMIT
+        # отбирают лучшие документы по всему индексу, а не среди последних
+        sql = (
+            f'SELECT rowid, rank FROM {FTS_TABLE} '
+            f"WHERE {FTS_TABLE} MATCH %s AND rank MATCH 'bm25({TITLE_WEIGHT}.0, {BODY_WEIGHT}.0)'"
+        )
+        params = [match]
+        if kinds:
+            codes = [KIND_CODES[kind] for kind in kinds]
+            sql += f' AND rowid %% {KIND_STRIDE} IN ({", ".join(["%s"] * len(codes))})'
+            params.extend(codes)
+        sql += ' ORDER BY rank LIMIT %s'
+        params.append(limit)
+
+        kind_of = {code: kind for kind, code in KIND_CODES.items()}
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            # bm25 в SQLite отрицательный: чем меньше, тем релевантнее
+            return [
+                (kind_of[rowid % KIND_STRIDE], rowid // KIND_STRIDE, -rank)
+                for rowid, rank in cursor.fetchall()
+            ]
+
+
+class TableBackend:
+    """
+    Запасной инвертированный индекс в обычной таблице, если SQLite собран
+    без FTS5 или база другая. Префикс ищется диапазоном по индексу терма
+    (LIKE с ESCAPE индекс в SQLite не использует).
+    """
+
+    name = 'table'
+
+    def replace(self, kind, docs):
+        docs = list(docs)
+        if not docs:
+            return
+        self.remove(kind, [object_id for object_id, _, _ in docs])
+        postings = []
+        for object_id, title, body in docs:
+            weights = {}
+            for term in index_terms(title):
+                weights[term] = weights.get(term, 0) + TITLE_WEIGHT
+            for term in index_terms(body):
+                weights[term] = weights.get(term, 0) + BODY_WEIGHT
+            postings.extend(
+                SearchPosting(term=term[:64], kind=kind, object_id=object_id, weight=min(weight, 32767))
+                for term, weight in weights.items()
+            )
+        SearchPosting.objects.bulk_create(postings, batch_size=5000)
+
+    def remove(self, kind, object_ids):
+        object_ids = list(object_ids)
+        for start in range(0, len(object_ids), 500):
+            SearchPosting.objects.filter(kind=kind, object_id__in=object_ids[start:start + 500]).delete()
+
+    def clear(self):
+        SearchPosting.objects.all().delete()
+
+    def search(self, terms, kinds, limit):
+        ranges = [
+            models.Q(term__gte=term, term__lt=term + '\uffff') if prefix else models.Q(term=term)
+            for term, prefix in terms
+        ]
+        condition = models.Q()
+        for term_range in ranges:
+            condition |= term_range
+        postings = SearchPosting.objects.filter(condition)
+        if kinds:
+            postings = postings.filter(kind__in=kinds)
+        # ранжируются только самые свежие кандидаты по первому слову, по
+        # MAX_CANDIDATES каждого вида: id разных видов пересекаются
+        in_candidates = models.Q()
+        for kind in kinds or KIND_CODES:
+            candidates = (
+                SearchPosting.objects.filter(ranges[0], kind=kind)
+                .order_by('-object_id').values('object_id')[:MAX_CANDIDATES]
+            )
+            in_candidates |= models.Q(kind=kind, object_id__in=models.Subquery(candidates))
+        postings = postings.filter(in_candidates)
+        # документ подходит, только если каждое слово запроса нашло свой терм
+        matched = {
+            f'has_{i}': models.Max(models.Case(
+                models.When(term_range, then=models.Value(1)),
+                default=models.Value(0),
+                output_field=models.IntegerField(),
+            ))
+            for i, term_range in enumerate(ranges)
+        }
+        rows = (
+            postings.values('kind', 'object_id')
+            .annotate(score=models.Sum('weight'), **matched)
+            .filter(**{name: 1 for name in matched})
+            .order_by('-score', 'object_id')
+            .values_list('kind', 'object_id', 'score')[:limit]
+        )
+        return [(kind, object_id, float(score)) for kind, object_id, score in rows]
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        choice = SEARCH_BACKEND
+        if choice == 'auto':
+            choice = 'fts5' if FTS_TABLE in connection.introspection.table_names() else 'table'
+        _backend = Fts5Backend() if choice == 'fts5' else TableBackend()
+    return _backend
+
+
+def _kind_of(instance):
+    for kind, model in KIND_MODELS.items():
+        if isinstance(instance, model):
+            return kind
+    raise TypeError(f'Нельзя проиндексировать {type(instance).__name__}')
+
+
+def _skill_docs(queryset):
+    for pk, name, description in queryset.values_list('pk', 'name', 'description').iterator(chunk_size=5000):
+        yield (pk, *skill_document(name, description))
+
+
+def _proposal_docs(queryset):
+    rows = queryset.values_list('pk', 'skill_offered__name', 'skill_wanted__name', 'description')
+    for pk, offered, wanted, description in rows.iterator(chunk_size=5000):
+        yield (pk, *proposal_document(offered, wanted, description))
+
+
+def _category_docs(queryset):
+    for pk, name in queryset.values_list('pk', 'name').iterator(chunk_size=5000):
+        yield (pk, *category_document(name))
+
+
+_DOCUMENTS = {'skill': _skill_docs, 'proposal': _proposal_docs, 'category': _category_docs}
+
+
+def _write(kind, docs, batch_size=5000):
+    backend = get_backend()
+    total = 0
+    batch = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            backend.replace(kind, batch)
+            total += len(batch)
+            batch = []
+    backend.replace(kind, batch)
+    return total + len(batch)
+
+
+def index_object(instance):
+    kind = _kind_of(instance)
+    _write(kind, _DOCUMENTS[kind](KIND_MODELS[kind].objects.filter(pk=instance.pk)))
+
+
+def remove_object(instance):
+    get_backend().remove(_kind_of(instance), [instance.pk])
+
+
+def reindex_proposals_of_skill(skill):
+    """Название навыка входит в текст предложений с ним."""
+    proposals = Proposal.objects.filter(models.Q(skill_offered=skill) | models.Q(skill_wanted=skill))
+    _write('proposal', _proposal_docs(proposals))
+
+
+def rebuild_index(batch_size=5000, stdout=None):
+    """Полная пересборка индекса текущего бэкенда."""
+    backend = get_backend()
+    backend.clear()
+    total = 0
+    for kind, model in KIND_MODELS.items():
+        count = _write(kind, _DOCUMENTS[kind](model.objects.order_by('pk')), batch_size)
+        total += count
+        if stdout:
+            stdout.write(f'{model._meta.verbose_name_plural}: {count}')
+    return total
+
+
+@dataclass
+class Hit:
+    kind: str
+    object: models.Model
+    score: float
+
+    @property
+    def title(self):
+        if self.kind == 'proposal':
+            return f'{self.object.skill_offered.name} → {self.object.skill_wanted.name}'
+        return self.object.name
+
+
+def search_ids(query, kinds=None, limit=20):
+    """[(kind, id, score)] по убыванию релевантности; объекты не загружаются."""
+    terms = query_terms(query)
+    if not terms:
+        return []
+    return get_backend().search(terms, kinds, limit)
+
+
+def search(query, kinds=None, limit=20):
+    found = search_ids(query, kinds, limit)
+    querysets = {
+        'skill': Skill.objects.select_related('category'),
+        'proposal': Proposal.objects.select_related('user', 'skill_offered', 'skill_wanted'),
+        'category': Category.objects.all(),
+    }
+    loaded = {}
+    for kind, queryset in querysets.items():
+        ids = [object_id for hit_kind, object_id, _ in found if hit_kind == kind]
+        if ids:
+            loaded[kind] = queryset.in_bulk(ids)
+    return [
+        Hit(kind=kind, object=loaded[kind][object_id], score=score)
+        for kind, object_id, score in found
+        if object_id in loaded.get(kind, {})
+    ]
@@ -0,0 +1,28 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+
+def delete_expired(batch_size=1000, pause=0.05, now=None):
+    """
+    Удаляет истёкшие сессии пачками по batch_size ключей. В отличие от
+    clearsessions (один DELETE на всю таблицу) каждая пачка — своя короткая
+    транзакция, а пауза между ними даёт запросам сайта взять блокировку
+    записи SQLite. Возвращает число удалённых строк.
+    """
+    now = now or timezone.now()
+    deleted = 0
+    while True:
+        # expire_date проиндексирован, выборка пачки не проходит всю таблицу
+        keys = list(
+            Session.objects.filter(expire_date__lt=now).order_by().values_list('pk', flat=True)[:batch_size]
+        )
+        if not keys:
+            break
+        count, _ = Session.objects.filter(pk__in=keys).delete()
+        deleted += count
+        if len(keys) < batch_size:
+            break
+        time.sleep(pause)
+    return deleted
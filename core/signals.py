@@ -0,0 +1,239 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import auth_cache, autocomplete, event_calendar, events, fragment_cache, matching, page_cache, ratings, search, unread
+from .models import Category, Event, EventParticipation, Exchange, Message, Proposal, Request, Review, Skill, User, UserSkill
+
+
+# Индекс совпадений. Удаление Proposal/Request чистит запись каскадом.
+
+@receiver(post_save, sender=Proposal)
+@receiver(post_save, sender=Request)
+def update_match_index(sender, instance, raw=False, **kwargs):
+    if not raw:
+        matching.index_source(instance)
+
+
+@receiver(post_save, sender=Skill)
+def update_match_index_for_skill(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and not created:
+        matching.reindex_skill(instance)
+
+
+# Поиск цепочек обмена просматривает только предложения, изменённые с
+# прошлого запуска, поэтому всё, что меняет граф, «трогает» updated_at.
+
+@receiver(post_save, sender=UserSkill)
+@receiver(post_delete, sender=UserSkill)
+def touch_proposals_of_user(sender, instance, raw=False, **kwargs):
+    if not raw:
+        Proposal.objects.filter(user_id=instance.user_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Exchange)
+def touch_released_proposal(sender, instance, raw=False, **kwargs):
+    if not raw and instance.proposal_id and instance.status == 'отклонён':
+        Proposal.objects.filter(pk=instance.proposal_id).update(updated_at=timezone.now())
+
+
+# Агрегат рейтинга пользователя. Review.save() оборачивает сохранение в
+# транзакцию, удаление и так идёт в транзакции Collector.
+
+@receiver(pre_save, sender=Review)
+def remember_review_rating(sender, instance, raw=False, **kwargs):
+    instance._rating_before = None
+    if not raw and instance.pk:
+        instance._rating_before = (
+            Review.objects.filter(pk=instance.pk).values_list('reviewed_user_id', 'rating').first()
+        )
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created=False, raw=False, **kwargs):
+    if not raw:
+        ratings.review_saved(instance, created, getattr(instance, '_rating_before', None))
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    ratings.review_deleted(instance)
+
+
+# Кеш карточек. Версия фрагмента включает updated_at зависимостей, так что
+# устаревшая запись и так не отдаётся; здесь записи удаляются сразу, чтобы
+# не занимать место и не пережить удаление объекта.
+
+@receiver(post_save, sender=Proposal)
+@receiver(post_delete, sender=Proposal)
+def invalidate_proposal_card(sender, instance, **kwargs):
+    fragment_cache.invalidate('proposal', [instance.pk])
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+def invalidate_skill_card(sender, instance, **kwargs):
+    fragment_cache.invalidate('skill', [instance.pk])
+
+
+# вход меняет только last_login и, при пересчёте хеша, password — в
+# карточках и на страницах их нет
+LOGIN_FIELDS = frozenset({'last_login', 'password'})
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_cards(sender, instance, created=False, update_fields=None, **kwargs):
+    if created or (update_fields and update_fields <= LOGIN_FIELDS):
+        return
+    fragment_cache.invalidate('proposal', instance.proposals.values_list('pk', flat=True).iterator())
+
+
+@receiver(post_save, sender=Category)
+def invalidate_category_cards(sender, instance, created=False, **kwargs):
+    if not created:
+        fragment_cache.invalidate('skill', instance.skills.values_list('pk', flat=True).iterator())
+
+
+# Кеш страниц. Любая запись в то, что видно на главной и в списках,
+# сдвигает общую версию содержимого.
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+@receiver(post_save, sender=Proposal)
+@receiver(post_delete, sender=Proposal)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=User)
+def bump_content_version(sender, **kwargs):
+    page_cache.bump_version()
+
+
+@receiver(post_save, sender=User)
+def bump_content_version_for_user(sender, instance, update_fields=None, **kwargs):
+    if not (update_fields and update_fields <= LOGIN_FIELDS):
+        page_cache.bump_version()
+
+
+# Пользователь сессии закеширован (core/auth_cache.py); UPDATE через F()
+# сбрасывают его сами.
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    auth_cache.forget([instance.pk])
+
+
+# Поисковый индекс. Названия навыков входят в текст предложений с ними.
+
+@receiver(post_save, sender=Skill)
+@receiver(post_save, sender=Proposal)
+@receiver(post_save, sender=Category)
+def update_search_index(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_object(instance)
+
+
+@receiver(post_save, sender=Skill)
+def update_search_index_for_skill(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and not created:
+        search.reindex_proposals_of_skill(instance)
+
+
+@receiver(post_delete, sender=Skill)
+@receiver(post_delete, sender=Proposal)
+@receiver(post_delete, sender=Category)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.remove_object(instance)
+
+
+# Автодополнение навыков. Индекс живёт в памяти процесса, поэтому
+# меняется только после фиксации транзакции.
+
+@receiver(post_save, sender=Skill)
+def update_autocomplete(sender, instance, raw=False, **kwargs):
+    if not raw:
+        values = (instance.pk, instance.name, instance.level, instance.category_id)
+        transaction.on_commit(lambda: autocomplete.skill_saved(*values))
+
+
+@receiver(post_delete, sender=Skill)
+def remove_from_autocomplete(sender, instance, **kwargs):
+    # после удаления Django обнуляет pk экземпляра
+    pk = instance.pk
+    transaction.on_commit(lambda: autocomplete.skill_deleted(pk))
+
+
+@receiver(post_save, sender=Category)
+def update_autocomplete_category(sender, instance, raw=False, **kwargs):
+    if not raw:
+        values = (instance.pk, instance.name)
+        transaction.on_commit(lambda: autocomplete.category_saved(*values))
+
+
+# Счётчик непрочитанных. Пакетные пути (bulk_create в чате, отметка
+# прочтения одним UPDATE) сдвигают его сами, см. core/unread.py.
+
+@receiver(pre_save, sender=Message)
+def remember_message_state(sender, instance, raw=False, **kwargs):
+    instance._unread_before = None
+    if not raw and instance.pk:
+        instance._unread_before = (
+            Message.objects.filter(pk=instance.pk).values_list('receiver_id', 'is_read').first()
+        )
+
+
+@receiver(post_save, sender=Message)
+def update_unread_on_save(sender, instance, created=False, raw=False, **kwargs):
+    if not raw:
+        unread.message_saved(instance, created, getattr(instance, '_unread_before', None))
+
+
+@receiver(post_delete, sender=Message)
+def update_unread_on_delete(sender, instance, **kwargs):
+    unread.message_deleted(instance)
+
+
+# Места на мероприятиях. Регистрация и отмена идут через core/events.py,
+# здесь — удаление участия (в том числе каскадом от пользователя) и
+# изменение лимита.
+
+@receiver(post_delete, sender=EventParticipation)
+def release_event_seat(sender, instance, **kwargs):
+    events.participation_deleted(instance)
+
+
+@receiver(post_save, sender=Event)
+def fill_event_seats(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and not created:
+        events.fill_from_waitlist(instance)
+
+
+# Дневные счётчики календаря мероприятий.
+
+@receiver(pre_save, sender=Event)
+def remember_event_day(sender, instance, raw=False, **kwargs):
+    instance._day_before = None
+    if not raw and instance.pk:
+        instance._day_before = Event.objects.filter(pk=instance.pk).values_list('event_date', 'category_id').first()
+
+
+@receiver(post_save, sender=Event)
+def update_event_day_count(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_day_before', None)
+    if created or previous != (instance.event_date, instance.category_id):
+        event_calendar.event_saved(instance, created, previous)
+
+
+@receiver(post_delete, sender=Event)
+def remove_event_day_count(sender, instance, **kwargs):
+    event_calendar.event_deleted(instance)
+
+
+@receiver(pre_delete, sender=Category)
+def move_event_day_counts(sender, instance, **kwargs):
+    event_calendar.category_deleted(instance.pk)
@@ -0,0 +1,69 @@
+from typing import NamedTuple
+
+from django.db import models
+from django.urls import URLPattern, get_resolver, reverse
+from django.utils import timezone
+
+from . import event_calendar
+from .models import Event, Exchange, Proposal, Skill
+
+
+class SampleRequest(NamedTuple):
+    name: str
+    method: str
+    url: str
+    data: dict
+
+
+# маршруты, которые принимают только POST
+POST_ONLY = {'logout', 'event_register', 'event_cancel'}
+
+# маршруты под staff_member_required
+STAFF_ONLY = {'cache_stats', 'query_stats'}
+
+
+def _route_args(user):
+    """Аргументы маршрутов с параметрами — из объектов, доступных пользователю."""
+    exchange = Exchange.objects.filter(models.Q(user1=user) | models.Q(user2=user)).order_by('pk').first()
+    own_proposal = Proposal.objects.filter(user=user).order_by('pk').first()
+    other_proposal = Proposal.objects.exclude(user=user).order_by('pk').first()
+    event = Event.objects.filter(event_date__gte=timezone.localdate()).order_by('event_date', 'id').first()
+    args = {
+        'proposal_matches': own_proposal and [own_proposal.pk],
+        'exchange_chat': exchange and [exchange.pk],
+        'message_history': exchange and [exchange.pk],
+        'message_export': exchange and [exchange.pk],
+        'exchange_create_from_proposal': other_proposal and [other_proposal.pk],
+        'event_register': event and [event.pk],
+        'event_cancel': event and [event.pk],
+        'event_feed': [event_calendar.feed_token(user)],
+    }
+    return {name: value for name, value in args.items() if value}
+
+
+def _query_word():
+    name = Skill.objects.order_by('pk').values_list('name', flat=True).first()
+    return name.split()[0] if name else 'python'
+
+
+def sample_requests(user):
+    """
+    По запросу на каждый маршрут core/urls.py в порядке объявления.
+    Маршрут с параметрами, для которого у пользователя нет объекта,
+    пропускается. Запросы могут писать в базу (создание обмена, запись на
+    мероприятие) — вызывающий откатывает их сам.
+    """
+    args = _route_args(user)
+    word = _query_word()
+    data = {'search': {'q': word}, 'skill_autocomplete': {'q': word[:3]}}
+    requests = []
+    for pattern in get_resolver('core.urls').url_patterns:
+        if not isinstance(pattern, URLPattern) or not pattern.name:
+            continue
+        if pattern.pattern.converters and pattern.name not in args:
+            continue
+        url = reverse(pattern.name, args=args.get(pattern.name))
+        method = 'post' if pattern.name in POST_ONLY else 'get'
+        requests.append(SampleRequest(pattern.name, method, url, data.get(pattern.name, {})))
+    # register объявлен дважды
+    return list({request.url: request for request in requests}.values())
@@ -0,0 +1,63 @@
+import logging
+import os
+import time
+
+from django.template import TemplateSyntaxError, engines
+from django.template.utils import get_app_template_dirs
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = ('.html', '.txt')
+
+
+def _engine():
+    return engines['django'].engine
+
+
+def template_names(include_apps=False):
+    """
+    Имена шаблонов из DIRS (core/templates) и при include_apps — из templates/
+    приложений: [(имя, свой ли шаблон)]. Одно имя в нескольких каталогах
+    загрузчик всё равно найдёт один раз.
+    """
+    engine = _engine()
+    dirs = [(root, True) for root in engine.dirs]
+    if include_apps:
+        dirs += [(root, False) for root in get_app_template_dirs('templates')]
+    names = {}
+    for root, own in dirs:
+        for path, _, files in os.walk(root):
+            for filename in sorted(files):
+                if filename.endswith(EXTENSIONS):
+                    name = os.path.relpath(os.path.join(path, filename), root).replace(os.sep, '/')
+                    names.setdefault(name, own)
+    return list(names.items())
+
+
+def reset():
+    """Очищает кеш разобранных шаблонов (cached.Loader) — следующий рендер снова читает файлы."""
+    for loader in _engine().template_loaders:
+        if hasattr(loader, 'reset'):
+            loader.reset()
+
+
+def warm(include_apps=False):
+    """
+    Разбирает шаблоны заранее, чтобы первый запрос к воркеру не платил за
+    чтение и разбор base.html, components/* и страницы. Имеет смысл только
+    с cached.Loader. Возвращает [(имя, свой ли шаблон, секунды, ошибка или None)].
+    """
+    engine = _engine()
+    result = []
+    for name, own in template_names(include_apps):
+        started = time.perf_counter()
+        error = None
+        try:
+            engine.get_template(name)
+        except TemplateSyntaxError as exc:
+            error = str(exc).splitlines()[0]
+            # jazzmin несёт шаблоны для пакетов, которых у нас нет (mptt, filer)
+            if own:
+                logger.error('Шаблон %s не разобран: %s', name, error)
+        result.append((name, own, time.perf_counter() - started, error))
+    return result
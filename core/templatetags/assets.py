@@ -0,0 +1,17 @@
+from django import template
+from django.utils.html import format_html_join
+
+from core import assets
+
+register = template.Library()
+
+
+@register.simple_tag
+def css_bundle(name):
+    """
+    {% css_bundle "profile" %}
+
+    Ссылка на собранный бандл из core/assets.py или, пока сборки нет
+    (python manage.py build_assets), на его исходные файлы.
+    """
+    return format_html_join('\n    ', '<link rel="stylesheet" href="{}">', ((url,) for url in assets.bundle_urls(name)))
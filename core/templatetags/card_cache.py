@@ -0,0 +1,46 @@
+from django import template
+
+from core import fragment_cache
+
+register = template.Library()
+
+
+class CardCacheNode(template.Node):
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        key_id, version = fragment_cache.identify([value.resolve(context) for value in self.vary_on])
+        prefetched = context.get('card_cache')
+        if prefetched is not None and prefetched.name == name:
+            html = prefetched.get(key_id, version)
+        else:
+            html = fragment_cache.get(name, key_id, version)
+        if html is None:
+            html = self.nodelist.render(context)
+            fragment_cache.set(name, key_id, version, html)
+        return html
+
+
+@register.tag
+def cardcache(parser, token):
+    """
+    {% cardcache "proposal" proposal proposal.user ... %}...{% endcardcache %}
+
+    Кеширует фрагмент по id первого объекта; версия складывается из
+    updated_at всех перечисленных объектов. Если в контексте есть card_cache
+    (fragment_cache.prefetch) для этого имени, фрагмент берётся из него.
+    """
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' требует имя фрагмента и хотя бы один объект")
+    nodelist = parser.parse(('endcardcache',))
+    parser.delete_first_token()
+    return CardCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+    )
@@ -1,3 +1,386 @@
-from django.test import TestCase
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
 
-# Create your tests here.
+from . import events, jobs, ledger, login_throttle, page_cache, unread
+from .models import AdminJob, Category, Event, EventParticipation, Exchange, Message, Point, PointTransaction, Proposal, Request, Skill, User, UserSkill
+from .pagination import InvalidCursor, KeysetPaginator, encode_cursor
+from .query_budget import assert_constant_queries
+
+
+class ConstantQueriesTests(TestCase):
+    """Число запросов страниц со списками не должно расти вместе с числом строк (N+1)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner@example.com', 'Владелец')
+        cls.category = Category.objects.create(name='Языки')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.rows = 0
+
+    def skill(self, name):
+        return Skill.objects.create(name=name, level='новичок', category=self.category)
+
+    def add_exchange(self):
+        # у каждого обмена свой партнёр, свои навыки и своё предложение или
+        # запрос: без select_related каждая связь — отдельный запрос на строку
+        number = self.rows
+        partner = User.objects.create_user(f'partner{number}@example.com', f'Партнёр {number}')
+        offered = self.skill(f'Навык {number}')
+        wanted = self.skill(f'Нужный навык {number}')
+        if number % 2:
+            request = Request.objects.create(user=partner, skill_wanted=wanted, skill_offered=offered)
+            Exchange.objects.create(user1=partner, user2=self.user, request=request)
+        else:
+            proposal = Proposal.objects.create(user=self.user, skill_offered=offered, skill_wanted=wanted)
+            Exchange.objects.create(user1=self.user, user2=partner, proposal=proposal)
+        UserSkill.objects.create(user=self.user, skill=offered)
+        self.rows += 1
+
+    def grow(self, size):
+        while self.rows < size:
+            self.add_exchange()
+
+    def assert_constant(self, name):
+        url = reverse(name)
+        # первый запрос заполняет кеши сессии и счётчика непрочитанных —
+        # дальше их чтение число запросов не меняет (пользователя внутри
+        # транзакции теста auth_cache не кеширует, он читается каждый раз)
+        self.client.get(url)
+        assert_constant_queries(
+            lambda: self.assertEqual(self.client.get(url).status_code, 200),
+            self.grow,
+            sizes=(2, 10),
+        )
+
+    def test_exchanges_list(self):
+        self.assert_constant('exchanges_list')
+
+    def test_profile(self):
+        self.assert_constant('profile')
+
+
+class LedgerTests(TestCase):
+    """Баланс очков не уходит в минус, начисление за обмен — одно на участника."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.payer = User.objects.create_user('payer@example.com', 'Плательщик')
+        cls.payee = User.objects.create_user('payee@example.com', 'Получатель')
+
+    def balance(self, user):
+        return Point.objects.filter(user=user).values_list('balance', flat=True).first() or 0
+
+    def transfer(self, amount):
+        return ledger.post_batch([
+            PointTransaction(user=self.payer, amount=-amount, reason='ручная корректировка'),
+            PointTransaction(user=self.payee, amount=amount, reason='ручная корректировка'),
+        ])
+
+    def test_transfer(self):
+        ledger.post(self.payer, 10, 'ручная корректировка')
+        self.transfer(10)
+        self.assertEqual((self.balance(self.payer), self.balance(self.payee)), (0, 10))
+
+    def test_overdraft_transfer_rolls_back(self):
+        ledger.post(self.payer, 10, 'ручная корректировка')
+        with self.assertRaises(ledger.InsufficientPoints):
+            self.transfer(15)
+        # зачисление получателю в той же пачке тоже откатилось
+        self.assertEqual((self.balance(self.payer), self.balance(self.payee)), (10, 0))
+        self.assertEqual(PointTransaction.objects.count(), 1)
+
+    def test_reward_is_posted_once(self):
+        exchange = Exchange.objects.create(user1=self.payer, user2=self.payee, status='завершён')
+        Exchange.objects.create(user1=self.payee, user2=self.payer)
+        self.assertEqual(ledger.reward_completed_exchanges(5), 2)
+        self.assertEqual(ledger.reward_completed_exchanges(5), 0)
+        self.assertEqual((self.balance(self.payer), self.balance(self.payee)), (5, 5))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ledger.post(self.payer, 5, ledger.REWARD_REASON, exchange=exchange)
+
+
+class UnreadCounterTests(TestCase):
+    """Счётчик непрочитанных сдвигается UPDATE через F() на каждом пути изменения сообщений."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sender = User.objects.create_user('sender@example.com', 'Отправитель')
+        cls.receiver = User.objects.create_user('receiver@example.com', 'Получатель')
+        cls.exchange = Exchange.objects.create(user1=cls.sender, user2=cls.receiver)
+
+    def setUp(self):
+        unread._cache().delete_many([unread._key(self.sender.pk), unread._key(self.receiver.pk)])
+
+    def counts(self):
+        stored = dict(User.objects.filter(pk__in=[self.sender.pk, self.receiver.pk]).values_list('pk', 'unread_messages_count'))
+        return stored[self.sender.pk], stored[self.receiver.pk]
+
+    def send(self, receiver=None, **kwargs):
+        receiver = receiver or self.receiver
+        sender = self.sender if receiver == self.receiver else self.receiver
+        return Message.objects.create(exchange=self.exchange, sender=sender, receiver=receiver, text='Привет', **kwargs)
+
+    def test_save_and_delete(self):
+        message = self.send()
+        self.send(is_read=True)
+        self.assertEqual(self.counts(), (0, 1))
+        message.is_read = True
+        message.save()
+        self.assertEqual(self.counts(), (0, 0))
+        # непрочитанное переадресовано: минус старому получателю, плюс новому
+        message = self.send()
+        message.receiver = self.sender
+        message.save()
+        self.assertEqual(self.counts(), (1, 0))
+        message.delete()
+        self.assertEqual(self.counts(), (0, 0))
+
+    def test_bulk_create_and_mark_read(self):
+        messages = Message.objects.bulk_create(
+            Message(exchange=self.exchange, sender=self.sender, receiver=self.receiver, text=str(number))
+            for number in range(3)
+        )
+        unread.messages_created(messages)
+        self.assertEqual(self.counts(), (0, 3))
+        self.assertEqual(unread.mark_exchange_read(self.receiver, self.exchange), 3)
+        self.assertEqual(unread.mark_exchange_read(self.receiver, self.exchange), 0)
+        self.assertEqual(self.counts(), (0, 0))
+
+    def test_recompute_all(self):
+        self.send()
+        self.send(receiver=self.sender)
+        User.objects.update(unread_messages_count=7)
+        unread.recompute_all()
+        self.assertEqual(self.counts(), (1, 1))
+
+    def test_cache_reset_on_commit(self):
+        self.assertEqual(unread.unread_count(self.receiver), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.send()
+        self.assertEqual(unread.unread_count(self.receiver), 1)
+
+
+class EventSeatsTests(TestCase):
+    """Подтверждённых не больше max_participants, освободившееся место уходит первому в очереди."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_user(f'guest{number}@example.com', f'Гость {number}') for number in range(4)]
+        cls.event = Event.objects.create(
+            title='Встреча', organizer=cls.users[0], event_date=timezone.localdate(), max_participants=2,
+        )
+
+    def statuses(self):
+        return list(
+            EventParticipation.objects.filter(event=self.event).order_by('user_id').values_list('status', flat=True)
+        )
+
+    def confirmed_count(self):
+        self.event.refresh_from_db(fields=['confirmed_count'])
+        return self.event.confirmed_count
+
+    def register_all(self):
+        for user in self.users:
+            events.register(user, self.event)
+
+    def test_over_capacity_goes_to_waitlist(self):
+        self.register_all()
+        self.assertEqual(self.statuses(), [events.CONFIRMED] * 2 + [events.WAITING] * 2)
+        self.assertEqual(self.confirmed_count(), 2)
+        # повторная запись не занимает второе место
+        self.assertEqual(events.register(self.users[0], self.event).status, events.CONFIRMED)
+        self.assertEqual(self.confirmed_count(), 2)
+
+    def test_cancel_promotes_first_waiting(self):
+        self.register_all()
+        self.assertTrue(events.cancel(self.users[0], self.event))
+        self.assertEqual(self.statuses(), [events.DECLINED, events.CONFIRMED, events.CONFIRMED, events.WAITING])
+        self.assertEqual(self.confirmed_count(), 2)
+        # удаление подтверждённого участия тоже отдаёт место очереди
+        EventParticipation.objects.get(event=self.event, user=self.users[1]).delete()
+        self.assertEqual(self.statuses(), [events.DECLINED, events.CONFIRMED, events.CONFIRMED])
+        self.assertEqual(self.confirmed_count(), 2)
+        events.cancel(self.users[2], self.event)
+        self.assertEqual(self.confirmed_count(), 1)
+
+    def test_fill_from_waitlist(self):
+        self.register_all()
+        Event.objects.filter(pk=self.event.pk).update(max_participants=5)
+        self.assertEqual(events.fill_from_waitlist(self.event), 2)
+        self.assertEqual(self.statuses(), [events.CONFIRMED] * 4)
+        self.assertEqual(self.confirmed_count(), 4)
+        self.assertEqual(events.fill_from_waitlist(self.event), 0)
+        self.assertEqual(self.confirmed_count(), 4)
+
+
+class JobClaimTests(TestCase):
+    """Задачу из очереди получает один воркер; брошенную подбирает другой, не повторяя сделанного."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_user(f'member{number}@example.com', f'Участник {number}') for number in range(3)]
+
+    def award(self):
+        return jobs.enqueue('award_points', [user.pk for user in self.users], {'amount': 5})
+
+    def abandon(self, job):
+        AdminJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - jobs.STALE_AFTER * 2)
+
+    def test_claim_oldest_once(self):
+        first, second = self.award(), self.award()
+        self.assertEqual(jobs.claim().pk, first.pk)
+        self.assertEqual(jobs.claim().pk, second.pk)
+        # выполняющиеся задачи со свежим heartbeat никто не забирает
+        self.assertIsNone(jobs.claim())
+
+    def test_stale_job_is_reclaimed(self):
+        job = self.award()
+        jobs.claim()
+        self.abandon(job)
+        reclaimed = jobs.claim()
+        self.assertEqual((reclaimed.pk, reclaimed.attempts), (job.pk, 2))
+        self.assertIsNone(jobs.claim())
+
+    def test_run_in_chunks_and_stop_when_taken_over(self):
+        job = self.award()
+        stalled = jobs.claim()
+        self.abandon(job)
+        worker = jobs.claim()
+        worker = jobs.run(worker, chunk_size=2)
+        self.assertEqual((worker.status, worker.processed, worker.affected), (jobs.DONE, 3, 3))
+        # первый воркер очнулся: его прогресс устарел, он ничего не повторяет
+        jobs.run(stalled, chunk_size=2)
+        self.assertEqual(PointTransaction.objects.count(), 3)
+        self.assertEqual(set(Point.objects.values_list('balance', flat=True)), {5})
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed, job.affected), (jobs.DONE, 3, 3))
+
+
+@override_settings(
+    LOGIN_THROTTLE={'ip': (5, 60), 'email': (3, 60)},
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class LoginThrottleTests(TestCase):
+    """После лимита попыток вход отклоняется с 429 ещё до проверки пароля."""
+
+    ADDRESSES = ['192.0.2.1', '192.0.2.2', '192.0.2.3']
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('login@example.com', 'Входящий', password='верный-пароль')
+
+    def setUp(self):
+        self.addCleanup(login_throttle.reset, 'ip', self.ADDRESSES)
+        self.addCleanup(login_throttle.reset, 'email', [self.user.email, 'other@example.com'])
+
+    def login(self, password, email=None, address=ADDRESSES[0]):
+        return self.client.post(
+            reverse('login'), {'username': email or self.user.email, 'password': password}, REMOTE_ADDR=address,
+        ).status_code
+
+    def test_email_lockout(self):
+        # с разных адресов: срабатывает ограничение на email, а не на ip
+        for address in self.ADDRESSES:
+            self.assertEqual(self.login('неверный', address=address), 200)
+        self.assertEqual(self.login('верный-пароль', address=self.ADDRESSES[1]), 429)
+        self.assertEqual(self.login('неверный', email='other@example.com', address=self.ADDRESSES[2]), 200)
+
+    def test_ip_lockout(self):
+        for number in range(5):
+            self.assertEqual(self.login('неверный', email=f'guess{number}@example.com'), 200)
+        self.assertEqual(self.login('верный-пароль'), 429)
+        self.assertEqual(self.login('верный-пароль', address=self.ADDRESSES[1]), 302)
+
+    def test_window_slides(self):
+        now = 60 * 20_000
+        self.addCleanup(login_throttle.reset, 'email', [self.user.email], now=now + 60)
+        for _ in range(3):
+            login_throttle.hit('email', self.user.email, now=now)
+        self.assertTrue(login_throttle.exceeded('email', self.user.email, now=now + 59))
+        # прошлое окно учитывается с весом той доли, что ещё в окне: 3 * 0.5
+        self.assertEqual(login_throttle.count('email', self.user.email, now=now + 90), 1.5)
+        self.assertFalse(login_throttle.exceeded('email', self.user.email, now=now + 120))
+
+
+class KeysetPaginatorTests(TestCase):
+    """Листание курсорами вперёд и назад проходит каждую строку ровно раз, в том числе при равных ключах."""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('feed@example.com', 'Автор')
+        category = Category.objects.create(name='Музыка')
+        skill = Skill.objects.create(name='Гитара', level='новичок', category=category)
+        for _ in range(7):
+            Proposal.objects.create(user=user, skill_offered=skill, skill_wanted=skill)
+        # у части строк одинаковое время: порядок держится на id
+        moment = timezone.now()
+        Proposal.objects.filter(pk__in=list(Proposal.objects.values_list('pk', flat=True)[:4])).update(created_at=moment)
+        cls.expected = list(Proposal.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+
+    def setUp(self):
+        self.paginator = KeysetPaginator(Proposal.objects.all(), per_page=3)
+
+    def ids(self, page):
+        return [proposal.pk for proposal in page]
+
+    def test_forward_and_back(self):
+        pages = [self.paginator.page()]
+        self.assertFalse(pages[0].has_previous)
+        while pages[-1].has_next:
+            pages.append(self.paginator.page(pages[-1].next_cursor))
+        self.assertEqual([self.ids(page) for page in pages], [self.expected[0:3], self.expected[3:6], self.expected[6:]])
+
+        back = [pages[-1]]
+        while back[-1].has_previous:
+            back.append(self.paginator.page(back[-1].prev_cursor))
+        self.assertEqual([self.ids(page) for page in reversed(back)], [self.ids(page) for page in pages])
+
+    def test_invalid_cursor(self):
+        for cursor in ('не-курсор', encode_cursor('next', [1]), encode_cursor('next', ['вчера', 1])):
+            with self.assertRaises(InvalidCursor):
+                self.paginator.page(cursor)
+
+
+class PageCacheTests(TestCase):
+    """Страница отдаётся из кеша, на совпавший ETag — 304 без рендера, запись в базу сбрасывает обе копии."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Спорт')
+        cls.reader = User.objects.create_user('reader@example.com', 'Читатель')
+        Skill.objects.create(name='Бег', level='новичок', category=cls.category)
+
+    def setUp(self):
+        page_cache.bump_version()
+        self.url = reverse('skills_list')
+
+    def test_etag_and_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('public', response['Cache-Control'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            cached = self.client.get(self.url)
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached['ETag'], etag)
+
+    def test_write_changes_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        Skill.objects.create(name='Плавание', level='новичок', category=self.category)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'Плавание')
+
+    def test_logged_in_variant_is_private(self):
+        anonymous = self.client.get(self.url)['ETag']
+        self.client.force_login(self.reader)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=anonymous)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertNotEqual(response['ETag'], anonymous)
@@ -0,0 +1,122 @@
+from collections import Counter
+from itertools import groupby
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
+
+from . import auth_cache
+from .models import Message, User
+
+UNREAD_CACHE_ALIAS = getattr(settings, 'UNREAD_CACHE_ALIAS', 'default')
+CACHE_TIMEOUT = 300
+
+
+def _cache():
+    return caches[UNREAD_CACHE_ALIAS]
+
+
+def _key(user_id):
+    return f'unread-messages:{user_id}'
+
+
+def forget(user_ids):
+    """Сбрасывает закешированные счётчики после фиксации транзакции."""
+    keys = [_key(user_id) for user_id in user_ids]
+    if keys:
+        transaction.on_commit(lambda: _cache().delete_many(keys))
+
+
+def apply_deltas(deltas):
+    """
+    Сдвигает счётчики {user_id: delta} атомарными UPDATE через F(), по
+    одному на величину сдвига. Кеш счётчиков сбрасывается после фиксации.
+    """
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    for delta, group in groupby(sorted(deltas.items(), key=lambda item: item[1]), key=lambda item: item[1]):
+        user_ids = [user_id for user_id, _ in group]
+        User.objects.filter(pk__in=user_ids).update(
+            unread_messages_count=models.F('unread_messages_count') + delta
+        )
+    forget(deltas)
+    auth_cache.forget(deltas)
+
+
+def message_saved(message, created, previous=None):
+    deltas = Counter()
+    if not created and previous is not None:
+        old_receiver_id, old_is_read = previous
+        if not old_is_read:
+            deltas[old_receiver_id] -= 1
+    if not message.is_read:
+        deltas[message.receiver_id] += 1
+    apply_deltas(deltas)
+
+
+def message_deleted(message):
+    if not message.is_read:
+        apply_deltas({message.receiver_id: -1})
+
+
+def messages_created(messages):
+    """Для сообщений, вставленных bulk_create (сигналы post_save не шлются)."""
+    apply_deltas(Counter(message.receiver_id for message in messages if not message.is_read))
+
+
+def mark_exchange_read(user, exchange):
+    """
+    Отмечает прочитанными все входящие сообщения пользователя в обмене
+    одним UPDATE по частичному индексу. Возвращает число отмеченных.
+    """
+    user_id = getattr(user, 'pk', user)
+    exchange_id = getattr(exchange, 'pk', exchange)
+    with transaction.atomic():
+        # UPDATE отмечает каждую строку один раз, так что число строк
+        # точное и при параллельных вызовах
+        marked = Message.objects.filter(exchange_id=exchange_id, receiver_id=user_id, is_read=False).update(is_read=True)
+        apply_deltas({user_id: -marked})
+    return marked
+
+
+def unread_count(user):
+    """Число непрочитанных из кеша; при промахе — одно чтение по первичному ключу."""
+    if not user.is_authenticated:
+        return 0
+    cache = _cache()
+    key = _key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = User.objects.filter(pk=user.pk).values_list('unread_messages_count', flat=True).first() or 0
+        cache.set(key, count, CACHE_TIMEOUT)
+    return count
+
+
+async def aunread_count(user):
+    """unread_count() для async-вьюх."""
+    if not user.is_authenticated:
+        return 0
+    cache = _cache()
+    key = _key(user.pk)
+    count = await cache.aget(key)
+    if count is None:
+        count = await User.objects.filter(pk=user.pk).values_list('unread_messages_count', flat=True).afirst() or 0
+        await cache.aset(key, count, CACHE_TIMEOUT)
+    return count
+
+
+def recompute_all():
+    """Пересчитывает счётчики всех пользователей по сообщениям."""
+    actual = Message.objects.filter(receiver=models.OuterRef('pk'), is_read=False).order_by().values('receiver')
+    with transaction.atomic():
+        updated = User.objects.update(
+            unread_messages_count=Coalesce(
+                models.Subquery(actual.annotate(count=models.Count('pk')).values('count')), 0
+            )
+        )
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    forget(user_ids)
+    auth_cache.forget(user_ids)
+    return updated
@@ -14,21 +14,41 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.urls import path
 from . import views
 from django.contrib.auth import views as auth_views
 
+# страницы только для чтения: под ASGI — async-версии (core/async_views.py)
+if settings.ASYNC_VIEWS:
+    from . import async_views as read_views
+else:
+    read_views = views
+
 urlpatterns = [
-    path('', views.home_view, name='home'),
-    path('skills/', views.skills_list_view, name='skills_list'),
-    path('proposals/', views.proposals_list_view, name='proposals_list'),
-    path('profile/', views.profile_view, name='profile'),
+    path('', read_views.home_view, name='home'),
+    path('skills/', read_views.skills_list_view, name='skills_list'),
+    path('proposals/', read_views.proposals_list_view, name='proposals_list'),
+    path('profile/', read_views.profile_view, name='profile'),
     path('logout/', auth_views.LogoutView.as_view(next_page='home'), name='logout'),
     path('proposals/create/', views.proposal_create_view, name='proposal_create'),
-    path('exchanges/', views.exchanges_list_view, name='exchanges_list'),
+    path('proposals/<int:proposal_id>/matches/', views.proposal_matches_view, name='proposal_matches'),
+    path('exchanges/', read_views.exchanges_list_view, name='exchanges_list'),
+    path('exchanges/<int:exchange_id>/chat/', views.exchange_chat_view, name='exchange_chat'),
+    path('exchanges/<int:exchange_id>/messages/', views.message_history_view, name='message_history'),
+    path('exchanges/<int:exchange_id>/messages/export/', views.message_export_view, name='message_export'),
     path('register/', views.register_view, name='register'),
-    path('login/', auth_views.LoginView.as_view(template_name='login.html'), name='login'),
+    path('login/', views.CustomLoginView.as_view(), name='login'),
     path('exchanges/create/from_proposal/<int:proposal_id>/', views.exchange_create_from_proposal, name='exchange_create_from_proposal'),
     path('skills/add/', views.skill_create_view, name='skill_create'),
     path('register/', views.register_view, name='register'),
+    path('skills/autocomplete/', views.skill_autocomplete_view, name='skill_autocomplete'),
+    path('events/', views.events_list_view, name='events_list'),
+    path('events/calendar/', views.event_calendar_view, name='event_calendar'),
+    path('events/<int:event_id>/register/', views.event_register_view, name='event_register'),
+    path('events/<int:event_id>/cancel/', views.event_cancel_view, name='event_cancel'),
+    path('events/feed/<str:token>.ics', views.event_feed_view, name='event_feed'),
+    path('search/', views.search_view, name='search'),
+    path('cache/stats/', views.cache_stats_view, name='cache_stats'),
+    path('queries/stats/', views.query_stats_view, name='query_stats'),
 ]
\ No newline at end of file
@@ -1,21 +1,39 @@
-from django.shortcuts import render,redirect
+from datetime import timedelta
+
+from django.shortcuts import render,redirect,get_object_or_404
 from django.contrib.auth.views import LoginView
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.contrib.auth import login
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib import messages
 from .models import *
 from .forms import *
 from django.db import models
-from django.urls import reverse_lazy
+from django.utils import timezone
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.views.decorators.http import require_POST
+from .pagination import KeysetPaginator, InvalidCursor
+from .matching import find_matches
+from . import autocomplete, event_calendar, events, fragment_cache, history, search, unread
+from .query_budget import query_budget, stats as query_stats
+from .page_cache import cached_page, versioned
+from .db_routers import read_replica
+
+PROPOSALS_PER_PAGE = 20
+SKILLS_PER_PAGE = 24
 
 class CustomLoginView(LoginView):
     template_name = 'login.html'
     authentication_form = LoginForm
     redirect_authenticated_user = True
 
-    def get_success_url(self):
-        return reverse_lazy('profile')
+    def form_invalid(self, form):
+        response = super().form_invalid(form)
+        if form.throttled:
+            response.status_code = 429
+        return response
 
 def register_view(request):
     if request.method == 'POST':
@@ -64,13 +82,14 @@ def proposal_create_view(request):
     return render(request, 'proposal_create.html', {'form': form})
 
 @login_required
+@query_budget(10)
 def profile_view(request):
     user = request.user
     user_skills = user.user_skills.select_related('skill__category').all()
     user_proposals = Proposal.objects.filter(user=user).select_related('skill_offered', 'skill_wanted')
     user_exchanges = Exchange.objects.filter(
         models.Q(user1=user) | models.Q(user2=user)
-    ).select_related('user1', 'user2', 'proposal', 'request')
+    ).select_related('user1', 'user2')
 
     context = {
         'user': user,
@@ -80,13 +99,57 @@ def profile_view(request):
     }
     return render(request, 'profile.html', context)
 
+@cached_page
+@read_replica
 def proposals_list_view(request):
-    proposals = Proposal.objects.select_related('user', 'skill_offered', 'skill_wanted').all()
-    return render(request, 'proposals_list.html', {'proposals': proposals})
+    filter_form = ProposalFilterForm(request.GET or None)
+    proposals = Proposal.objects.select_related('user', 'skill_offered', 'skill_wanted')
+    if filter_form.is_valid():
+        proposals = filter_form.filter(proposals)
+
+    paginator = KeysetPaginator(proposals, ordering=('-created_at', '-id'), per_page=PROPOSALS_PER_PAGE)
+    try:
+        page = paginator.page(request.GET.get('cursor'))
+    except InvalidCursor:
+        page = paginator.page()
+
+    context = {
+        'proposals': page.object_list,
+        'page': page,
+        'filter_form': filter_form,
+        'card_cache': fragment_cache.prefetch('proposal', page.object_list),
+    }
+    return render(request, 'proposals_list.html', context)
+
+@login_required
+def proposal_matches_view(request, proposal_id):
+    proposal = get_object_or_404(
+        Proposal.objects.select_related('skill_offered', 'skill_wanted'),
+        id=proposal_id,
+        user=request.user,
+    )
+    context = {
+        'proposal': proposal,
+        'matches': find_matches(proposal),
+    }
+    return render(request, 'proposal_matches.html', context)
 
+@cached_page
+@read_replica
 def skills_list_view(request):
-    skills = Skill.objects.select_related('category').all()
-    return render(request, 'skills_list.html', {'skills': skills})
+    skills = Skill.objects.select_related('category')
+    paginator = KeysetPaginator(skills, ordering=('-id',), per_page=SKILLS_PER_PAGE)
+    try:
+        page = paginator.page(request.GET.get('cursor'))
+    except InvalidCursor:
+        page = paginator.page()
+
+    context = {
+        'skills': page.object_list,
+        'page': page,
+        'card_cache': fragment_cache.prefetch('skill', page.object_list),
+    }
+    return render(request, 'skills_list.html', context)
 
 @login_required
 def skill_create_view(request):
@@ -102,8 +165,9 @@ def skill_create_view(request):
     
     return render(request, 'skill_create.html', {'form': form})
 
+@cached_page
 def home_view(request):
-    categories = Category.objects.all()
+    categories = versioned('categories', lambda: list(Category.objects.all()))
     context = {
         "slides": [
             {
@@ -117,15 +181,214 @@ def home_view(request):
     return render(request, 'home.html', context=context)
 
 @login_required
+@query_budget(10)
 def exchanges_list_view(request):
     user = request.user
     exchanges = Exchange.objects.filter(
         models.Q(user1=user) | models.Q(user2=user)
     ).select_related(
-        'user1', 'user2', 'proposal', 'request'
+        'user1', 'user2',
+        'proposal__skill_offered', 'proposal__skill_wanted',
+        'request__skill_offered', 'request__skill_wanted',
     ).order_by('-created_at')
 
     context = {
         'exchanges': exchanges,
     }
-    return render(request, 'exchanges_list.html', context)
\ No newline at end of file
+    return render(request, 'exchanges_list.html', context)
+
+def _participant_exchange(request, exchange_id):
+    return get_object_or_404(
+        Exchange.objects.select_related('user1', 'user2'),
+        models.Q(user1=request.user) | models.Q(user2=request.user),
+        id=exchange_id,
+    )
+
+@login_required
+def exchange_chat_view(request, exchange_id):
+    exchange = _participant_exchange(request, exchange_id)
+    unread.mark_exchange_read(request.user, exchange)
+    page = history.history_page(exchange)
+    context = {
+        'exchange': exchange,
+        'partner': exchange.user2 if exchange.user1_id == request.user.id else exchange.user1,
+        'chat_messages': page.object_list,
+        'older_cursor': page.next_cursor,
+    }
+    return render(request, 'exchange_chat.html', context)
+
+@login_required
+@query_budget(5)
+def message_history_view(request, exchange_id):
+    exchange = _participant_exchange(request, exchange_id)
+    try:
+        per_page = min(max(int(request.GET.get('limit', history.HISTORY_PER_PAGE)), 1), history.HISTORY_MAX_PER_PAGE)
+    except ValueError:
+        per_page = history.HISTORY_PER_PAGE
+    try:
+        page = history.history_page(exchange, request.GET.get('cursor'), per_page)
+    except InvalidCursor as error:
+        return JsonResponse({'error': str(error)}, status=400, json_dumps_params={'ensure_ascii': False})
+    return JsonResponse({
+        'messages': [history.serialize(message) for message in page.object_list],
+        'older': page.next_cursor,
+        'newer': page.prev_cursor,
+    }, json_dumps_params={'ensure_ascii': False})
+
+@login_required
+def message_export_view(request, exchange_id):
+    exchange = _participant_exchange(request, exchange_id)
+    response = StreamingHttpResponse(history.export_lines(exchange), content_type='application/x-ndjson; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="exchange-{exchange.pk}-messages.jsonl"'
+    return response
+
+EVENTS_PER_PAGE = 20
+
+def events_list_view(request):
+    filter_form = EventFilterForm(request.GET or None)
+    queryset = Event.objects.select_related('organizer', 'category')
+    today = timezone.localdate()
+    if filter_form.is_valid():
+        queryset = filter_form.filter(queryset, today)
+    else:
+        queryset = queryset.filter(event_date__gte=today)
+
+    paginator = KeysetPaginator(queryset, ordering=('event_date', 'id'), per_page=EVENTS_PER_PAGE)
+    try:
+        page = paginator.page(request.GET.get('cursor'))
+    except InvalidCursor:
+        page = paginator.page()
+
+    statuses = {}
+    if request.user.is_authenticated and page.object_list:
+        statuses = dict(
+            EventParticipation.objects.filter(user=request.user, event__in=page.object_list)
+            .values_list('event_id', 'status')
+        )
+    for event in page.object_list:
+        event.my_status = statuses.get(event.pk)
+
+    context = {
+        'events': page.object_list,
+        'page': page,
+        'filter_form': filter_form,
+        'feed_token': event_calendar.feed_token(request.user) if request.user.is_authenticated else None,
+    }
+    return render(request, 'events_list.html', context)
+
+@read_replica
+def event_calendar_view(request):
+    today = timezone.localdate()
+    try:
+        year, month = map(int, request.GET.get('month', '').split('-'))
+        # соседние месяцы и недели сетки должны оставаться в пределах date
+        if not 2 <= year <= 9998:
+            raise ValueError(year)
+        first = today.replace(year=year, month=month, day=1)
+    except ValueError:
+        first = today.replace(day=1)
+
+    category_id = request.GET.get('category', '')
+    category = Category.objects.filter(pk=category_id).first() if category_id.isdigit() else None
+
+    previous = (first - timedelta(days=1)).replace(day=1)
+    following = (first + timedelta(days=32)).replace(day=1)
+    context = {
+        'weeks': event_calendar.month_grid(first.year, first.month, category),
+        'month': first,
+        'previous_month': previous,
+        'next_month': following,
+        'today': today,
+        'category': category,
+        'categories': versioned('categories:by-name', lambda: list(Category.objects.order_by('name'))),
+    }
+    return render(request, 'event_calendar.html', context)
+
+def _back_to_events(request):
+    target = request.POST.get('next')
+    if target and url_has_allowed_host_and_scheme(target, {request.get_host()}, request.is_secure()):
+        return redirect(target)
+    return redirect('events_list')
+
+@login_required
+@require_POST
+def event_register_view(request, event_id):
+    event = get_object_or_404(Event, id=event_id)
+    if event.event_date < timezone.localdate():
+        messages.error(request, '❌ Мероприятие уже прошло.')
+        return _back_to_events(request)
+    participation = events.register(request.user, event)
+    if participation.status == events.CONFIRMED:
+        messages.success(request, f'✅ Вы записаны на «{event.title}».')
+    else:
+        messages.info(request, f'⏳ Мест на «{event.title}» нет — вы в листе ожидания.')
+    return _back_to_events(request)
+
+@login_required
+@require_POST
+def event_cancel_view(request, event_id):
+    event = get_object_or_404(Event, id=event_id)
+    if events.cancel(request.user, event):
+        messages.success(request, f'Запись на «{event.title}» отменена.')
+    return _back_to_events(request)
+
+def event_feed_view(request, token):
+    user = event_calendar.user_from_token(token)
+    if user is None:
+        raise Http404
+    response = StreamingHttpResponse(
+        event_calendar.ics_lines(user, request.get_host()), content_type='text/calendar; charset=utf-8'
+    )
+    response['Content-Disposition'] = 'inline; filename="skillswap-events.ics"'
+    return response
+
+@staff_member_required
+def cache_stats_view(request):
+    return JsonResponse({'fragments': fragment_cache.stats()})
+
+@staff_member_required
+def query_stats_view(request):
+    return JsonResponse({'views': query_stats()})
+
+SEARCH_LIMIT = 50
+
+def search_view(request):
+    query = request.GET.get('q', '').strip()
+    kinds = [kind for kind in request.GET.getlist('kind') if kind in search.KIND_CODES]
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), SEARCH_LIMIT)
+    except ValueError:
+        limit = 20
+
+    results = [
+        {
+            'kind': hit.kind,
+            'id': hit.object.pk,
+            'title': hit.title,
+            'description': (getattr(hit.object, 'description', None) or '')[:200],
+            'score': round(hit.score, 3),
+        }
+        for hit in search.search(query, kinds or None, limit)
+    ]
+    return JsonResponse({'query': query, 'results': results}, json_dumps_params={'ensure_ascii': False})
+
+def skill_autocomplete_view(request):
+    query = request.GET.get('q', '')
+    try:
+        limit = int(request.GET.get('limit', 10))
+    except ValueError:
+        limit = 10
+
+    allowed = None
+    if request.GET.get('scope') == 'mine':
+        # предложить можно только свой навык
+        if not request.user.is_authenticated:
+            return JsonResponse({'results': []})
+        allowed = set(request.user.user_skills.values_list('skill_id', flat=True))
+
+    levels = dict(Skill.LEVEL_CHOICES)
+    results = [
+        {'id': pk, 'name': name, 'level': level, 'level_display': levels.get(level, level), 'category': category}
+        for pk, name, level, category in autocomplete.lookup(query, limit, allowed)
+    ]
+    return JsonResponse({'results': results}, json_dumps_params={'ensure_ascii': False})
@@ -9,8 +9,40 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'skillswap.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# шаблоны разбираем до первого запроса, а не на нём
+if settings.TEMPLATE_WARMUP:
+    from core.template_warmup import warm
+
+    warm()
+
+# импорт после настройки Django: чат использует модели
+from core.chat.app import chat_application  # noqa: E402
+from core.chat.writer import get_writer  # noqa: E402
+
+
+async def lifespan(scope, receive, send):
+    while True:
+        event = await receive()
+        if event['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif event['type'] == 'lifespan.shutdown':
+            # дописываем накопленные сообщения чата перед остановкой
+            await get_writer().close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        await chat_application(scope, receive, send)
+    elif scope['type'] == 'lifespan':
+        await lifespan(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -28,6 +28,7 @@ DEBUG = True
 ALLOWED_HOSTS = ["*"]
 
 AUTH_USER_MODEL = 'core.User'
+LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'profile'
 LOGOUT_REDIRECT_URL = 'home'
 
@@ -46,14 +47,20 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.assets.PrecompressedAssetsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.query_budget.QueryBudgetMiddleware',
 ]
 
+# Бюджет SQL-запросов на ответ; вьюха может задать свой через @query_budget.
+QUERY_BUDGET_DEFAULT = 30
+QUERY_BUDGET_RAISE = os.environ.get('SKILLSWAP_QUERY_BUDGET_RAISE') == '1'
+
 ROOT_URLCONF = 'skillswap.urls'
 
 TEMPLATES = [
@@ -62,29 +69,287 @@ TEMPLATES = [
         'DIRS': [
             BASE_DIR / "core/templates"
         ],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.unread_messages',
+            ],
+            # разобранные шаблоны живут в памяти процесса; runserver сбрасывает
+            # их при правке файла, так что и под DEBUG кеш не мешает
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
             ],
         },
     },
 ]
 
+# Разбирать все шаблоны core/templates при старте воркера (wsgi.py, asgi.py),
+# а не на первых запросах. Проверить и замерить: python manage.py warm_templates
+TEMPLATE_WARMUP = os.environ.get('SKILLSWAP_TEMPLATE_WARMUP', '0' if DEBUG else '1') == '1'
+
 WSGI_APPLICATION = 'skillswap.wsgi.application'
 
+# Главная, навыки, предложения, профиль и обмены — async-вьюхи
+# (core/async_views.py). Включать под ASGI: под WSGI каждая такая вьюха
+# запускает свой цикл событий и только медленнее. Сравнение: bench_asgi.
+ASYNC_VIEWS = os.environ.get('SKILLSWAP_ASYNC_VIEWS') == '1'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
+# Профиль задаётся окружением: SKILLSWAP_DB_ENGINE=sqlite (по умолчанию)
+# или postgresql с SKILLSWAP_DB_NAME/USER/PASSWORD/HOST/PORT.
+DB_ENGINE = os.environ.get('SKILLSWAP_DB_ENGINE', 'sqlite')
+# Постоянные соединения: переживают запрос, перед повторным использованием
+# проверяются (CONN_HEALTH_CHECKS).
+DB_CONN_MAX_AGE = int(os.environ.get('SKILLSWAP_DB_CONN_MAX_AGE', '60'))
+
+# Прагмы на каждое соединение. Режим WAL хранится в файле базы и
+# включается один раз командой sqlite_wal, а не здесь: иначе любой
+# manage.py переводил бы в WAL и файл db.sqlite3 из репозитория.
+# synchronous=NORMAL в WAL не теряет целостность, только последние
+# транзакции при сбое питания.
+SQLITE_PRAGMAS = [
+    'PRAGMA synchronous = NORMAL',
+    f'PRAGMA busy_timeout = {int(os.environ.get("SKILLSWAP_SQLITE_BUSY_TIMEOUT", "20000"))}',
+    f'PRAGMA mmap_size = {int(os.environ.get("SKILLSWAP_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))}',
+    'PRAGMA cache_size = -20000',
+    'PRAGMA temp_store = MEMORY',
+]
+
+if DB_ENGINE == 'postgresql':
+    _DATABASE = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('SKILLSWAP_DB_NAME', 'skillswap_db'),
+        'USER': os.environ.get('SKILLSWAP_DB_USER', 'postgres'),
+        'PASSWORD': os.environ.get('SKILLSWAP_DB_PASSWORD', ''),
+        'HOST': os.environ.get('SKILLSWAP_DB_HOST', 'localhost'),
+        'PORT': os.environ.get('SKILLSWAP_DB_PORT', '5432'),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
+    }
+    # Пул: psycopg (внутри процесса, нужен psycopg[pool]) или pgbouncer
+    # (серверный, режим transaction).
+    DB_POOL = os.environ.get('SKILLSWAP_DB_POOL', '')
+    if DB_POOL == 'psycopg':
+        # соединениями управляет пул, постоянные соединения Django с ним несовместимы
+        _DATABASE['CONN_MAX_AGE'] = 0
+        _DATABASE['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('SKILLSWAP_DB_POOL_MIN', '2')),
+            'max_size': int(os.environ.get('SKILLSWAP_DB_POOL_MAX', '10')),
+            'timeout': 10,
+        }
+    elif DB_POOL == 'pgbouncer':
+        # именованный курсор не переживает смену серверного соединения между транзакциями
+        _DATABASE['DISABLE_SERVER_SIDE_CURSORS'] = True
+else:
+    _DATABASE = {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('SKILLSWAP_DB_NAME', BASE_DIR / 'db.sqlite3'),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # пишущая транзакция берёт блокировку сразу на BEGIN: иначе транзакция,
+            # начатая с чтения, получает «database is locked» при первой записи
+            # мимо busy_timeout
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': ';'.join(SQLITE_PRAGMAS),
+        },
+    }
+
+DATABASES = {
+    'default': _DATABASE,
+}
+
+# Реплика для чтения (PostgreSQL, те же учётные данные). Читают с неё
+# только вьюхи с @read_replica, см. core/db_routers.py.
+DB_REPLICA_HOST = os.environ.get('SKILLSWAP_DB_REPLICA_HOST')
+if DB_ENGINE == 'postgresql' and DB_REPLICA_HOST:
+    DATABASES['replica'] = {
+        **_DATABASE,
+        'HOST': DB_REPLICA_HOST,
+        'PORT': os.environ.get('SKILLSWAP_DB_REPLICA_PORT', _DATABASE['PORT']),
+        'TEST': {'MIRROR': 'default'},
     }
+
+DATABASE_ROUTERS = ['core.db_routers.ReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Кеш фрагментов карточек: locmem (по умолчанию), file или db.
+# Для db нужна таблица: python manage.py createcachetable
+FRAGMENT_CACHE_BACKEND = os.environ.get('SKILLSWAP_FRAGMENT_CACHE', 'locmem')
+FRAGMENT_CACHE_ALIAS = 'fragments'
+FRAGMENT_CACHE_TIMEOUT = 60 * 60
+
+# Кеш страниц целиком (главная, навыки, предложения) до смены версии содержимого
+# и сама версия (core/page_cache.py): locmem, file или db. Запись в одном
+# воркере, run_jobs или админке должна сбросить страницы у всех, поэтому
+# без DEBUG по умолчанию file — общий для процессов машины.
+PAGE_CACHE_BACKEND = os.environ.get('SKILLSWAP_PAGE_CACHE', 'locmem' if DEBUG else 'file')
+PAGE_CACHE_ALIAS = 'pages'
+PAGE_CACHE_TIMEOUT = 10 * 60
+# версия индекса автодополнения (core/autocomplete.py) — там же, чтобы
+# правка навыка в одном процессе дошла до индексов остальных
+AUTOCOMPLETE_CACHE_ALIAS = PAGE_CACHE_ALIAS
+
+_PAGE_CACHES = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'skillswap-pages',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'pages',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'page_cache',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+}
+
+_FRAGMENT_CACHES = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'skillswap-fragments',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'fragments',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'fragment_cache',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
+# Кеш сессий (cached_db), пользователя сессии (core/auth_cache.py),
+# счётчиков попыток входа и непрочитанных: locmem, file или db (python manage.py
+# createcachetable). Сброс после выхода или смены пароля должен дойти до всех
+# воркеров, поэтому без DEBUG по умолчанию file — общий для процессов машины.
+AUTH_CACHE_BACKEND = os.environ.get('SKILLSWAP_AUTH_CACHE', 'locmem' if DEBUG else 'file')
+AUTH_CACHE_ALIAS = 'auth'
+USER_CACHE_TIMEOUT = 5 * 60
+
+_AUTH_CACHES = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'skillswap-auth',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'auth',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'auth_cache',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'skillswap-default',
+    },
+    FRAGMENT_CACHE_ALIAS: {
+        **_FRAGMENT_CACHES[FRAGMENT_CACHE_BACKEND],
+        'TIMEOUT': FRAGMENT_CACHE_TIMEOUT,
+    },
+    AUTH_CACHE_ALIAS: _AUTH_CACHES[AUTH_CACHE_BACKEND],
+    PAGE_CACHE_ALIAS: {
+        **_PAGE_CACHES[PAGE_CACHE_BACKEND],
+        'TIMEOUT': PAGE_CACHE_TIMEOUT,
+    },
+}
+
+
+# Sessions
+# https://docs.djangoproject.com/en/5.2/topics/http/sessions/
+
+# db — каждая сессия читается из таблицы; cached_db (по умолчанию) — из кеша
+# auth, таблица остаётся источником истины; signed_cookies — без хранилища,
+# но выход не отзывает уже выданную cookie. Истёкшие строки таблицы
+# удаляет python manage.py cleanup_sessions.
+SESSION_BACKEND = os.environ.get('SKILLSWAP_SESSION_ENGINE', 'cached_db')
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[SESSION_BACKEND]
+SESSION_CACHE_ALIAS = AUTH_CACHE_ALIAS
+
+# ModelBackend остаётся вторым для сессий, выданных до кеша: в сессии
+# записан путь бэкенда, и без него такие пользователи разлогинились бы.
+# Новые входы идут через CachedModelBackend.
+AUTHENTICATION_BACKENDS = [
+    'core.auth_cache.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+
+# Пароли: pbkdf2 (по умолчанию), scrypt или argon2 (pip install argon2-cffi).
+# Новые хеши считаются выбранным, старые проверяются остальными и при
+# входе пересчитываются; так же пересчитываются хеши со старой стоимостью.
+PASSWORD_HASHER = os.environ.get('SKILLSWAP_PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('SKILLSWAP_PBKDF2_ITERATIONS', 1_000_000))
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.environ.get('SKILLSWAP_SCRYPT_WORK_FACTOR', 2 ** 14))
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('SKILLSWAP_ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.environ.get('SKILLSWAP_ARGON2_MEMORY_COST', 102400))
+
+_PASSWORD_HASHERS = {
+    'pbkdf2': 'core.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'core.hashers.ScryptPasswordHasher',
+    'argon2': 'core.hashers.Argon2PasswordHasher',
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
+# Попытки входа (core/login_throttle.py): не больше N за окно в секундах.
+# ip — все попытки с адреса, email — неудачные на один адрес почты.
+# Отказ происходит до хеширования пароля. None выключает ограничение.
+LOGIN_THROTTLE = {
+    'ip': (30, 5 * 60),
+    'email': (5, 15 * 60),
 }
+LOGIN_THROTTLE_ALIAS = AUTH_CACHE_ALIAS
+
+# Счётчики непрочитанных (core/unread.py) входят в ключ кеша страниц, и
+# сброс после нового сообщения должен дойти до всех воркеров — тот же кеш auth.
+UNREAD_CACHE_ALIAS = AUTH_CACHE_ALIAS
+
+
+# Поиск: fts5 (SQLite FTS5), table (инвертированный индекс в таблице)
+# или auto — FTS5, если миграция смогла создать виртуальную таблицу.
+SEARCH_BACKEND = os.environ.get('SKILLSWAP_SEARCH_BACKEND', 'auto')
+
+
+# Чат обменов (WebSocket через skillswap/asgi.py). Брокер — путь к классу
+# с интерфейсом core.chat.broker.Broker; по умолчанию в пределах процесса.
+CHAT_BROKER = os.environ.get('SKILLSWAP_CHAT_BROKER', 'core.chat.broker.InProcessBroker')
+CHAT_BATCH_SIZE = 200
+CHAT_FLUSH_INTERVAL = 0.05
 
 
 # Password validation
@@ -127,6 +392,12 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, "static"),
 ]
 
+# Бандлы CSS (python manage.py build_assets, см. core/assets.py). Без DEBUG
+# шаблоны ссылаются на собранные файлы, с DEBUG — на исходники.
+ASSETS_URL = "/assets/"
+ASSETS_ROOT = os.path.join(BASE_DIR, "assets")
+ASSETS_BUNDLED = os.environ.get('SKILLSWAP_ASSETS_BUNDLED', '0' if DEBUG else '1') == '1'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
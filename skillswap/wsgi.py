@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'skillswap.settings')
 
 application = get_wsgi_application()
+
+# шаблоны разбираем до первого запроса, а не на нём
+if settings.TEMPLATE_WARMUP:
+    from core.template_warmup import warm
+
+    warm()
@@ -0,0 +1,122 @@
+// Автодополнение навыков: текстовое поле + скрытый input с id навыка
+class SkillAutocomplete {
+    constructor(root) {
+        this.root = root;
+        this.url = root.dataset.url;
+        this.scope = root.dataset.scope;
+        this.hidden = root.querySelector('input[type="hidden"]');
+        this.input = root.querySelector('.skill-autocomplete-input');
+        this.list = root.querySelector('.skill-autocomplete-list');
+        this.items = [];
+        this.active = -1;
+        this.timer = null;
+        this.controller = null;
+
+        this.input.addEventListener('input', () => this.handleInput());
+        this.input.addEventListener('focus', () => this.fetch());
+        this.input.addEventListener('keydown', (e) => this.handleKey(e));
+        this.input.addEventListener('blur', () => setTimeout(() => this.close(), 150));
+    }
+
+    handleInput() {
+        // текст изменён — прежний выбор больше не действителен
+        if (this.hidden.value) {
+            this.setValue('');
+        }
+        clearTimeout(this.timer);
+        this.timer = setTimeout(() => this.fetch(), 120);
+    }
+
+    async fetch() {
+        const query = this.input.value.trim();
+        if (!query && this.scope !== 'mine') {
+            this.close();
+            return;
+        }
+        if (this.controller) {
+            this.controller.abort();
+        }
+        this.controller = new AbortController();
+        const params = new URLSearchParams({ q: query, scope: this.scope });
+        try {
+            const response = await fetch(`${this.url}?${params}`, { signal: this.controller.signal });
+            const data = await response.json();
+            this.render(data.results);
+        } catch (error) {
+            if (error.name !== 'AbortError') {
+                this.close();
+            }
+        }
+    }
+
+    render(results) {
+        this.items = results;
+        this.active = -1;
+        this.list.innerHTML = '';
+        if (!results.length) {
+            const empty = document.createElement('li');
+            empty.className = 'skill-autocomplete-empty';
+            empty.textContent = 'Ничего не найдено';
+            this.list.appendChild(empty);
+        }
+        results.forEach((skill, index) => {
+            const item = document.createElement('li');
+            item.className = 'skill-autocomplete-item';
+            item.setAttribute('role', 'option');
+            item.textContent = `${skill.name} (${skill.level_display})`;
+            const category = document.createElement('span');
+            category.className = 'skill-autocomplete-category';
+            category.textContent = skill.category;
+            item.appendChild(category);
+            item.addEventListener('mousedown', (e) => {
+                e.preventDefault();
+                this.choose(index);
+            });
+            this.list.appendChild(item);
+        });
+        this.list.hidden = false;
+        this.input.setAttribute('aria-expanded', 'true');
+    }
+
+    handleKey(e) {
+        if (this.list.hidden || !this.items.length) {
+            return;
+        }
+        if (e.key === 'ArrowDown' || e.key === 'ArrowUp') {
+            e.preventDefault();
+            const step = e.key === 'ArrowDown' ? 1 : -1;
+            this.active = (this.active + step + this.items.length) % this.items.length;
+            this.list.querySelectorAll('.skill-autocomplete-item').forEach((item, index) => {
+                item.classList.toggle('active', index === this.active);
+            });
+        } else if (e.key === 'Enter' && this.active >= 0) {
+            e.preventDefault();
+            this.choose(this.active);
+        } else if (e.key === 'Escape') {
+            this.close();
+        }
+    }
+
+    choose(index) {
+        const skill = this.items[index];
+        this.input.value = `${skill.name} (${skill.level_display})`;
+        this.input.classList.add('has-value');
+        this.setValue(skill.id);
+        this.close();
+    }
+
+    setValue(value) {
+        this.hidden.value = value;
+        // proposal_create.js слушает change на скрытом поле для валидации
+        this.hidden.dispatchEvent(new Event('change'));
+    }
+
+    close() {
+        this.list.hidden = true;
+        this.input.setAttribute('aria-expanded', 'false');
+    }
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    document.querySelectorAll('.skill-autocomplete').forEach((root) => new SkillAutocomplete(root));
+});
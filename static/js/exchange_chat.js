@@ -0,0 +1,138 @@
+// Чат обмена поверх WebSocket с переподключением
+class ExchangeChat {
+    constructor() {
+        this.messages = document.getElementById('chatMessages');
+        this.form = document.getElementById('chatForm');
+        this.input = document.getElementById('chatInput');
+        this.status = document.getElementById('chatStatus');
+        if (!this.messages) {
+            return;
+        }
+        this.userId = Number(this.messages.dataset.userId);
+        this.path = this.messages.dataset.socketPath;
+        this.retry = 1000;
+        this.historyUrl = this.messages.dataset.historyUrl;
+        this.older = document.getElementById('chatOlder');
+        if (this.older) {
+            this.older.addEventListener('click', () => this.loadOlder());
+        }
+
+        this.form.addEventListener('submit', (e) => {
+            e.preventDefault();
+            this.send();
+        });
+        this.input.addEventListener('keydown', (e) => {
+            if (e.key === 'Enter' && !e.shiftKey) {
+                e.preventDefault();
+                this.send();
+            }
+        });
+        this.scrollDown();
+        this.connect();
+    }
+
+    connect() {
+        const scheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
+        this.socket = new WebSocket(`${scheme}://${window.location.host}${this.path}`);
+        this.socket.addEventListener('open', () => {
+            this.retry = 1000;
+            this.setStatus('В сети', true);
+        });
+        this.socket.addEventListener('message', (e) => this.receive(JSON.parse(e.data)));
+        this.socket.addEventListener('close', (e) => {
+            if (e.code === 4403 || e.code === 4404) {
+                this.setStatus('Нет доступа к чату', false);
+                return;
+            }
+            this.setStatus('Переподключение…', false);
+            setTimeout(() => this.connect(), this.retry);
+            this.retry = Math.min(this.retry * 2, 30000);
+        });
+    }
+
+    send() {
+        const text = this.input.value.trim();
+        if (!text || !this.socket || this.socket.readyState !== WebSocket.OPEN) {
+            return;
+        }
+        this.socket.send(JSON.stringify({ text }));
+        this.input.value = '';
+    }
+
+    receive(data) {
+        if (data.type === 'error') {
+            this.setStatus(data.error, false);
+            return;
+        }
+        if (data.type !== 'message' || this.messages.querySelector(`[data-id="${data.id}"]`)) {
+            return;
+        }
+        const empty = document.getElementById('chatEmpty');
+        if (empty) {
+            empty.remove();
+        }
+        this.messages.appendChild(this.render(data));
+        this.scrollDown();
+        if (data.sender_id !== this.userId) {
+            this.socket.send(JSON.stringify({ type: 'read' }));
+        }
+    }
+
+    render(data) {
+        const item = document.createElement('div');
+        item.className = 'chat-message' + (data.sender_id === this.userId ? ' chat-message-own' : '');
+        item.dataset.id = data.id;
+        const text = document.createElement('div');
+        text.className = 'chat-text';
+        text.textContent = data.text;
+        const time = document.createElement('div');
+        time.className = 'chat-time';
+        time.textContent = new Date(data.sent_at).toLocaleString('ru-RU', {
+            day: '2-digit', month: '2-digit', hour: '2-digit', minute: '2-digit',
+        });
+        item.append(text, time);
+        return item;
+    }
+
+    async loadOlder() {
+        this.older.disabled = true;
+        try {
+            const params = new URLSearchParams({ cursor: this.older.dataset.cursor });
+            const response = await fetch(`${this.historyUrl}?${params}`);
+            if (!response.ok) {
+                throw new Error(response.statusText);
+            }
+            const data = await response.json();
+            // прокрутка не должна прыгать при вставке сверху
+            const bottom = this.messages.scrollHeight - this.messages.scrollTop;
+            const items = data.messages
+                .filter((message) => !this.messages.querySelector(`[data-id="${message.id}"]`))
+                .map((message) => this.render(message));
+            this.older.after(...items);
+            this.messages.scrollTop = this.messages.scrollHeight - bottom;
+            if (data.older) {
+                this.older.dataset.cursor = data.older;
+                this.older.disabled = false;
+            } else {
+                this.older.remove();
+                this.older = null;
+            }
+        } catch (error) {
+            this.older.disabled = false;
+            this.setStatus('Не удалось загрузить историю', false);
+        }
+    }
+
+    setStatus(text, online) {
+        this.status.textContent = text;
+        this.status.classList.toggle('online', online);
+    }
+
+    scrollDown() {
+        this.messages.scrollTop = this.messages.scrollHeight;
+    }
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    new ExchangeChat();
+});